@@ -0,0 +1,23 @@
+"""Throughput benchmarks for the lesson pipeline.
+
+ - `benchmarks.corpus`: synthetic pages in the `example.json` shape, scaled
+   to any number of sections with the sentence-length and keyword
+   distributions of the seed pages
+ - `benchmarks.suites`: per-step micro-benchmarks and the end-to-end
+   rules-only run
+ - `benchmarks.harness`: timing, JSON baselines and regression comparison
+ - `benchmarks.equivalence`: differential checks of the optimized engines
+   against the reference pipeline, with shrunk reproductions
+
+Run with `python -m benchmarks --help` from the project root.
+"""
+
+import sys
+from pathlib import Path
+
+
+# Pipeline modules import each other as top-level packages (`pipeline`, `utils`, ...)
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,118 @@
+"""Benchmark CLI.
+
+    python -m benchmarks run --sections 10000            # micro + e2e, compare to baseline
+    python -m benchmarks run --suite micro --save-baseline
+    python -m benchmarks corpus .out/bench/corpus_1m.json --sections 1000000
+    python -m benchmarks equivalence --sections 2000 --engine batch --engine dag
+
+Every run writes its results to `--output`; when the baseline file exists the
+run is compared against it and exits with status 1 on a regression;
+`equivalence` exits with status 1 when an engine diverges from the reference.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import typer
+
+from benchmarks import PROJECT_ROOT
+from benchmarks.corpus import iter_pages, iter_sections, write_corpus
+from benchmarks.equivalence import ENGINES, check_equivalence
+from benchmarks.harness import compare, format_table, load_baseline, run_meta, save_baseline, to_baseline
+from benchmarks.suites import SUITES, run_cases
+from config.settings import get_settings
+from db.db_utils import page_sections
+
+
+DEFAULT_BASELINE = PROJECT_ROOT / "benchmarks" / "baselines" / "baseline.json"
+
+app = typer.Typer(help="Lesson pipeline benchmarks")
+
+
+def _load_sections(corpus: Optional[Path], n_sections: int, seed: int):
+    if corpus is None:
+        return list(iter_sections(n_sections, seed=seed))
+    pages = json.loads(corpus.read_text(encoding="utf-8"))
+    rows = ((p.get("page_serial_id"), p.get("page_title"), p.get("topic"), p.get("page_key_words"), p.get("page_content")) for p in pages)
+    return list(itertools.islice((s for row in rows for s in page_sections(row)), n_sections))
+
+
+@app.command()
+def corpus(path: Path = typer.Argument(..., help="Output JSON file (example.json shape)"),
+           sections: int = typer.Option(10_000, "--sections", help="Number of sections to generate"),
+           seed: int = typer.Option(0, "--seed")) -> None:
+    """Write a synthetic corpus scaled from example.json."""
+    count = write_corpus(path, iter_pages(sections, seed=seed))
+    typer.echo(f"Wrote {count} sections → {path}")
+
+
+@app.command()
+def run(suite: List[str] = typer.Option(list(SUITES), "--suite", help="Suites to run (micro, e2e)"),
+        only: List[str] = typer.Option([], "--only", help="Run only these benchmark names"),
+        sections: int = typer.Option(10_000, "--sections", help="Sections for the end-to-end suite"),
+        micro_sections: int = typer.Option(2_000, "--micro-sections", help="Sections for the micro suite"),
+        seed: int = typer.Option(0, "--seed"),
+        corpus: Optional[Path] = typer.Option(None, "--corpus", help="Use a corpus file instead of generating one"),
+        repeat: int = typer.Option(5, "--repeat"),
+        warmup: int = typer.Option(1, "--warmup"),
+        baseline: Path = typer.Option(DEFAULT_BASELINE, "--baseline", help="Baseline JSON to compare against"),
+        save_baseline_: bool = typer.Option(False, "--save-baseline", help="Store this run as the new baseline"),
+        threshold: float = typer.Option(0.10, "--threshold", help="Allowed slowdown per unit (0.10 = 10%)"),
+        output: Optional[Path] = typer.Option(None, "--output", help="Results JSON (default: <output_dir>/bench/latest.json)")) -> None:
+    """Run benchmark suites, store results and flag regressions."""
+    unknown = set(suite) - set(SUITES)
+    if unknown:
+        raise typer.BadParameter(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    all_sections = _load_sections(corpus, max(sections, micro_sections), seed)
+    typer.echo(f"Corpus: {len(all_sections)} sections (seed={seed})")
+
+    results = []
+    for name in suite:
+        n = micro_sections if name == "micro" else sections
+        cases = SUITES[name](all_sections[:n])
+        results += run_cases(cases, repeat=repeat, warmup=warmup, only=only)
+
+    meta = run_meta(seed=seed, sections=sections, micro_sections=micro_sections, corpus=str(corpus) if corpus else None, repeat=repeat)
+    current = to_baseline(results, meta)
+    out = save_baseline(output or Path(get_settings().output_dir) / "bench" / "latest.json", current)
+
+    previous = load_baseline(baseline) if baseline.exists() else None
+    typer.echo(format_table(current, previous))
+    typer.echo(f"Results → {out}")
+    regressions = compare(current, previous, threshold) if previous else []
+    if save_baseline_:
+        save_baseline(baseline, current)
+        typer.echo(f"Baseline updated → {baseline}")
+    if regressions:
+        for r in regressions:
+            typer.echo(f"REGRESSION {r.name}: {r.change:+.1%} per unit (> {threshold:.0%})", err=True)
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def equivalence(engine: List[str] = typer.Option(list(ENGINES), "--engine", help="Engines to check (batch, inline, dag, cached, stream)"),
+                sections: int = typer.Option(2_000, "--sections", help="Sections to compare"),
+                seed: int = typer.Option(0, "--seed"),
+                corpus: Optional[Path] = typer.Option(None, "--corpus", help="Use a corpus file instead of generating one"),
+                max_repros: int = typer.Option(5, "--max-repros", help="Divergences to shrink to a minimal repro")) -> None:
+    """Check optimized engines produce the reference pipeline's artifacts."""
+    unknown = set(engine) - set(ENGINES)
+    if unknown:
+        raise typer.BadParameter(f"unknown engine(s): {', '.join(sorted(unknown))}")
+    all_sections = _load_sections(corpus, sections, seed)
+    typer.echo(f"Corpus: {len(all_sections)} sections (seed={seed}); engines: {', '.join(engine)}")
+    divergences = check_equivalence(all_sections, {name: ENGINES[name] for name in engine}, max_repros=max_repros)
+    for d in divergences:
+        typer.echo(d.describe(), err=True)
+    if divergences:
+        typer.echo(f"{len(divergences)} divergence(s)", err=True)
+        raise typer.Exit(code=1)
+    typer.echo("All engines match the reference")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,211 @@
+"""Synthetic corpus generator scaled from `example.json`.
+
+`learn_profile` measures the seed pages: sentences per section, words per
+sentence, sections per page, keyword list sizes, how often a sentence
+mentions one of its section keywords, and the word frequencies.
+`iter_pages` then emits pages in the same JSON shape as the seed file:
+ - sentence lengths come from real seed sentences, which are re-worded by
+   swapping content words for words drawn from the seed frequencies; cue
+   words ("is a", "because", "first", "for example", ...) are kept, so
+   the classifier sees the seed label mix
+ - keywords are drawn Zipf-style from the seed keyword pool and injected
+   at the measured mention rate; digits are re-rolled
+Output is deterministic for a given seed and streams, so 1M sections never
+sit in memory at once.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import json
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from benchmarks import PROJECT_ROOT
+from db.db_utils import page_sections
+from db.models import RawSection
+from utils.text_clean import split_sentences
+
+
+EXAMPLE_PATH = PROJECT_ROOT / "example.json"
+
+# Kept verbatim when re-wording a sentence: the classifier's cue words
+CUE_WORDS = frozenset(
+    "a an the is are of to in on and or for by with as at from that this it "
+    "because therefore so enables keeps causes settled accrues aligns align funding mark price "
+    "step first second third then finally vs versus compared opposed either "
+    "example instance investor scenario tim defined refers type".split()
+)
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'\-]*")
+_DIGIT_RE = re.compile(r"\d")
+
+
+@dataclass
+class CorpusProfile:
+    sentences: List[str] = field(default_factory=list)
+    sentences_per_section: List[int] = field(default_factory=list)
+    sections_per_page: List[int] = field(default_factory=list)
+    page_keyword_counts: List[int] = field(default_factory=list)
+    section_keyword_counts: List[int] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)  # most frequent first
+    keyword_mention_rate: float = 0.0
+    words: List[str] = field(default_factory=list)
+    word_cum_weights: List[int] = field(default_factory=list)
+    titles: List[str] = field(default_factory=list)
+    topics: List[str] = field(default_factory=list)
+
+    @property
+    def mean_sentence_words(self) -> float:
+        lengths = [len(s.split()) for s in self.sentences]
+        return sum(lengths) / len(lengths) if lengths else 0.0
+
+
+def load_example(path: Path = EXAMPLE_PATH) -> List[Dict[str, Any]]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def learn_profile(pages: Sequence[Dict[str, Any]]) -> CorpusProfile:
+    profile = CorpusProfile()
+    keyword_freq: Counter = Counter()
+    word_freq: Counter = Counter()
+    mentions = 0
+    for page in pages:
+        content = page.get("page_content") or []
+        profile.sections_per_page.append(len(content))
+        page_keywords = page.get("page_key_words") or []
+        profile.page_keyword_counts.append(len(page_keywords))
+        keyword_freq.update(page_keywords)
+        if page.get("page_title"):
+            profile.titles.append(page["page_title"])
+        for section in content:
+            keywords = section.get("section_key_words") or page_keywords
+            profile.section_keyword_counts.append(len(keywords))
+            keyword_freq.update(section.get("section_key_words") or [])
+            if section.get("section_title"):
+                profile.titles.append(section["section_title"])
+            if section.get("topic"):
+                profile.topics.append(section["topic"])
+            sentences = split_sentences(section.get("text") or "")
+            profile.sentences_per_section.append(len(sentences))
+            lowered_keywords = [k.lower() for k in keywords]
+            for sentence in sentences:
+                profile.sentences.append(sentence)
+                lowered = sentence.lower()
+                mentions += any(k in lowered for k in lowered_keywords)
+                word_freq.update(w.lower() for w in _WORD_RE.findall(sentence))
+    if not profile.sentences:
+        raise ValueError("seed pages contain no sentences")
+    profile.keywords = [k for k, _ in keyword_freq.most_common()]
+    profile.keyword_mention_rate = mentions / len(profile.sentences)
+    content_words = [(w, c) for w, c in word_freq.most_common() if w not in CUE_WORDS]
+    profile.words = [w for w, _ in content_words]
+    profile.word_cum_weights = list(itertools.accumulate(c for _, c in content_words))
+    profile.topics = profile.topics or ["General"]
+    return profile
+
+
+class CorpusGenerator:
+    def __init__(self, profile: CorpusProfile, *, seed: int = 0, reword_rate: float = 0.6, zipf_s: float = 1.1) -> None:
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.reword_rate = reword_rate
+        # Zipf weights over the keyword pool, most frequent seed keyword first
+        self._kw_cum = list(itertools.accumulate(1.0 / (rank ** zipf_s) for rank in range(1, len(profile.keywords) + 1)))
+
+    def _word(self) -> str:
+        cum = self.profile.word_cum_weights
+        return self.profile.words[bisect.bisect_right(cum, self.rng.random() * cum[-1])]
+
+    def _keywords(self, n: int) -> List[str]:
+        if not self.profile.keywords:
+            return []
+        picked: Dict[str, None] = {}
+        for _ in range(n * 3):
+            if len(picked) >= n:
+                break
+            idx = bisect.bisect_right(self._kw_cum, self.rng.random() * self._kw_cum[-1])
+            picked[self.profile.keywords[min(idx, len(self.profile.keywords) - 1)]] = None
+        return list(picked)
+
+    def draw_count(self, observed: Sequence[int], jitter: int = 1) -> int:
+        return max(1, self.rng.choice(observed) + self.rng.randint(-jitter, jitter))
+
+    def sentence(self, keywords: Sequence[str]) -> str:
+        rng = self.rng
+        words = rng.choice(self.profile.sentences).split(" ")
+        for i, token in enumerate(words):
+            core = token.strip(".,;:!?()\"'").lower()
+            if core and core not in CUE_WORDS and _WORD_RE.fullmatch(core) and rng.random() < self.reword_rate:
+                words[i] = token.lower().replace(core, self._word(), 1)
+        out = _DIGIT_RE.sub(lambda _: str(rng.randint(0, 9)), " ".join(words))
+        if keywords and rng.random() < self.profile.keyword_mention_rate:
+            end = out[-1] if out[-1] in ".!?" else "."
+            out = f"{out.rstrip('.!?')} with {rng.choice(keywords)}{end}"
+        return out[0].upper() + out[1:]
+
+    def page(self, page_id: int, n_sections: int) -> Dict[str, Any]:
+        rng = self.rng
+        profile = self.profile
+        page_keywords = self._keywords(self.draw_count(profile.page_keyword_counts, jitter=3))
+        topic = rng.choice(profile.topics)
+        content = []
+        for serial in range(1, n_sections + 1):
+            keywords = self._keywords(self.draw_count(profile.section_keyword_counts, jitter=2))
+            n_sentences = self.draw_count(profile.sentences_per_section, jitter=2)
+            text = " ".join(self.sentence(keywords or page_keywords) for _ in range(n_sentences))
+            content.append({
+                "section_serial_id": serial,
+                "section_title": rng.choice(profile.titles),
+                "text": text,
+                "is_text_relevant": True,
+                "topic": topic,
+                "section_key_words": keywords,
+            })
+        return {
+            "page_serial_id": page_id,
+            "page_title": f"{rng.choice(profile.titles)} #{page_id}",
+            "page_key_words": page_keywords,
+            "page_content": content,
+            "topic": topic,
+        }
+
+
+def iter_pages(n_sections: int, *, seed: int = 0, profile: Optional[CorpusProfile] = None) -> Iterator[Dict[str, Any]]:
+    """Yield synthetic pages until `n_sections` sections have been emitted."""
+    profile = profile or learn_profile(load_example())
+    gen = CorpusGenerator(profile, seed=seed)
+    emitted = 0
+    page_id = 1
+    while emitted < n_sections:
+        count = min(gen.draw_count(profile.sections_per_page), n_sections - emitted)
+        yield gen.page(page_id, count)
+        emitted += count
+        page_id += 1
+
+
+def iter_sections(n_sections: int, *, seed: int = 0, profile: Optional[CorpusProfile] = None) -> Iterator[RawSection]:
+    """Synthetic pages flattened the way Step 1 flattens DB rows."""
+    for page in iter_pages(n_sections, seed=seed, profile=profile):
+        row = (page["page_serial_id"], page["page_title"], page["topic"], page["page_key_words"], page["page_content"])
+        yield from page_sections(row)
+
+
+def write_corpus(path: Path, pages: Iterable[Dict[str, Any]]) -> int:
+    """Stream pages to a JSON array file; returns the number of sections."""
+    sections = 0
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write("[")
+        for i, page in enumerate(pages):
+            fh.write(",\n" if i else "\n")
+            fh.write(json.dumps(page, ensure_ascii=False))
+            sections += len(page["page_content"])
+        fh.write("\n]\n")
+    return sections
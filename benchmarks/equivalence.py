@@ -0,0 +1,263 @@
+"""Differential testing: optimized engines vs. the reference pipeline.
+
+The reference engine calls the straightforward per-section functions
+(`normalize_and_split`, `classify_with_scores`, `score_sentences`,
+`select_minimal_set`, then Steps 6–10 without rewriting). Each optimized
+engine runs the same sections through a fast path (columnar batch, DAG
+scheduler, warm step cache, streaming runtime) and must produce identical
+artifacts: same sentences, labels, probabilities, scores and selections,
+compared exactly (no float tolerance).
+
+A divergence is reported at the first differing field and location, with
+a minimal reproduction: the section's sentences and keywords are shrunk
+(delta debugging) while the two engines still disagree on that field.
+
+    python -m benchmarks equivalence --sections 2000 --seed 3
+"""
+
+from __future__ import annotations
+
+import json
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from db.models import RawSection
+from pipeline.orchestrator import (
+    DEFAULT_TEMPLATES_PATH,
+    RunOptions,
+    SectionResult,
+    labeled_records,
+    run_sections,
+    run_sections_concurrent,
+)
+from pipeline.step2_normalize import normalize_and_split, split_batch
+from pipeline.step3_label import label_batch
+from pipeline.step4_score import score_batch, score_sentences
+from pipeline.step5_select import select_from_batch, select_minimal_set
+from pipeline.step6_steps import decide_step_count
+from pipeline.step7_templates import load_templates, map_to_templates
+from pipeline.step9_difficulty import determine_difficulty
+from pipeline.step10_quality import evaluate_item
+from services.classifier import classify_with_scores
+
+
+# Per-section artifacts, in pipeline order
+FIELDS: Tuple[str, ...] = ("sentences", "labeled", "scored", "selected", "step_count", "mapped", "difficulty", "quality")
+
+Outputs = Dict[str, Any]
+Engine = Callable[[Sequence[RawSection]], List[Outputs]]
+
+
+# -----------------------------
+# Engines
+# -----------------------------
+
+def reference_engine(sections: Sequence[RawSection]) -> List[Outputs]:
+    templates = load_templates(DEFAULT_TEMPLATES_PATH)
+    out: List[Outputs] = []
+    for s in sections:
+        sentences = normalize_and_split(s.text or "")
+        pairs = [(t, classify_with_scores(t, section_keywords=s.keywords)) for t in sentences]
+        labeled = labeled_records(s.section_id, pairs)
+        scored = score_sentences(sentences, section_id=s.section_id, section_keywords=s.keywords, labeled=labeled)
+        selected = select_minimal_set(pairs, scored)
+        context = {"title": s.title or s.page_title, "topic": s.topic, "keywords": s.keywords or []}
+        mapped = map_to_templates(selected, templates, context)
+        texts = [text for step in mapped for text in step.get("content", [])]
+        out.append({
+            "sentences": sentences,
+            "labeled": labeled,
+            "scored": scored,
+            "selected": selected,
+            "step_count": decide_step_count(selected),
+            "mapped": mapped,
+            "difficulty": determine_difficulty("\n".join(texts), s.keywords or []),
+            "quality": [{"text": t, "ok": r.ok, "reason": r.reason} for t, r in ((t, evaluate_item(t)) for t in texts)],
+        })
+    return out
+
+
+def batch_engine(sections: Sequence[RawSection]) -> List[Outputs]:
+    """Steps 2–5 over one `PageBatch` holding every section."""
+    scored = score_batch(label_batch(split_batch(sections), use_llm=False))
+    return [
+        {
+            "sentences": scored.sentences(j),
+            "labeled": scored.labeled_records(j),
+            "scored": scored.scored_records(j),
+            "selected": select_from_batch(scored, j),
+        }
+        for j in range(scored.n_sections)
+    ]
+
+
+def _result_outputs(result: SectionResult) -> Outputs:
+    return {
+        "sentences": result.sentences,
+        "labeled": result.labeled,
+        "scored": result.scored,
+        "selected": result.selected,
+        "step_count": result.step_count,
+        "mapped": result.mapped,
+        "difficulty": result.difficulty,
+        "quality": result.quality,
+    }
+
+
+def _options(**kw: Any) -> RunOptions:
+    return RunOptions(use_llm=False, rewrite=False, **kw)
+
+
+def inline_engine(sections: Sequence[RawSection]) -> List[Outputs]:
+    return [_result_outputs(r) for r in run_sections(sections, _options())]
+
+
+def dag_engine(sections: Sequence[RawSection]) -> List[Outputs]:
+    return [_result_outputs(r) for r in run_sections_concurrent(sections, _options())]
+
+
+def cached_engine(sections: Sequence[RawSection]) -> List[Outputs]:
+    """Second run over a step cache filled by the first (every step a hit)."""
+    from pipeline.cache import StepCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        options = _options(cache=StepCache(Path(tmp)))
+        for _ in run_sections(sections, options):
+            pass
+        return [_result_outputs(r) for r in run_sections(sections, options)]
+
+
+def stream_engine(sections: Sequence[RawSection]) -> List[Outputs]:
+    from pipeline.streaming import run_sections_streaming
+
+    return [_result_outputs(r) for _, r in run_sections_streaming(sections, _options())]
+
+
+ENGINES: Dict[str, Engine] = {
+    "batch": batch_engine,
+    "inline": inline_engine,
+    "dag": dag_engine,
+    "cached": cached_engine,
+    "stream": stream_engine,
+}
+
+
+# -----------------------------
+# Comparison and shrinking
+# -----------------------------
+
+@dataclass(frozen=True)
+class Divergence:
+    engine: str
+    section_id: int
+    field: str
+    path: str  # location of the first difference inside the field
+    expected: Any
+    actual: Any
+    repro: Optional[RawSection] = None  # shrunk section that still diverges on `field`
+
+    def describe(self) -> str:
+        lines = [
+            f"[{self.engine}] section {self.section_id}: {self.field}{self.path}",
+            f"  expected: {self.expected!r}",
+            f"  actual:   {self.actual!r}",
+        ]
+        if self.repro is not None:
+            repro = {"text": self.repro.text, "keywords": self.repro.keywords}
+            lines.append(f"  repro:    {json.dumps(repro, ensure_ascii=False)}")
+        return "\n".join(lines)
+
+
+def first_difference(expected: Any, actual: Any, path: str = "") -> Optional[Tuple[str, Any, Any]]:
+    """(path, expected, actual) at the first mismatch; None when equal."""
+    if isinstance(expected, Mapping) and isinstance(actual, Mapping):
+        for key in list(expected) + [k for k in actual if k not in expected]:
+            if key not in expected or key not in actual:
+                return f"{path}.{key}", expected.get(key), actual.get(key)
+            diff = first_difference(expected[key], actual[key], f"{path}.{key}")
+            if diff:
+                return diff
+        return None
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            diff = first_difference(a, b, f"{path}[{i}]")
+            if diff:
+                return diff
+        if len(expected) != len(actual):
+            return f"{path}.length", len(expected), len(actual)
+        return None
+    if type(expected) is not type(actual) or expected != actual:
+        return path, expected, actual
+    return None
+
+
+def _diverging_field(expected: Outputs, actual: Outputs) -> Optional[Tuple[str, str, Any, Any]]:
+    for name in FIELDS:
+        if name in expected and name in actual:
+            diff = first_difference(expected[name], actual[name])
+            if diff:
+                return (name,) + diff
+    return None
+
+
+def _ddmin(items: List[Any], fails: Callable[[List[Any]], bool]) -> List[Any]:
+    """Smallest sublist (1-minimal) for which `fails` still holds."""
+    n = 2
+    while len(items) >= 2:
+        chunk = -(-len(items) // n)
+        for start in range(0, len(items), chunk):
+            rest = items[:start] + items[start + chunk:]
+            if rest and fails(rest):
+                items, n = rest, max(n - 1, 2)
+                break
+        else:
+            if n >= len(items):
+                break
+            n = min(len(items), n * 2)
+    return items
+
+
+def shrink(section: RawSection, field: str, engine: Engine, reference: Engine = reference_engine) -> RawSection:
+    """Drop sentences, then keywords, while `engine` still diverges on `field`."""
+
+    def fails(candidate: RawSection) -> bool:
+        diff = _diverging_field(reference([candidate])[0], engine([candidate])[0])
+        return diff is not None and diff[0] == field
+
+    sentences = normalize_and_split(section.text or "") or [section.text or ""]
+    kept = _ddmin(sentences, lambda s: fails(replace(section, text=" ".join(s))))
+    section = replace(section, text=" ".join(kept))
+    keywords = list(section.keywords or [])
+    if keywords and fails(replace(section, keywords=None)):
+        return replace(section, keywords=None)
+    kept_kw = _ddmin(keywords, lambda k: fails(replace(section, keywords=k))) if keywords else keywords
+    return replace(section, keywords=kept_kw or section.keywords)
+
+
+def check_equivalence(
+    sections: Sequence[RawSection],
+    engines: Optional[Mapping[str, Engine]] = None,
+    *,
+    reference: Engine = reference_engine,
+    max_repros: int = 5,
+) -> List[Divergence]:
+    """Run every engine against `reference`; one `Divergence` per diverging
+    (engine, section), the first `max_repros` of them shrunk."""
+    sections = list(sections)
+    expected = reference(sections)
+    divergences: List[Divergence] = []
+    for name, engine in (engines or ENGINES).items():
+        actual = engine(sections)
+        if len(actual) != len(expected):
+            divergences.append(Divergence(name, -1, "sections", ".length", len(expected), len(actual)))
+            continue
+        for section, exp, act in zip(sections, expected, actual):
+            diff = _diverging_field(exp, act)
+            if diff is None:
+                continue
+            field, path, want, got = diff
+            repro = shrink(section, field, engine, reference) if len(divergences) < max_repros else None
+            divergences.append(Divergence(name, section.section_id, field, path, want, got, repro))
+    return divergences
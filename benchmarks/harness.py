@@ -0,0 +1,151 @@
+"""Timing, JSON baselines and regression checks.
+
+A benchmark is a zero-argument callable that processes `units` items (sentences,
+sections, ...). `measure` calls it `repeat` times after `warmup` runs and keeps
+every wall time; the median per unit is what gets compared (so runs over
+different corpus sizes stay comparable), the min and max show noise.
+
+Baselines are JSON files:
+    {"meta": {...}, "results": {"<name>": {"median_s": ..., "units_per_s": ...}}}
+`compare` flags a benchmark that got slower than the baseline by more than
+`threshold` (a fraction, 0.10 = 10%).
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import PROJECT_ROOT
+
+
+@dataclass
+class BenchResult:
+    name: str
+    units: int
+    unit: str
+    times_s: List[float] = field(default_factory=list)
+
+    @property
+    def median_s(self) -> float:
+        return statistics.median(self.times_s)
+
+    @property
+    def units_per_s(self) -> float:
+        return self.units / self.median_s if self.median_s > 0 else float("inf")
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "units": self.units,
+            "unit": self.unit,
+            "median_s": round(self.median_s, 6),
+            "min_s": round(min(self.times_s), 6),
+            "max_s": round(max(self.times_s), 6),
+            "units_per_s": round(self.units_per_s, 2),
+            "repeat": len(self.times_s),
+        }
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline_s: float
+    current_s: float
+
+    @property
+    def change(self) -> float:
+        return self.current_s / self.baseline_s - 1.0
+
+
+def measure(name: str, fn: Callable[[], Any], *, units: int, unit: str, repeat: int = 5, warmup: int = 1) -> BenchResult:
+    for _ in range(warmup):
+        fn()
+    result = BenchResult(name=name, units=units, unit=unit)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # keep collector pauses out of the timed region
+    try:
+        for _ in range(max(1, repeat)):
+            gc.collect()
+            t0 = time.perf_counter()
+            fn()
+            result.times_s.append(time.perf_counter() - t0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return result
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=5, check=True,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_meta(**extra: Any) -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        **extra,
+    }
+
+
+def to_baseline(results: List[BenchResult], meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {"meta": meta, "results": {r.name: r.to_json() for r in results}}
+
+
+def save_baseline(path: Path, payload: Dict[str, Any]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+    return path
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> List[Regression]:
+    """Benchmarks present in both runs whose per-unit median slowed down by > `threshold`."""
+    regressions: List[Regression] = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or base.get("median_s", 0) <= 0:
+            continue
+        base_s = base["median_s"] / max(1, base.get("units", 1))
+        cur_s = cur["median_s"] / max(1, cur.get("units", 1))
+        if cur_s > base_s * (1.0 + threshold):
+            regressions.append(Regression(name, base_s, cur_s))
+    return regressions
+
+
+def format_table(current: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    rows = [f"{'benchmark':<24} {'units':>8} {'median_s':>10} {'units/s':>12} {'vs base':>9}"]
+    for name, cur in sorted(current["results"].items()):
+        delta = ""
+        base = (baseline or {}).get("results", {}).get(name)
+        if base and base.get("median_s", 0) > 0:
+            per_unit = cur["median_s"] / max(1, cur["units"])
+            base_per_unit = base["median_s"] / max(1, base.get("units", 1))
+            delta = f"{per_unit / base_per_unit - 1.0:+.1%}"
+        rows.append(f"{name:<24} {cur['units']:>8} {cur['median_s']:>10.4f} {cur['units_per_s']:>12,.1f} {delta:>9}")
+    return "\n".join(rows)
+
@@ -0,0 +1,139 @@
+"""Benchmark cases over a synthetic corpus.
+
+Micro-benchmarks time one step function over the whole input, with the
+upstream steps precomputed once in `StepInputs` so only the step under test is
+timed; `steps2to5_batch` runs Steps 2–5 over one columnar `PageBatch`.
+`e2e_rules` runs Steps 2–11 through the orchestrator with the LLM fallback and
+rewriting disabled (no network), which is the CPU ceiling of the pipeline.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.harness import BenchResult, measure
+from db.models import RawSection
+from pipeline.orchestrator import DEFAULT_TEMPLATES_PATH, RunOptions, labeled_records, run_sections
+from pipeline.step2_normalize import normalize_and_split, split_batch
+from pipeline.step3_label import label_batch
+from pipeline.step4_score import score_batch, score_sentences
+from pipeline.step5_select import select_from_batch, select_minimal_set
+from pipeline.step7_templates import get_engine
+from services.classifier import Classification, classify_with_scores
+from utils.readability import readability_stats
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    unit: str
+    units: int
+    fn: Callable[[], Any]
+
+
+@dataclass
+class StepInputs:
+    sections: List[RawSection]
+    sentences: List[List[str]] = field(default_factory=list)
+    pairs: List[List[Tuple[str, Classification]]] = field(default_factory=list)
+    labeled: List[List[Dict[str, Any]]] = field(default_factory=list)
+    scored: List[List[Dict[str, Any]]] = field(default_factory=list)
+    selected: List[Dict[str, List[str]]] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, sections: Sequence[RawSection]) -> "StepInputs":
+        inputs = cls(list(sections))
+        for s in inputs.sections:
+            sentences = normalize_and_split(s.text or "")
+            pairs = [(t, classify_with_scores(t, section_keywords=s.keywords)) for t in sentences]
+            labeled = labeled_records(s.section_id, pairs)
+            scored = score_sentences(sentences, section_id=s.section_id, section_keywords=s.keywords, labeled=labeled)
+            inputs.sentences.append(sentences)
+            inputs.pairs.append(pairs)
+            inputs.labeled.append(labeled)
+            inputs.scored.append(scored)
+            inputs.selected.append(select_minimal_set(pairs, scored))
+        return inputs
+
+    @property
+    def n_sentences(self) -> int:
+        return sum(len(s) for s in self.sentences)
+
+
+def micro_cases(sections: Sequence[RawSection]) -> List[Case]:
+    inputs = StepInputs.build(sections)
+    n_sections = len(inputs.sections)
+    engine = get_engine(DEFAULT_TEMPLATES_PATH)
+    contexts = [
+        {"title": s.title or s.page_title, "topic": s.topic, "keywords": s.keywords or []}
+        for s in inputs.sections
+    ]
+
+    def split() -> None:
+        for s in inputs.sections:
+            normalize_and_split(s.text or "")
+
+    def classify() -> None:
+        for s, sentences in zip(inputs.sections, inputs.sentences):
+            for t in sentences:
+                classify_with_scores(t, section_keywords=s.keywords)
+
+    def score() -> None:
+        for s, sentences, labeled in zip(inputs.sections, inputs.sentences, inputs.labeled):
+            score_sentences(sentences, section_id=s.section_id, section_keywords=s.keywords, labeled=labeled)
+
+    def select() -> None:
+        for pairs, scored in zip(inputs.pairs, inputs.scored):
+            select_minimal_set(pairs, scored)
+
+    def batch() -> None:
+        scored = score_batch(label_batch(split_batch(inputs.sections), use_llm=False))
+        for j in range(scored.n_sections):
+            select_from_batch(scored, j)
+
+    def readability() -> None:
+        # Bypass the per-text memo (every repeat would hit it); the per-word
+        # syllable memo stays warm, as it does across a real run
+        stats = readability_stats.__wrapped__
+        for s in inputs.sections:
+            stats(s.text or "")
+
+    def render() -> None:
+        engine.render_batch(zip(inputs.selected, contexts))
+
+    return [
+        Case("step2_split", "section", n_sections, split),
+        Case("step3_classify", "sentence", inputs.n_sentences, classify),
+        Case("step4_score", "section", n_sections, score),
+        Case("step5_select", "section", n_sections, select),
+        Case("steps2to5_batch", "section", n_sections, batch),
+        Case("readability", "section", n_sections, readability),
+        Case("step7_render", "section", n_sections, render),
+    ]
+
+
+def e2e_cases(sections: Sequence[RawSection]) -> List[Case]:
+    sections = list(sections)
+    options = RunOptions(use_llm=False, rewrite=False)
+
+    def rules_only() -> None:
+        for _ in run_sections(sections, options):
+            pass
+
+    return [Case("e2e_rules", "section", len(sections), rules_only)]
+
+
+SUITES: Dict[str, Callable[[Sequence[RawSection]], List[Case]]] = {
+    "micro": micro_cases,
+    "e2e": e2e_cases,
+}
+
+
+def run_cases(cases: Sequence[Case], *, repeat: int = 5, warmup: int = 1, only: Optional[Sequence[str]] = None) -> List[BenchResult]:
+    wanted = set(only or ())
+    return [
+        measure(c.name, c.fn, units=c.units, unit=c.unit, repeat=repeat, warmup=warmup)
+        for c in cases
+        if not wanted or c.name in wanted
+    ]
@@ -1,26 +1,174 @@
+"""Artifact I/O for the step commands.
+
+Format is chosen by file suffix:
+ - `.json`: one indented document (human-friendly, loaded whole)
+ - `.jsonl` / `.jsonl.gz`: one compact record per line, streamed on read and
+   write, optionally gzip-compressed
+
+JSON Lines writers can emit a sidecar offset index (`<path>.idx`) keyed by a
+record field such as `section_id`, so `find_record` seeks straight to one
+record instead of parsing the whole Step 1 dump. Gzip offsets refer to the
+uncompressed stream; seeking there still decompresses up to the record but
+skips all JSON parsing. The index records the data file's size; an index
+whose size no longer matches, or whose offset does not land on the
+requested record, is ignored in favour of a scan.
+"""
+
 from __future__ import annotations
 
+import gzip
 import json
 from dataclasses import asdict, is_dataclass
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
 
 
 def ensure_out_dir(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
-def write_json(path: Path, data: Any) -> None:
+def is_jsonl(path: Path) -> bool:
+    suffixes = Path(path).suffixes
+    return bool(suffixes) and (suffixes[-1] == ".jsonl" or suffixes[-2:] == [".jsonl", ".gz"])
+
+
+def index_path(path: Path) -> Path:
+    return Path(str(path) + ".idx")
+
+
+def _open_binary(path: Path, mode: str) -> IO[bytes]:
+    if Path(path).suffix == ".gz":
+        return gzip.open(path, mode)  # type: ignore[return-value]
+    return Path(path).open(mode)
+
+
+class JsonlWriter:
+    """Stream records to a JSON Lines file, optionally indexing `index_key`.
+
+    `append=True` continues an existing plain `.jsonl` file (and its index).
+    """
+
+    def __init__(self, path: Path, index_key: Optional[str] = None, append: bool = False) -> None:
+        self.path = Path(path)
+        self.index_key = index_key
+        self.offsets: Dict[str, int] = {}
+        self.count = 0
+        self._pos = 0
+        ensure_out_dir(self.path)
+        if append and self.path.suffix == ".gz":
+            raise ValueError("append is only supported for uncompressed .jsonl")
+        if append and self.path.exists():
+            self._pos = self.path.stat().st_size
+            if index_key:
+                self.offsets = dict(_load_index(self.path, index_key) or {})
+        if not index_key:
+            index_path(self.path).unlink(missing_ok=True)  # would describe the old contents
+        self._fh = _open_binary(self.path, "ab" if append else "wb")
+
+    def write(self, record: Any) -> None:
+        rec = _to_jsonable(record)
+        line = (json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        if self.index_key and isinstance(rec, dict) and rec.get(self.index_key) is not None:
+            self.offsets.setdefault(str(rec[self.index_key]), self._pos)
+        self._fh.write(line)
+        self._pos += len(line)
+        self.count += 1
+
+    def write_many(self, records: Iterable[Any]) -> None:
+        for rec in records:
+            self.write(rec)
+
+    def close(self) -> None:
+        if self._fh.closed:
+            return
+        self._fh.close()
+        if self.index_key:
+            size = self.path.stat().st_size
+            idx = {"key": self.index_key, "count": self.count, "size": size, "offsets": self.offsets}
+            index_path(self.path).write_text(json.dumps(idx, separators=(",", ":")), encoding="utf-8")
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def write_jsonl(path: Path, records: Iterable[Any], index_key: Optional[str] = None) -> int:
+    with JsonlWriter(path, index_key=index_key) as w:
+        w.write_many(records)
+    return w.count
+
+
+def iter_jsonl(path: Path) -> Iterator[Any]:
+    with _open_binary(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_json(path: Path, data: Any, index_key: Optional[str] = None) -> None:
+    if is_jsonl(path):
+        if not isinstance(data, (list, tuple)):
+            raise ValueError(f"{path}: JSON Lines output needs a list of records, got {type(data).__name__}; use a .json path")
+        write_jsonl(path, data, index_key=index_key)
+        return
     ensure_out_dir(path)
     with path.open("w", encoding="utf-8") as f:
         json.dump(_to_jsonable(data), f, ensure_ascii=False, indent=2)
 
 
 def read_json(path: Path) -> Any:
+    if is_jsonl(path):
+        return list(iter_jsonl(path))
     with path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
 
+def _load_index(path: Path, key: str) -> Optional[Dict[str, int]]:
+    idx_path = index_path(path)
+    try:
+        idx = json.loads(idx_path.read_text(encoding="utf-8"))
+        size = Path(path).stat().st_size
+    except (OSError, ValueError):
+        return None
+    if idx.get("key") != key or idx.get("size") != size:
+        return None  # stale: data rewritten or appended after the index
+    return idx.get("offsets")
+
+
+def find_record(path: Path, value: Any, key: str = "section_id") -> Optional[Dict[str, Any]]:
+    """Return the first record whose `key` equals `value`.
+
+    JSON Lines with a fresh sidecar index: one seek + one line parse.
+    Otherwise falls back to a streaming (JSONL) or full (JSON) scan.
+    """
+    if is_jsonl(path):
+        offsets = _load_index(path, key)
+        if offsets is not None:
+            pos = offsets.get(str(value))
+            if pos is None:
+                return None
+            with _open_binary(path, "rb") as f:
+                f.seek(pos)
+                try:
+                    rec = json.loads(f.readline())
+                except ValueError:
+                    rec = None
+            if isinstance(rec, dict) and str(rec.get(key)) == str(value):
+                return rec
+            # Offset does not point at the record: the index is stale, scan instead
+        records: Iterable[Any] = iter_jsonl(path)
+    else:
+        records = read_json(path)
+        if not isinstance(records, list):
+            return None
+    for rec in records:
+        if isinstance(rec, dict) and str(rec.get(key)) == str(value):
+            return rec
+    return None
+
+
 def _to_jsonable(obj: Any) -> Any:
     if is_dataclass(obj):
         return asdict(obj)
@@ -29,5 +177,3 @@ def _to_jsonable(obj: Any) -> Any:
     if isinstance(obj, dict):
         return {k: _to_jsonable(v) for k, v in obj.items()}
     return obj
-
-
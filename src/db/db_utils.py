@@ -1,17 +1,81 @@
 """DB utilities for fetching raw sections from Neon Postgres.
 
-Provides `fetch_pending_sections(limit)` for production/dev DB reads.
+Provides `fetch_pending_sections(limit)` for production/dev DB reads and
+`iter_pending_sections(limit)`, which streams pages through a server-side
+cursor so downstream work can start before the fetch finishes. The daemon
+(`pipeline.daemon`) uses `fetch_sections_for_pages` and `page_ids_after` on
+its own long-lived connection; the domain-vocabulary index
+(`services.domain_vocab`) reads raw page rows with `page_rows_after`.
 """
 
 from __future__ import annotations
 
-from typing import List, Optional
-
-import psycopg
+import json
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional, Sequence
 
 from config.settings import get_settings
+from utils.metrics import histogram
 from .models import RawSection
 
+if TYPE_CHECKING:  # psycopg is imported on first connect (slow to import)
+    import psycopg
+
+
+_PAGE_COLUMNS = """
+        SELECT serial_id AS page_id,
+               page_title,
+               topic,
+               page_key_words,
+               page_content
+        FROM {table}
+"""
+
+
+DB_SECONDS = histogram("db_query_seconds", "Postgres query time by query")
+
+
+def database_url() -> str:
+    settings = get_settings()
+    if not settings.database_url:
+        raise RuntimeError("DATABASE_URL not configured in environment")
+    return settings.database_url
+
+
+def page_sections(row: Sequence[Any]) -> Iterator[RawSection]:
+    """Flatten one page row (`_PAGE_COLUMNS`) into its sections."""
+    page_id, page_title, page_topic, page_keywords, page_content = row
+    try:
+        sections = page_content if isinstance(page_content, list) else json.loads(page_content)
+    except Exception:
+        sections = []
+    for s in sections or []:
+        if not isinstance(s, dict):
+            continue
+        section_serial_id: Optional[int] = s.get("section_serial_id")
+        section_title: Optional[str] = s.get("section_title")
+        text: str = (s.get("text") or "")
+        section_topic: Optional[str] = s.get("topic")
+        section_keywords = s.get("section_key_words") or page_keywords
+
+        # Compute a stable synthetic section_id for convenience (internal use)
+        computed_id: Optional[int] = None
+        try:
+            if page_id is not None and section_serial_id is not None:
+                computed_id = int(page_id) * 10000 + int(section_serial_id)
+        except Exception:
+            computed_id = None
+
+        yield RawSection(
+            section_id=int(computed_id) if computed_id is not None else int(page_id),
+            page_id=int(page_id) if page_id is not None else None,
+            page_title=page_title,
+            title=section_title,
+            text=text,
+            topic=section_topic or page_topic,
+            keywords=section_keywords,
+            status="pending",
+        )
+
 
 def fetch_pending_sections(limit: int = 10) -> List[RawSection]:
     """Fetch N pages and flatten their `page_content` JSON into sections.
@@ -20,59 +84,66 @@ def fetch_pending_sections(limit: int = 10) -> List[RawSection]:
     `page_content` array of sections. We parse and emit one `RawSection` per
     section item. No status filter is applied.
     """
-    settings = get_settings()
-    if not settings.database_url:
-        raise RuntimeError("DATABASE_URL not configured in environment")
+    return list(iter_pending_sections(limit))
 
-    table = settings.db_table_raw_sections
-    query = f"""
-        SELECT serial_id AS page_id,
-               page_title,
-               topic,
-               page_key_words,
-               page_content
-        FROM {table}
+
+def iter_pending_sections(limit: int = 10, itersize: int = 50) -> Iterator[RawSection]:
+    """Like `fetch_pending_sections`, but yields sections page by page.
+
+    Uses a named (server-side) cursor, so only `itersize` pages are held in
+    memory at once.
+    """
+    url = database_url()
+    query = _PAGE_COLUMNS.format(table=get_settings().db_table_raw_sections) + """
+        ORDER BY serial_id ASC
+        LIMIT %s
+    """
+    import psycopg
+
+    with psycopg.connect(url) as conn:
+        with conn.cursor(name="lesson_pages") as cur:
+            cur.itersize = itersize
+            with DB_SECONDS.time(query="pending_pages"):
+                cur.execute(query, (limit,))
+            for row in cur:
+                yield from page_sections(row)
+
+
+def fetch_sections_for_pages(conn: psycopg.Connection, page_ids: Sequence[int]) -> List[RawSection]:
+    """Sections of the given pages, in page id order."""
+    query = _PAGE_COLUMNS.format(table=get_settings().db_table_raw_sections) + """
+        WHERE serial_id = ANY(%s)
+        ORDER BY serial_id ASC
+    """
+    with conn.cursor() as cur:
+        with DB_SECONDS.time(query="pages_by_id"):
+            cur.execute(query, (list(page_ids),))
+            rows = cur.fetchall()
+        return [s for row in rows for s in page_sections(row)]
+
+
+def page_ids_after(conn: psycopg.Connection, watermark: int, limit: int = 1000) -> List[int]:
+    """Page ids above `watermark` (polling fallback for missed notifications)."""
+    table = get_settings().db_table_raw_sections
+    with conn.cursor() as cur, DB_SECONDS.time(query="page_ids_after"):
+        cur.execute(f"SELECT serial_id FROM {table} WHERE serial_id > %s ORDER BY serial_id ASC LIMIT %s", (watermark, limit))
+        return [int(r[0]) for r in cur.fetchall()]
+
+
+def page_rows_after(conn: psycopg.Connection, watermark: int, limit: int = 1000) -> List[tuple]:
+    """Raw page rows (`_PAGE_COLUMNS`) above `watermark`, in page id order."""
+    query = _PAGE_COLUMNS.format(table=get_settings().db_table_raw_sections) + """
+        WHERE serial_id > %s
         ORDER BY serial_id ASC
         LIMIT %s
     """
-    out: List[RawSection] = []
-    with psycopg.connect(settings.database_url) as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (limit,))
-            for page_id, page_title, page_topic, page_keywords, page_content in cur.fetchall():
-                import json as _json
-                try:
-                    sections = page_content if isinstance(page_content, list) else _json.loads(page_content)
-                except Exception:
-                    sections = []
-                for s in sections or []:
-                    if not isinstance(s, dict):
-                        continue
-                    section_serial_id: Optional[int] = s.get("section_serial_id")
-                    section_title: Optional[str] = s.get("section_title")
-                    text: str = (s.get("text") or "")
-                    section_topic: Optional[str] = s.get("topic")
-                    section_keywords = s.get("section_key_words") or page_keywords
-
-                    # Compute a stable synthetic section_id for convenience (internal use)
-                    computed_id: Optional[int] = None
-                    try:
-                        if page_id is not None and section_serial_id is not None:
-                            computed_id = int(page_id) * 10000 + int(section_serial_id)
-                    except Exception:
-                        computed_id = None
-
-                    out.append(
-                        RawSection(
-                            section_id=int(computed_id) if computed_id is not None else int(page_id),
-                            page_id=int(page_id) if page_id is not None else None,
-                            page_title=page_title,
-                            title=section_title,
-                            text=text,
-                            topic=section_topic or page_topic,
-                            keywords=section_keywords,
-                            status="pending",
-                        )
-                    )
-    return out
- 
+    with conn.cursor() as cur, DB_SECONDS.time(query="page_rows_after"):
+        cur.execute(query, (watermark, limit))
+        return cur.fetchall()
+
+
+def max_page_id(conn: psycopg.Connection) -> int:
+    table = get_settings().db_table_raw_sections
+    with conn.cursor() as cur, DB_SECONDS.time(query="max_page_id"):
+        cur.execute(f"SELECT COALESCE(MAX(serial_id), 0) FROM {table}")
+        return int(cur.fetchone()[0])
@@ -19,7 +19,7 @@ class LessonStep:
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class RawSection:
     section_id: int
     page_id: Optional[int]
@@ -26,3 +26,21 @@
 -- );
 
 
+-- Change notifications for the daemon (`main.py daemon`): one NOTIFY per
+-- inserted/updated page on channel `lesson_dirty`, payload = serial_id.
+-- NOTIFYs are delivered on commit and de-duplicated per transaction by
+-- Postgres. The channel name below must equal DAEMON_CHANNEL
+-- (Settings.daemon_channel, default `lesson_dirty`): when overriding the
+-- setting, change the pg_notify() call here too and re-apply this file
+-- (`daemon` prints a reminder when the two may differ).
+CREATE OR REPLACE FUNCTION notify_lesson_dirty() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('lesson_dirty', NEW.serial_id::text);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lesson_dirty_notify ON lesson_dirty;
+CREATE TRIGGER lesson_dirty_notify
+  AFTER INSERT OR UPDATE OF page_title, topic, page_key_words, page_content ON lesson_dirty
+  FOR EACH ROW EXECUTE FUNCTION notify_lesson_dirty();
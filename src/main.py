@@ -1,18 +1,27 @@
 """CLI entry and orchestrator skeleton.
 
 Implements a minimal Typer CLI for developer workflows:
+ - step1 … step11: run one step over JSON artifacts (debugging)
+ - run: execute Steps 1–11 in one process over in-memory objects
+   (optionally across processes, the DAG scheduler or the asyncio stream)
+ - dag: print the step dependency graph and critical path
+ - vocab: build or update the corpus domain-vocabulary index (Step 9)
+ - daemon: process pages as they change (Postgres LISTEN/NOTIFY)
+ - serve: warm local HTTP service, one section per request
  - info: print effective settings
  - check-templates: validate template schema presence
  - scaffold-ok: verify key directories/files exist
 
-No pipeline logic is executed here yet; steps are implemented incrementally.
+Step logic lives in `pipeline/`; this module only wires I/O.
 """
 
 from __future__ import annotations
 
 import json
 import sys
+from dataclasses import asdict
 from pathlib import Path
+from typing import Optional
 
 import typer
 
@@ -32,39 +41,86 @@ except Exception as exc:  # pragma: no cover - import aid
 
 app = typer.Typer(help="Lesson Builder CLI (architecture scaffold)")
 
+# Commands that profile per pipeline step themselves (via RunOptions.profiler)
+_ORCHESTRATED = {"run", "daemon"}
+
+
+@app.callback()
+def cli_main(ctx: typer.Context,
+             profile: bool = typer.Option(False, "--profile", help="cProfile per step and page → <output_dir>/profile/cpu.collapsed (flamegraph input) + cpu_steps.txt"),
+             trace_memory: bool = typer.Option(False, "--trace-memory", help="tracemalloc per step and page → <output_dir>/profile/memory_steps.json + memory_top.txt")) -> None:
+    """Lesson Builder CLI. Profiling options go before the command name."""
+    if not (profile or trace_memory):
+        return
+    from utils import profiling
+
+    profiler = profiling.Profiler(profile=profile, trace_memory=trace_memory)
+    profiling.ACTIVE = profiler
+    command = ctx.invoked_subcommand or "cli"
+    scope = None
+    if command not in _ORCHESTRATED:
+        # A step command is one step: profile the whole command under its name
+        scope = profiler.step(command)
+        scope.__enter__()
+
+    def finish() -> None:
+        if scope is not None:
+            scope.__exit__(None, None, None)
+        paths = profiler.write(Path(get_settings().output_dir) / "profile")
+        profiler.close()
+        profiling.ACTIVE = None
+        typer.echo("Wrote profile → " + ", ".join(str(p) for p in paths))
+
+    ctx.call_on_close(finish)
+
 
 # -----------------------------
 # Artifact-driven step commands
 # -----------------------------
 
+def _cached(step: str, version, inputs, compute):
+    """Run `compute` through the step cache (see `pipeline.cache`), keyed on the
+    step's resolved inputs; echoes when the output is reused."""
+    from pipeline.cache import StepCache
+    from pipeline.dag import STEP_SECONDS
+
+    cache = StepCache.from_settings()
+    with STEP_SECONDS.time(step=step):
+        if cache is None:
+            return compute()
+        value, hit = cache.cached_call(step, version, inputs, compute)
+    if hit:
+        typer.echo(f"{step}: inputs unchanged, reusing cached output")
+    return value
+
+
 @app.command("step1")
 def cli_step1(limit: int = typer.Option(10, min=1, help="Max number of sections to fetch from DB"),
-              out_path: Path = typer.Option(..., help="Where to write step1_sections.json")) -> None:
+              out_path: Path = typer.Option(..., help="Where to write step1_sections.json (.jsonl/.jsonl.gz: streamed + section_id index)")) -> None:
     from pipeline.step1_fetch import fetch_sections
     from cli.artifacts import write_json
 
     sections = fetch_sections(limit)
-    payload = [s.__dict__ for s in sections]
-    write_json(out_path, payload)
+    payload = [asdict(s) for s in sections]
+    write_json(out_path, payload, index_key="section_id")
     typer.echo(f"Wrote sections: {len(sections)} (limit={limit}) → {out_path}")
 
 
 @app.command("step2")
 def cli_step2(in_path: Path = typer.Option(..., exists=True, help="Path to step1_sections.json"),
               section_id: int = typer.Option(..., help="Required: section_id to process"),
-              out_path: Path = typer.Option(..., help="Where to write step2_sentences.json")) -> None:
-    from cli.artifacts import read_json, write_json
-    from pipeline.step2_normalize import normalize_and_split
+              out_path: Path = typer.Option(..., help="Where to write step2_sentences.json"),
+              near_dedupe: bool = typer.Option(False, help="Also drop near-duplicates via cached sentence embeddings")) -> None:
+    from cli.artifacts import find_record, write_json
+    from pipeline.step2_normalize import STEP_VERSION, normalize_and_split
 
-    data = read_json(in_path)
-    if not isinstance(data, list):
-        raise typer.Exit(code=1)
-    # find the requested section by id
-    match = next((s for s in data if int(s.get("section_id")) == int(section_id)), None)
+    # find the requested section by id (indexed seek for .jsonl step1 artifacts)
+    match = find_record(in_path, section_id)
     if not match:
         typer.echo(f"section_id {section_id} not found in {in_path}")
         raise typer.Exit(code=1)
-    sentences = normalize_and_split(str(match.get("text", "")))
+    text = str(match.get("text", ""))
+    sentences = _cached("step2", STEP_VERSION, [text, near_dedupe], lambda: normalize_and_split(text, near_dedupe=near_dedupe))
     write_json(out_path, {"section_id": section_id, "sentences": sentences})
     typer.echo(f"Wrote sentences: {len(sentences)} → {out_path}")
 
@@ -74,8 +130,8 @@ def cli_step3(in_path: Path = typer.Option(..., exists=True, help="Path to step2
               out_path: Path = typer.Option(..., help="Where to write step3_labeled.json"),
               context_path: Path = typer.Option(Path('.out/step1_sections.json'), exists=False, help="Optional: path to step1 sections for keywords"),
               no_llm: bool = typer.Option(False, help="Disable LLM fallback for classification")) -> None:
-    from cli.artifacts import read_json, write_json
-    from pipeline.step3_label import label_sentences
+    from cli.artifacts import find_record, read_json, write_json
+    from pipeline.step3_label import STEP_VERSION, label_sentences
     from config.settings import get_settings
 
     data = read_json(in_path)
@@ -86,11 +142,8 @@ def cli_step3(in_path: Path = typer.Option(..., exists=True, help="Path to step2
     section_keywords = None
     if section_id and context_path.exists():
         try:
-            ctx = read_json(context_path)
-            for rec in ctx:
-                if int(rec.get("section_id")) == int(section_id):
-                    section_keywords = rec.get("keywords")
-                    break
+            rec = find_record(context_path, section_id)
+            section_keywords = rec.get("keywords") if rec else None
         except Exception:
             section_keywords = None
 
@@ -99,15 +152,18 @@ def cli_step3(in_path: Path = typer.Option(..., exists=True, help="Path to step2
     if no_llm:
         object.__setattr__(settings, 'classifier_use_llm_fallback', False)  # type: ignore
 
-    labeled = label_sentences(sentences, section_keywords=section_keywords)
-    result = [{
-        "section_id": section_id,
-        "text": t,
-        "label": c.label,
-        "probability": c.probability,
-        "rule_hit": c.rule_hit,
-        "source": c.source,
-    } for t, c in labeled]
+    def compute():
+        labeled = label_sentences(sentences, section_keywords=section_keywords)
+        return [{
+            "section_id": section_id,
+            "text": t,
+            "label": c.label,
+            "probability": c.probability,
+            "rule_hit": c.rule_hit,
+            "source": c.source,
+        } for t, c in labeled]
+
+    result = _cached("step3", STEP_VERSION, [section_id, sentences, section_keywords], compute)
     write_json(out_path, result)
     typer.echo(f"Wrote labeled: {len(result)} → {out_path}")
 
@@ -117,8 +173,8 @@ def cli_step4(in_path: Path = typer.Option(..., exists=True, help="Path to step2
               out_path: Path = typer.Option(..., help="Where to write step4_scores.json"),
               context_path: Path = typer.Option(Path('.out/step1_sections.json'), exists=False, help="Optional: path to step1 sections for keywords"),
               labeled_path: Path = typer.Option(Path('.out/step3_labeled.json'), exists=False, help="Optional: path to step3 labeled for priors")) -> None:
-    from cli.artifacts import read_json, write_json
-    from pipeline.step4_score import score_sentences
+    from cli.artifacts import find_record, read_json, write_json
+    from pipeline.step4_score import STEP_VERSION, score_sentences
 
     data = read_json(in_path)
     section_id = data.get("section_id") if isinstance(data, dict) else None
@@ -128,11 +184,8 @@ def cli_step4(in_path: Path = typer.Option(..., exists=True, help="Path to step2
     section_keywords = None
     if section_id and context_path.exists():
         try:
-            ctx = read_json(context_path)
-            for rec in ctx:
-                if int(rec.get("section_id")) == int(section_id):
-                    section_keywords = rec.get("keywords")
-                    break
+            rec = find_record(context_path, section_id)
+            section_keywords = rec.get("keywords") if rec else None
         except Exception:
             section_keywords = None
 
@@ -143,26 +196,36 @@ def cli_step4(in_path: Path = typer.Option(..., exists=True, help="Path to step2
         except Exception:
             labeled = None
 
-    scores = score_sentences(
+    scores = _cached("step4", STEP_VERSION, [section_id, sentences, section_keywords, labeled], lambda: score_sentences(
         sentences,
         section_id=section_id,
         section_keywords=section_keywords,
         labeled=labeled,
-    )
+    ))
     write_json(out_path, scores)
     typer.echo(f"Wrote scores: {len(scores)} → {out_path}")
 
 
 @app.command("step5")
 def cli_step5(in_path: Path = typer.Option(..., exists=True, help="Path to step3_labeled.json"),
-              out_path: Path = typer.Option(..., help="Where to write step5_selected.json")) -> None:
+              out_path: Path = typer.Option(..., help="Where to write step5_selected.json"),
+              scores_path: Path = typer.Option(Path('.out/step4_scores.json'), exists=False, help="Optional: path to step4 scores for ranking"),
+              top_k: Optional[int] = typer.Option(None, min=0, help="Sentences to keep per info type (default: settings)")) -> None:
     from cli.artifacts import read_json, write_json
     from services.classifier import Classification
-    from pipeline.step5_select import select_minimal_set
+    from pipeline.step5_select import STEP_VERSION, select_minimal_set
 
     data = read_json(in_path)
-    labeled = [(d["text"], Classification(label=d["label"], probability=float(d.get("probability", 0)), rule_hit=d.get("rule_hit"))) for d in data]
-    selected = select_minimal_set(labeled)
+    labeled = [(d["text"], Classification(label=d["label"], probability=float(d.get("probability", 0)), rule_hit=d.get("rule_hit") or [], source=d.get("source", "rules"))) for d in data]
+
+    scored = None
+    if scores_path.exists():
+        try:
+            scored = read_json(scores_path)
+        except Exception:
+            scored = None
+
+    selected = _cached("step5", STEP_VERSION, [data, scored, top_k], lambda: select_minimal_set(labeled, scored, top_k=top_k))
     write_json(out_path, selected)
     typer.echo(f"Wrote selected → {out_path}")
 
@@ -171,10 +234,10 @@ def cli_step5(in_path: Path = typer.Option(..., exists=True, help="Path to step3
 def cli_step6(in_path: Path = typer.Option(..., exists=True, help="Path to step5_selected.json"),
               out_path: Path = typer.Option(..., help="Where to write step6_step_count.json")) -> None:
     from cli.artifacts import read_json, write_json
-    from pipeline.step6_steps import decide_step_count
+    from pipeline.step6_steps import STEP_VERSION, decide_step_count
 
     selected = read_json(in_path)
-    step_count = decide_step_count(selected)
+    step_count = _cached("step6", STEP_VERSION, [selected], lambda: decide_step_count(selected))
     write_json(out_path, {"step_count": step_count})
     typer.echo(f"Wrote step_count={step_count} → {out_path}")
 
@@ -182,13 +245,23 @@ def cli_step6(in_path: Path = typer.Option(..., exists=True, help="Path to step5
 @app.command("step7")
 def cli_step7(in_path: Path = typer.Option(..., exists=True, help="Path to step5_selected.json"),
               templates_path: Path = typer.Option(Path(__file__).parent / "config" / "templates.json", exists=True, help="Path to templates.json"),
-              out_path: Path = typer.Option(..., help="Where to write step7_mapped.json")) -> None:
-    from cli.artifacts import read_json, write_json
-    from pipeline.step7_templates import load_templates, map_to_templates
+              out_path: Path = typer.Option(..., help="Where to write step7_mapped.json"),
+              section_id: Optional[int] = typer.Option(None, help="Optional: section_id for term/title/topic slot values"),
+              context_path: Path = typer.Option(Path('.out/step1_sections.json'), exists=False, help="Optional: path to step1 sections for slot context")) -> None:
+    from cli.artifacts import find_record, read_json, write_json
+    from pipeline.cache import file_fingerprint
+    from pipeline.step7_templates import STEP_VERSION, get_engine
 
     selected = read_json(in_path)
-    templates = load_templates(templates_path)
-    mapped = map_to_templates(selected, templates)
+    context = None
+    if section_id is not None and context_path.exists():
+        try:
+            context = find_record(context_path, section_id)
+        except Exception:
+            context = None
+
+    mapped = _cached("step7", STEP_VERSION, [selected, context, file_fingerprint(templates_path)],
+                     lambda: get_engine(templates_path).render(selected, context))
     write_json(out_path, mapped)
     typer.echo(f"Wrote mapped steps: {len(mapped)} → {out_path}")
 
@@ -197,7 +270,7 @@ def cli_step7(in_path: Path = typer.Option(..., exists=True, help="Path to step5
 def cli_step8(in_path: Path = typer.Option(..., exists=True, help="Path to step7_mapped.json or a list of texts"),
               out_path: Path = typer.Option(..., help="Where to write step8_rewritten.json")) -> None:
     from cli.artifacts import read_json, write_json
-    from pipeline.step8_rewrite import micro_rewrite
+    from pipeline.step8_rewrite import STEP_VERSION, micro_rewrite
 
     data = read_json(in_path)
     # Accept either a list of strings or mapped steps with 'content'
@@ -207,35 +280,63 @@ def cli_step8(in_path: Path = typer.Option(..., exists=True, help="Path to step7
             texts.extend(step.get("content", []))
     else:
         texts = data
-    rewritten = micro_rewrite(texts)
+    rewritten = _cached("step8", STEP_VERSION, [texts], lambda: micro_rewrite(texts))
     write_json(out_path, rewritten)
     typer.echo(f"Wrote rewritten: {len(rewritten)} → {out_path}")
 
 
 @app.command("step9")
 def cli_step9(in_path: Path = typer.Option(..., exists=True, help="Path to a JSON array of texts to rate"),
-              out_path: Path = typer.Option(..., help="Where to write step9_difficulty.json")) -> None:
+              out_path: Path = typer.Option(..., help="Where to write step9_difficulty.json"),
+              vocab_path: Optional[Path] = typer.Option(None, help="Domain-vocabulary index (default: settings; build it with `vocab`)")) -> None:
     from cli.artifacts import read_json, write_json
-    from pipeline.step9_difficulty import determine_difficulty
+    from pipeline.step9_difficulty import STEP_VERSION, determine_difficulty
+    from services.domain_vocab import get_domain_vocab
 
     texts = read_json(in_path)
     text = "\n".join(texts if isinstance(texts, list) else [str(texts)])
-    difficulty = determine_difficulty(text, [])
+    vocab = get_domain_vocab(vocab_path)
+    if not len(vocab):
+        typer.echo("Domain vocabulary is empty (run `vocab` to build it); keyword density will be 0")
+    difficulty = _cached("step9", STEP_VERSION, [text, vocab], lambda: determine_difficulty(text, vocab))
     write_json(out_path, {"difficulty": difficulty})
     typer.echo(f"Wrote difficulty={difficulty} → {out_path}")
 
 
 @app.command("step10")
 def cli_step10(in_path: Path = typer.Option(..., exists=True, help="Path to a JSON array of texts or a single string"),
-               out_path: Path = typer.Option(..., help="Where to write step10_quality.json")) -> None:
+               out_path: Path = typer.Option(..., help="Where to write step10_quality.json"),
+               source_path: Optional[Path] = typer.Option(None, exists=True, help="Optional: step7_mapped.json / texts that were rewritten; enables regeneration of failing items"),
+               max_retries: Optional[int] = typer.Option(None, min=0, help="Rewrite rounds for failing items (default: settings)")) -> None:
     from cli.artifacts import read_json, write_json
-    from pipeline.step10_quality import check_quality
+    from pipeline.step10_quality import STEP_VERSION, evaluate_item, gate_and_regenerate
 
     data = read_json(in_path)
-    text = "\n".join(data if isinstance(data, list) else [str(data)])
-    ok, reason = check_quality(text)
-    write_json(out_path, {"ok": ok, "reason": reason})
-    typer.echo(f"Wrote quality ok={ok} reason={reason} → {out_path}")
+    texts = [str(t) for t in data] if isinstance(data, list) else [str(data)]
+
+    if source_path is not None:
+        source = read_json(source_path)
+        if isinstance(source, list) and source and isinstance(source[0], dict) and "content" in source[0]:
+            originals = [t for step in source for t in step.get("content", [])]
+        else:
+            originals = [str(t) for t in source] if isinstance(source, list) else [str(source)]
+        if len(originals) != len(texts):
+            typer.echo(f"source has {len(originals)} items but {in_path} has {len(texts)}")
+            raise typer.Exit(code=1)
+        outcome = _cached("step10", STEP_VERSION, [originals, texts, max_retries],
+                          lambda: gate_and_regenerate(originals, texts, max_retries=max_retries))
+        texts, results, attempts = outcome.texts, outcome.results, outcome.attempts
+    else:
+        results = [evaluate_item(t) for t in texts]
+        attempts = [0] * len(texts)
+
+    ok = all(r.ok for r in results)
+    reason = next((r.reason for r in results if not r.ok), "ok")
+    items = [{"text": t, "ok": r.ok, "reason": r.reason, "grade": r.grade, "approx_tokens": r.approx_tokens, "retries": a}
+             for t, r, a in zip(texts, results, attempts)]
+    write_json(out_path, {"ok": ok, "reason": reason, "items": items})
+    passed = sum(1 for r in results if r.ok)
+    typer.echo(f"Wrote quality ok={ok} passed={passed}/{len(results)} → {out_path}")
 
 
 @app.command("step11")
@@ -264,6 +365,298 @@ def cli_step11(in_path: Path = typer.Option(..., exists=True, help="Path to mapp
     typer.echo(f"Wrote lesson rows: {len(rows)} → {out_path}")
 
 
+@app.command("run")
+def cli_run(limit: int = typer.Option(10, min=1, help="Max number of sections to fetch from DB"),
+            in_path: Optional[Path] = typer.Option(None, exists=True, help="Optional: step1_sections.json to use instead of the DB"),
+            out_path: Path = typer.Option(Path('.out/lesson_rows.json'), help="Where to write the lesson rows for all sections"),
+            dump_dir: Optional[Path] = typer.Option(None, help="Optional: also write per-step artifacts under <dump_dir>/<section_id>/"),
+            no_llm: bool = typer.Option(False, help="Disable LLM fallback for classification"),
+            no_rewrite: bool = typer.Option(False, help="Skip Step 8 rewrites (and Step 10 regeneration)"),
+            workers: Optional[int] = typer.Option(None, min=0, help="Worker processes (0 = one per CPU; default: settings)"),
+            chunksize: Optional[int] = typer.Option(None, min=1, help="Pages per worker task (default: settings)"),
+            dag: bool = typer.Option(False, help="Use the DAG scheduler (overlap independent and LLM-bound steps) instead of processes"),
+            journal_path: Optional[Path] = typer.Option(None, help="Checkpoint journal (default: <output_dir>/run_journal.jsonl)"),
+            resume: bool = typer.Option(False, help="Skip sections already completed in the journal"),
+            stream: bool = typer.Option(False, help="Asyncio streaming runtime: fetch, generation and persistence overlap via bounded queues"),
+            schedule: bool = typer.Option(False, help="Reorder sections by priority and estimated cost (rows follow the new order; see SCHEDULE_* settings)"),
+            budget_s: Optional[float] = typer.Option(None, min=0, help="Per-section latency budget in seconds; LLM steps degrade as it runs out (0 = none; default: settings)"),
+            domain_vocab: bool = typer.Option(False, help="Rate difficulty against the corpus domain-vocabulary index instead of each section's keywords")) -> None:
+    """Run Steps 1–11 over in-memory objects, optionally across processes."""
+    from cli.artifacts import JsonlWriter, is_jsonl, iter_jsonl, read_json, write_json
+    from db.models import RawSection
+    from pipeline.journal import Journal, pending_sections
+    from pipeline.cache import StepCache
+    from pipeline.orchestrator import RunOptions, journal_section, journaled_rows, run_sections, run_sections_concurrent, sections_from_records
+    from pipeline.parallel import run_pages_parallel
+    from utils import profiling
+    from utils.metrics import export_metrics
+
+    if stream and dag:
+        typer.echo("--stream and --dag are mutually exclusive")
+        raise typer.Exit(code=1)
+
+    if stream:
+        # Lazy source: sections are pulled as the pipeline has room for them
+        if in_path is not None:
+            records = iter_jsonl(in_path) if is_jsonl(in_path) else read_json(in_path)
+            sections = (RawSection(**rec) for rec in records)
+        else:
+            from pipeline.step1_fetch import iter_sections
+
+            sections = iter_sections(limit)
+    elif in_path is not None:
+        sections = sections_from_records(read_json(in_path))
+    else:
+        from pipeline.step1_fetch import fetch_sections
+
+        sections = fetch_sections(limit)
+
+    if schedule:
+        from pipeline.scheduler import SectionScheduler
+
+        # The page pool (neither --stream nor --dag) needs each page's sections together
+        scheduler = SectionScheduler.from_settings(use_llm=False if no_llm else None, keep_pages=not (stream or dag))
+        scheduled = scheduler.schedule(sections)
+        # Lazy sources stay lazy (the scheduler only looks one window ahead)
+        sections = scheduled if stream else list(scheduled)
+
+    settings = get_settings()
+    journal = Journal(
+        journal_path or Path(settings.output_dir) / "run_journal.jsonl",
+        fsync_every=settings.journal_fsync_every,
+        compact_every=settings.journal_compact_every,
+    )
+    if not resume:
+        journal.reset()
+    done = journal.completed_sections()
+
+    options = RunOptions(
+        use_llm=False if no_llm else None,
+        rewrite=not no_rewrite,
+        dump_dir=dump_dir,
+        cache=StepCache.from_settings(),
+        profiler=profiling.ACTIVE,
+        budget_s=budget_s,
+    )
+    if domain_vocab:
+        from services.domain_vocab import get_domain_vocab
+
+        options.domain_vocab = get_domain_vocab()
+    if options.profiler is not None and (stream or dag or workers not in (None, 1)):
+        typer.echo("--profile/--trace-memory run sections in-process and in order: ignoring --stream/--dag/--workers")
+    if stream and options.profiler is None:
+        from pipeline.streaming import run_sections_streaming
+
+        n_workers = settings.workers if workers is None else workers
+        pairs = run_sections_streaming(sections, options, skip=done, processes=n_workers != 1)
+    else:
+        remaining = pending_sections(sections, journal)
+        if options.profiler is not None:
+            # Profilers only see the calling thread: run sections in-process, in order
+            results = run_sections(remaining, options)
+        elif dag:
+            results = run_sections_concurrent(remaining, options)
+        else:
+            results = run_pages_parallel(remaining, options, workers=workers, chunksize=chunksize)
+        pairs = ((s, None if s.section_id in done else next(results)) for s in sections)
+
+    # Results stream in input order, so finished and new sections interleave in place.
+    # Rows are streamed straight to disk for .jsonl outputs.
+    writer = JsonlWriter(out_path) if is_jsonl(out_path) else None
+    rows = []
+    count = 0
+    degraded = 0
+    with journal:
+        for s, result in pairs:
+            if result is None:
+                section_rows = journaled_rows(journal, s.section_id)
+            else:
+                journal_section(journal, result)
+                section_rows = result.rows
+                count += 1
+                degraded += bool(result.degradations)
+            if writer is not None:
+                writer.write_many(section_rows)
+            else:
+                rows.extend(section_rows)
+    if writer is not None:
+        writer.close()
+    else:
+        write_json(out_path, rows)
+    total = writer.count if writer is not None else len(rows)
+    typer.echo(f"Processed sections: {count} (resumed: {len(done)}) → lesson rows: {total} → {out_path}")
+    if degraded:
+        typer.echo(f"Degraded to meet the section budget: {degraded} section(s) (see deadline.degraded events)")
+    if options.cache is not None and settings.step_cache_max_mb:
+        removed, _ = options.cache.prune(settings.step_cache_max_mb << 20)
+        if removed:
+            typer.echo(f"Pruned {removed} step cache entries (STEP_CACHE_MAX_MB={settings.step_cache_max_mb})")
+    exported = export_metrics()
+    if exported:
+        typer.echo(f"Wrote metrics → {exported[0]}, {exported[1]}")
+
+
+@app.command("dag")
+def cli_dag() -> None:
+    """Print the pipeline step DAG (levels, dependencies, critical path) as JSON."""
+    from pipeline.orchestrator import LESSON_DAG
+
+    typer.echo(json.dumps(LESSON_DAG.describe(), indent=2))
+
+
+@app.command("cache-prune")
+def cli_cache_prune(max_mb: Optional[int] = typer.Option(None, min=0, help="Size to prune down to in MiB (default: STEP_CACHE_MAX_MB)")) -> None:
+    """Delete least recently used step cache entries above a size cap."""
+    from pipeline.cache import StepCache
+
+    settings = get_settings()
+    cap = settings.step_cache_max_mb if max_mb is None else max_mb
+    cache = StepCache(Path(settings.step_cache_dir or Path(settings.output_dir) / "cache"))
+    removed, kept = cache.prune(cap << 20)
+    typer.echo(f"Removed {removed} entries → {kept / (1 << 20):.1f} MiB kept in {cache.root}")
+
+
+@app.command("vocab")
+def cli_vocab(in_path: Optional[Path] = typer.Option(None, exists=True, help="Pages JSON (example.json shape) to index instead of the DB"),
+              vocab_path: Optional[Path] = typer.Option(None, help="Index file (default: settings)"),
+              rebuild: bool = typer.Option(False, help="Start from an empty index instead of updating it"),
+              batch_size: int = typer.Option(1000, min=1, help="DB pages per query")) -> None:
+    """Build or incrementally update the domain-vocabulary index used by Step 9."""
+    from services.domain_vocab import DomainVocabIndex, default_path
+
+    path = vocab_path or default_path()
+    index = DomainVocabIndex() if rebuild else DomainVocabIndex.load(path)
+    watermark = index.watermark
+    if in_path is not None:
+        from cli.artifacts import read_json
+
+        # Re-indexes every page in the file (pages already indexed are replaced)
+        rows = ((p.get("page_serial_id"), p.get("page_title"), p.get("topic"), p.get("page_key_words"), p.get("page_content")) for p in read_json(in_path))
+        changed = index.update(rows)
+    else:
+        import psycopg
+
+        from db.db_utils import database_url, page_rows_after
+
+        # Only pages above the watermark; edits to indexed pages need --rebuild
+        changed = 0
+        with psycopg.connect(database_url()) as conn:
+            while True:
+                rows = page_rows_after(conn, index.watermark, batch_size)
+                if not rows:
+                    break
+                changed += index.update(rows)
+                index.watermark = int(rows[-1][0])
+    if changed or rebuild or index.watermark != watermark:
+        index.save(path)
+    typer.echo(f"Indexed {changed} changed page(s) → {len(index.terms())} terms, revision {index.revision} → {path}")
+
+
+def _warm_up(options, llm: bool) -> None:
+    """Load once what every section needs: template engine, hyphenation
+    dictionary and (when the LLM is used) its keep-alive connection."""
+    from pipeline.step7_templates import get_engine
+    from services.llm_service import warm_up
+    from utils.readability import readability_stats
+
+    get_engine(options.templates_path)
+    readability_stats("Warm up the hyphenation dictionary.")
+    if llm:
+        warm_up()
+
+
+@app.command("daemon")
+def cli_daemon(out_path: Path = typer.Option(Path('.out/daemon_rows.jsonl'), help="JSON Lines file lesson rows are appended to"),
+               no_llm: bool = typer.Option(False, help="Disable LLM fallback for classification"),
+               no_rewrite: bool = typer.Option(False, help="Skip Step 8 rewrites (and Step 10 regeneration)"),
+               window_ms: Optional[int] = typer.Option(None, min=0, help="Coalescing window after the first notification (default: settings)"),
+               max_batch: Optional[int] = typer.Option(None, min=1, help="Max pages per batch (default: settings)"),
+               poll_interval_s: Optional[float] = typer.Option(None, min=0.1, help="Fallback poll interval (default: settings)")) -> None:
+    """Keep state warm and process pages as `lesson_dirty` rows are inserted or updated."""
+    import itertools
+
+    import psycopg
+
+    from cli.artifacts import JsonlWriter
+    from db.db_utils import database_url
+    from pipeline.cache import StepCache
+    from pipeline.daemon import LessonDaemon, PgPageSource
+    from pipeline.orchestrator import RunOptions, run_sections
+    from utils import profiling
+    from utils.metrics import export_metrics
+
+    settings = get_settings()
+    configure_json_logging()
+    options = RunOptions(
+        use_llm=False if no_llm else None,
+        rewrite=not no_rewrite,
+        cache=StepCache.from_settings(),
+        profiler=profiling.ACTIVE,
+    )
+    _warm_up(options, llm=not (no_llm and no_rewrite))
+
+    batches = itertools.count(1)
+
+    def handle(sections) -> None:
+        with JsonlWriter(out_path, append=True) as writer:
+            for result in run_sections(sections, options):
+                writer.write_many(result.rows)
+        export_metrics()  # refreshed per batch for the textfile collector
+        if options.profiler is not None:
+            # One report per batch; an unbounded profile would grow with uptime
+            options.profiler.write(Path(settings.output_dir) / "profile" / f"batch_{next(batches):06d}")
+            options.profiler.reset()
+
+    if settings.daemon_channel != "lesson_dirty":
+        typer.echo(f"Listening on '{settings.daemon_channel}': the notify_lesson_dirty() trigger in db/schema.sql must use the same channel")
+    source = PgPageSource(lambda: psycopg.connect(database_url(), autocommit=True), settings.daemon_channel)
+    try:
+        daemon = LessonDaemon(
+            source,
+            handle,
+            window_s=(settings.daemon_window_ms if window_ms is None else window_ms) / 1000.0,
+            max_batch=settings.daemon_max_batch if max_batch is None else max_batch,
+            poll_interval_s=settings.daemon_poll_interval_s if poll_interval_s is None else poll_interval_s,
+            state_path=Path(settings.output_dir) / "daemon_state.json",
+        )
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            typer.echo(f"Stopped after {daemon.stats.batches} batches ({daemon.stats.pages} pages)")
+    finally:
+        source.close()
+
+
+@app.command("serve")
+def cli_serve(host: Optional[str] = typer.Option(None, help="Bind address (default: settings)"),
+              port: Optional[int] = typer.Option(None, min=0, help="Port (default: settings)"),
+              no_llm: bool = typer.Option(False, help="Disable LLM fallback for classification"),
+              no_rewrite: bool = typer.Option(False, help="Skip Step 8 rewrites (and Step 10 regeneration)"),
+              window_ms: Optional[int] = typer.Option(None, min=0, help="Batching window after the first request of a burst (default: settings)"),
+              max_batch: Optional[int] = typer.Option(None, min=1, help="Max requests per batch (default: settings)")) -> None:
+    """Serve `POST /lesson` from a warm process (see `pipeline.service`)."""
+    from pipeline.cache import StepCache
+    from pipeline.orchestrator import RunOptions
+    from pipeline.service import make_server
+
+    configure_json_logging()
+    options = RunOptions(
+        use_llm=False if no_llm else None,
+        rewrite=not no_rewrite,
+        cache=StepCache.from_settings(),
+    )
+    _warm_up(options, llm=not (no_llm and no_rewrite))
+    server = make_server(options, host, port, window_s=None if window_ms is None else window_ms / 1000.0, max_batch=max_batch)
+    bound_host, bound_port = server.server_address[:2]
+    typer.echo(f"Serving lessons on http://{bound_host}:{bound_port}/lesson")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        typer.echo(f"Stopped after {server.batcher.requests} requests ({server.batcher.batches} batches)")
+    finally:
+        server.server_close()
+
+
 @app.command()
 def info() -> None:
     """Print effective settings as JSON."""
@@ -274,20 +667,18 @@ def info() -> None:
 
 @app.command("check-templates")
 def check_templates() -> None:
-    """Validate `templates.json` exists and is well-formed."""
+    """Validate `templates.json` exists, is well-formed and uses known slots."""
+    from pipeline.step7_templates import TemplateError, get_engine
+
     templates_path = CURRENT_DIR / "config" / "templates.json"
     if not templates_path.exists():
         raise typer.Exit(code=1)
     try:
-        data = json.loads(templates_path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError as exc:  # pragma: no cover - defensive
-        typer.echo(f"Invalid JSON: {exc}")
-        raise typer.Exit(code=1)
-
-    if not isinstance(data, list) or not data:
-        typer.echo("templates.json must be a non-empty list")
+        engine = get_engine(templates_path)
+    except TemplateError as exc:
+        typer.echo(str(exc))
         raise typer.Exit(code=1)
-    typer.echo(f"Loaded {len(data)} templates from {templates_path}")
+    typer.echo(f"Loaded {len(engine.templates)} templates from {templates_path}")
 
 
 @app.command("scaffold-ok")
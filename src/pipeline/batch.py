@@ -0,0 +1,240 @@
+"""Columnar sentence batch shared by Steps 2–5.
+
+A `PageBatch` holds the sentences of one or more sections without one Python
+object per sentence:
+ - text: one UTF-8 `buffer` plus byte `offsets` (sentence i is
+   `buffer[offsets[i]:offsets[i + 1]]`, decoded on access); a `str` buffer
+   would store every character at the width of the widest one in the page.
+   `section_offsets` gives each section's sentence range
+ - Step 3 columns: label code (index into `INFO_TYPES`), probability,
+   rule-hit bitmask and source code
+ - Step 4 columns: score (float32; scores are rounded to 3 places, so the
+   rounded value reads back exactly), keyword density, number flag, token
+   count
+Steps only add columns: `with_labels` / `with_scores` return a new batch
+that shares the existing arrays, so a batch handed to a later step (or kept
+in the step cache) is never modified.
+
+`SentenceView` is a `__slots__` record view over one row. The dict/pair
+shapes of the per-step artifacts (`labeled_records`, `scored_records`,
+`pairs`) are only built when asked for, e.g. for `--dump-dir` or the journal.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from db.models import RawSection
+from services.classifier import INFO_TYPES, Classification
+
+
+RULE_HITS: Tuple[str, ...] = ("definition", "mechanism", "procedure", "comparison", "example", "llm", "legacy")
+SOURCES: Tuple[str, ...] = ("rules", "llm_fallback")
+
+_LABEL_CODE = {label: i for i, label in enumerate(INFO_TYPES)}
+_RULE_BIT = {name: 1 << i for i, name in enumerate(RULE_HITS)}
+_SOURCE_CODE = {name: i for i, name in enumerate(SOURCES)}
+
+
+def _empty(typecode: str) -> array:
+    return array(typecode)
+
+
+def encode_classification(c: Classification) -> Tuple[int, float, int, int]:
+    """Classification → (label code, probability, rule bitmask, source code)."""
+    try:
+        mask = 0
+        for hit in c.rule_hit:
+            mask |= _RULE_BIT[hit]
+        return _LABEL_CODE[c.label], c.probability, mask, _SOURCE_CODE[c.source]
+    except KeyError as exc:
+        raise ValueError(f"cannot encode classification {c!r}: unknown {exc}") from None
+
+
+def _rule_names(mask: int) -> List[str]:
+    return [name for name, bit in _RULE_BIT.items() if mask & bit]
+
+
+@dataclass(frozen=True, slots=True)
+class PageBatch:
+    sections: Tuple[RawSection, ...]
+    buffer: bytes
+    offsets: array  # 'I', n_sentences + 1
+    section_offsets: array  # 'I', n_sections + 1
+    # Step 3
+    label: array = field(default_factory=lambda: _empty("b"))
+    probability: array = field(default_factory=lambda: _empty("d"))
+    rule_hits: array = field(default_factory=lambda: _empty("B"))
+    source: array = field(default_factory=lambda: _empty("B"))
+    # Step 4
+    score: array = field(default_factory=lambda: _empty("f"))
+    keyword_density: array = field(default_factory=lambda: _empty("d"))
+    number_presence: array = field(default_factory=lambda: _empty("B"))
+    length_tokens: array = field(default_factory=lambda: _empty("H"))
+
+    @classmethod
+    def from_sentences(cls, sections: Sequence[RawSection], sentences: Sequence[Sequence[str]]) -> "PageBatch":
+        builder = PageBatchBuilder()
+        for section, texts in zip(sections, sentences):
+            builder.add(section, texts)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def n_sections(self) -> int:
+        return len(self.sections)
+
+    @property
+    def labeled(self) -> bool:
+        return len(self.label) == len(self)
+
+    @property
+    def scored(self) -> bool:
+        return len(self.score) == len(self)
+
+    def with_labels(self, label: array, probability: array, rule_hits: array, source: array) -> "PageBatch":
+        if not (len(label) == len(probability) == len(rule_hits) == len(source) == len(self)):
+            raise ValueError("label columns must have one entry per sentence")
+        return replace(self, label=label, probability=probability, rule_hits=rule_hits, source=source)
+
+    def with_scores(self, score: array, keyword_density: array, number_presence: array, length_tokens: array) -> "PageBatch":
+        if not (len(score) == len(keyword_density) == len(number_presence) == len(length_tokens) == len(self)):
+            raise ValueError("score columns must have one entry per sentence")
+        return replace(self, score=score, keyword_density=keyword_density, number_presence=number_presence, length_tokens=length_tokens)
+
+    # -----------------------------
+    # Row access
+    # -----------------------------
+    def text(self, i: int) -> str:
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def section_range(self, j: int = 0) -> range:
+        return range(self.section_offsets[j], self.section_offsets[j + 1])
+
+    def rows(self, j: Optional[int] = None) -> Iterator["SentenceView"]:
+        """Views over section `j`'s sentences (all sentences when None)."""
+        indices = range(len(self)) if j is None else self.section_range(j)
+        for i in indices:
+            yield SentenceView(self, i)
+
+    def classification(self, i: int) -> Classification:
+        return Classification(
+            label=INFO_TYPES[self.label[i]],
+            probability=self.probability[i],
+            rule_hit=_rule_names(self.rule_hits[i]),
+            source=SOURCES[self.source[i]],
+        )
+
+    # -----------------------------
+    # Step artifact shapes (built on demand)
+    # -----------------------------
+    def sentences(self, j: int = 0) -> List[str]:
+        return [self.text(i) for i in self.section_range(j)]
+
+    def pairs(self, j: int = 0) -> List[Tuple[str, Classification]]:
+        return [(self.text(i), self.classification(i)) for i in self.section_range(j)] if self.labeled else []
+
+    def labeled_records(self, j: int = 0) -> List[Dict[str, Any]]:
+        return [v.labeled_record() for v in self.rows(j)] if self.labeled else []
+
+    def scored_records(self, j: int = 0) -> List[Dict[str, Any]]:
+        return [v.scored_record() for v in self.rows(j)] if self.scored else []
+
+    def fingerprint(self) -> str:
+        """Content hash (step cache key part)."""
+        h = hashlib.sha256()
+        h.update(repr([(s.section_id, s.keywords) for s in self.sections]).encode("utf-8"))
+        h.update(self.buffer)
+        for col in (self.offsets, self.section_offsets, self.label, self.probability, self.rule_hits,
+                    self.source, self.score, self.keyword_density, self.number_presence, self.length_tokens):
+            h.update(b"\0")
+            h.update(col.tobytes())
+        return h.hexdigest()
+
+
+class PageBatchBuilder:
+    """Append sections' sentences; `build()` joins them into one buffer."""
+
+    def __init__(self) -> None:
+        self.sections: List[RawSection] = []
+        self.chunks: List[bytes] = []
+        self.offsets = array("I", [0])
+        self.section_offsets = array("I", [0])
+
+    def add(self, section: RawSection, sentences: Sequence[str]) -> None:
+        pos = self.offsets[-1]
+        for s in sentences:
+            data = s.encode("utf-8")
+            pos += len(data)
+            self.offsets.append(pos)
+            self.chunks.append(data)
+        self.sections.append(section)
+        self.section_offsets.append(len(self.offsets) - 1)
+
+    def build(self) -> PageBatch:
+        return PageBatch(tuple(self.sections), b"".join(self.chunks), self.offsets, self.section_offsets)
+
+
+class SentenceView:
+    """Read-only view of one sentence row of a `PageBatch`."""
+
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch: PageBatch, index: int) -> None:
+        self.batch = batch
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self.batch.text(self.index)
+
+    @property
+    def section(self) -> RawSection:
+        return self.batch.sections[bisect_right(self.batch.section_offsets, self.index) - 1]
+
+    @property
+    def label(self) -> Optional[str]:
+        return INFO_TYPES[self.batch.label[self.index]] if self.batch.labeled else None
+
+    @property
+    def probability(self) -> float:
+        return self.batch.probability[self.index]
+
+    @property
+    def score(self) -> float:
+        # float32 column; scores are rounded to 3 places, so round back
+        return round(self.batch.score[self.index], 3)
+
+    def labeled_record(self) -> Dict[str, Any]:
+        b, i = self.batch, self.index
+        return {
+            "section_id": self.section.section_id,
+            "text": self.text,
+            "label": INFO_TYPES[b.label[i]],
+            "probability": b.probability[i],
+            "rule_hit": _rule_names(b.rule_hits[i]),
+            "source": SOURCES[b.source[i]],
+        }
+
+    def scored_record(self) -> Dict[str, Any]:
+        from pipeline.step4_score import _length_bonus
+
+        b, i = self.batch, self.index
+        features: Dict[str, Any] = {
+            "keyword_density": round(b.keyword_density[i], 3),
+            "number_presence": b.number_presence[i],
+            "length_tokens": b.length_tokens[i],
+            "length_bonus": _length_bonus(b.length_tokens[i]),
+        }
+        if b.labeled:
+            features.update(label=INFO_TYPES[b.label[i]], probability=b.probability[i])
+        return {"section_id": self.section.section_id, "text": self.text, "score": self.score, "features": features}
+
+    def __repr__(self) -> str:
+        return f"SentenceView({self.index}, {self.text!r})"
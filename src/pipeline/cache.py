@@ -0,0 +1,199 @@
+"""Content-addressed step output cache (make-style incremental runs).
+
+A step's output is fully determined by its inputs, its code version
+(`STEP_VERSION` in each step module) and the `Settings` fields it reads
+(`STEP_SETTINGS`). The cache key is a SHA-256 over those, and outputs are
+stored as pickles under `<output_dir>/cache/<key[:2]>/<key>.pkl` with an
+atomic rename, so concurrent workers never observe partial entries.
+
+Bump a step's `STEP_VERSION` whenever its logic changes; downstream steps
+then miss (their inputs change) while upstream steps keep hitting.
+
+An input with a `vetoes_cache(step)` method can keep a computed output out of
+the cache (a `pipeline.deadline.Deadline` does when the step degraded). Inputs
+must be JSON-able, dataclasses or expose `fingerprint()`; anything else raises
+`TypeError` rather than hashing a `repr` that may embed a memory address.
+
+The cache grows without bound unless pruned: `prune(max_bytes)` drops least
+recently used entries (hits refresh an entry's mtime). `run` prunes to
+`STEP_CACHE_MAX_MB` when set; `cache-prune` does it on demand.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from config.settings import Settings, get_settings
+from utils.metrics import counter
+
+
+# Settings each step's output depends on (beyond its inputs)
+STEP_SETTINGS: Dict[str, Tuple[str, ...]] = {
+    "step2": ("embedding_backend", "embedding_model_name", "embedding_dim", "near_duplicate_cosine"),  # near-dedupe
+    "step3": (
+        "classifier_use_llm_fallback",
+        "classifier_score_threshold",
+        "classifier_margin_threshold",
+        "local_llm_model",
+    ),
+    "step4": (),
+    "step5": ("select_top_k_per_type", "select_min_score", "select_mmr_lambda", "select_candidate_pool_factor"),
+    "step6": (),
+    "step7": (),
+    "step8": (
+        "local_llm_model",
+        "llm_temperature",
+        "token_cap_per_step",
+        "quality_max_reading_grade",
+        "rewrite_batch_enabled",
+        "rewrite_batch_token_budget",
+    ),
+    "step9": (),
+    "step10": (
+        "local_llm_model",
+        "llm_temperature",
+        "token_cap_per_step",
+        "quality_max_reading_grade",
+        "quality_max_retries",
+    ),
+    "step11": (),
+}
+
+_MISS = object()
+
+LOOKUPS = counter("step_cache_lookups_total", "Step cache lookups by step and result")
+
+
+def _encode(obj: Any) -> Any:
+    """JSON fallback for hashing inputs canonically."""
+    fingerprint = getattr(obj, "fingerprint", None)
+    if callable(fingerprint):
+        return fingerprint()
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, bytes):
+        return hashlib.sha256(obj).hexdigest()
+    raise TypeError(f"cannot key the step cache on {type(obj).__name__}; give it a fingerprint() method")
+
+
+def _vetoes(part: Any, step: str) -> bool:
+    veto = getattr(part, "vetoes_cache", None)
+    return callable(veto) and veto(step)
+
+
+def cache_key(
+    step: str,
+    version: Any,
+    inputs: Iterable[Any],
+    settings: Optional[Settings] = None,
+) -> str:
+    s = settings or get_settings()
+    h = hashlib.sha256()
+    h.update(f"{step}\0{version}\0".encode("utf-8"))
+    relevant = {name: getattr(s, name) for name in STEP_SETTINGS.get(step, ())}
+    h.update(json.dumps(relevant, sort_keys=True).encode("utf-8"))
+    for part in inputs:
+        h.update(b"\0")
+        if isinstance(part, bytes):
+            h.update(part)
+        else:
+            h.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=_encode).encode("utf-8"))
+    return h.hexdigest()
+
+
+class StepCache:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> Optional["StepCache"]:
+        settings = get_settings()
+        if not settings.step_cache_enabled:
+            return None
+        return cls(Path(settings.step_cache_dir or Path(settings.output_dir) / "cache"))
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Any:
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                value = pickle.load(f)
+            os.utime(path)  # recently used: survives `prune` longer
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _MISS
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def prune(self, max_bytes: int) -> Tuple[int, int]:
+        """Delete least recently used entries until at most `max_bytes` remain.
+
+        Returns (entries removed, bytes kept). Leftover temp files are removed too.
+        """
+        entries = []
+        removed = 0
+        for path in self.root.glob("*/*"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if path.suffix == ".tmp":
+                path.unlink(missing_ok=True)
+                removed += 1
+            elif path.suffix == ".pkl":
+                entries.append((st.st_mtime, st.st_size, path))
+        entries.sort(reverse=True)  # newest first
+        kept = 0
+        for _, size, path in entries:
+            if kept + size <= max_bytes:
+                kept += size
+            else:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed, kept
+
+    def cached_call(self, step: str, version: Any, inputs: Iterable[Any], compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (output, hit). Computes and stores on a miss."""
+        inputs = list(inputs)
+        key = cache_key(step, version, inputs)
+        value = self.get(key)
+        if value is not _MISS:
+            self.hits += 1
+            LOOKUPS.inc(step=step, result="hit")
+            return value, True
+        self.misses += 1
+        LOOKUPS.inc(step=step, result="miss")
+        value = compute()
+        if not any(_vetoes(part, step) for part in inputs):
+            self.put(key, value)
+        return value, False
+
+
+def file_fingerprint(path: Path) -> bytes:
+    """Input bytes of an artifact (CLI steps key on the file content)."""
+    return Path(path).read_bytes() if Path(path).exists() else b""
@@ -0,0 +1,318 @@
+"""Long-running worker driven by Postgres LISTEN/NOTIFY.
+
+The `lesson_dirty_notify` trigger (see `db/schema.sql`) fires
+`pg_notify('lesson_dirty', serial_id)` on every insert or update. The daemon
+keeps one autocommit connection LISTENing on that channel and warm per-process
+state (settings, compiled patterns, template engine, LLM keep-alive session):
+ - notified page ids are coalesced: a batch is released `window_s` after the
+   first id of a burst arrives, or as soon as `max_batch` ids are pending
+ - on start and every `poll_interval_s` it also polls for page ids above its
+   watermark, so inserts whose notification was missed (reconnects, daemon
+   restarts) are still picked up. Only polls move the watermark (to just
+   below the lowest polled page not yet processed); it is persisted in
+   `state_path`. Pages above the watermark already processed from a
+   notification are remembered until the watermark passes them, so a poll
+   does not run them again
+ - a failing batch is logged and its pages stay pending, retried with
+   exponential backoff (a page is dropped after `max_attempts`); a lost
+   connection is re-opened and LISTEN re-issued (`PageSource.reconnect`)
+Updates to pages below the watermark are only seen through notifications.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set
+
+from db.models import RawSection
+from utils.logging_utils import log_event
+from utils.metrics import counter, gauge
+
+
+logger = logging.getLogger(__name__)
+
+PAGES_SEEN = counter("daemon_pages_total", "Page ids queued, by how they were discovered")
+WATERMARK = gauge("daemon_watermark", "Page id up to which polling has processed every page")
+ERRORS = counter("daemon_errors_total", "Failed daemon iterations, by whether the connection was lost")
+
+
+class PageSource(Protocol):
+    def wait(self, timeout: float, max_items: int) -> List[Optional[int]]: ...
+
+    def poll(self, watermark: int) -> List[int]: ...
+
+    def sections(self, page_ids: List[int]) -> List[RawSection]: ...
+
+    def high_water(self) -> int: ...
+
+    def disconnected(self, exc: BaseException) -> bool: ...
+
+    def reconnect(self) -> None: ...
+
+
+class PgPageSource:
+    """`PageSource` over one autocommit psycopg connection from `connect()`."""
+
+    def __init__(self, connect: Callable[[], Any], channel: str) -> None:
+        self.connect = connect
+        self.channel = channel
+        self.conn = None
+        self._listen()
+
+    def _listen(self) -> None:
+        from psycopg import sql
+
+        self.conn = self.connect()
+        self.conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+
+    def disconnected(self, exc: BaseException) -> bool:
+        import psycopg
+
+        return isinstance(exc, psycopg.OperationalError) or bool(self.conn is not None and self.conn.closed)
+
+    def reconnect(self) -> None:
+        self.close()
+        self._listen()
+
+    def close(self) -> None:
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+
+    def wait(self, timeout: float, max_items: int) -> List[Optional[int]]:
+        return [_page_id(n.payload) for n in self.conn.notifies(timeout=timeout, stop_after=max_items)]
+
+    def poll(self, watermark: int) -> List[int]:
+        from db.db_utils import page_ids_after
+
+        return page_ids_after(self.conn, watermark)
+
+    def sections(self, page_ids: List[int]) -> List[RawSection]:
+        from db.db_utils import fetch_sections_for_pages
+
+        return fetch_sections_for_pages(self.conn, page_ids)
+
+    def high_water(self) -> int:
+        from db.db_utils import max_page_id
+
+        return max_page_id(self.conn)
+
+
+def _page_id(payload: str) -> Optional[int]:
+    try:
+        return int(payload)
+    except (TypeError, ValueError):
+        return None
+
+
+class PageCoalescer:
+    """Collect page ids; release them as one batch per burst."""
+
+    def __init__(self, window_s: float, max_batch: int) -> None:
+        self.window_s = max(0.0, window_s)
+        self.max_batch = max(1, max_batch)
+        self.pending: Dict[int, None] = {}  # insertion-ordered set
+        self.first_at: Optional[float] = None
+
+    def add(self, page_id: int, now: float) -> None:
+        if self.first_at is None:
+            self.first_at = now
+        self.pending[page_id] = None
+
+    def time_left(self, now: float) -> Optional[float]:
+        """Seconds until the pending batch is due (None if nothing pending)."""
+        if self.first_at is None:
+            return None
+        if len(self.pending) >= self.max_batch:
+            return 0.0
+        return max(0.0, self.first_at + self.window_s - now)
+
+    def due(self, now: float) -> bool:
+        left = self.time_left(now)
+        return left is not None and left <= 0.0
+
+    def drain(self) -> List[int]:
+        batch = list(self.pending)[: self.max_batch]
+        for pid in batch:
+            del self.pending[pid]
+        self.first_at = self.first_at if self.pending else None
+        return batch
+
+
+@dataclass
+class DaemonStats:
+    batches: int = 0
+    pages: int = 0
+    sections: int = 0
+    notified: int = 0
+    polled: int = 0
+
+
+class LessonDaemon:
+    def __init__(
+        self,
+        source: PageSource,
+        handle: Callable[[List[RawSection]], None],
+        *,
+        window_s: float = 0.5,
+        max_batch: int = 50,
+        poll_interval_s: float = 60.0,
+        state_path: Optional[Path] = None,
+        clock: Callable[[], float] = time.monotonic,
+        backoff_s: float = 1.0,
+        max_backoff_s: float = 60.0,
+        max_attempts: int = 5,
+    ) -> None:
+        self.source = source
+        self.handle = handle
+        self.coalescer = PageCoalescer(window_s, max_batch)
+        self.poll_interval_s = max(0.1, poll_interval_s)
+        self.state_path = state_path
+        self.clock = clock
+        self.stats = DaemonStats()
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.max_attempts = max(1, max_attempts)
+        self.failures = 0  # consecutive failed iterations
+        self.attempts: Dict[int, int] = {}  # failed batches per pending page
+        self.watermark = self._load_watermark()
+        # Polled pages not processed yet, and the highest page id the polls have seen
+        self.unprocessed: Dict[int, None] = {}
+        self.polled_upto = self.watermark
+        self.processed: Set[int] = set()  # processed pages above the watermark
+        self.next_poll = clock()  # poll once on start
+
+    def _load_watermark(self) -> int:
+        if self.state_path is not None and self.state_path.exists():
+            try:
+                return int(json.loads(self.state_path.read_text(encoding="utf-8"))["watermark"])
+            except (ValueError, KeyError, TypeError):
+                pass
+        # First start: only pages that arrive from now on
+        return self.source.high_water()
+
+    def _save_watermark(self) -> None:
+        if self.state_path is None:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"watermark": self.watermark}), encoding="utf-8")
+        tmp.replace(self.state_path)
+
+    def step(self, max_wait_s: float = 5.0) -> bool:
+        """One iteration: wait for notifications, poll if due, run a due batch.
+
+        Returns True if a batch was processed.
+        """
+        now = self.clock()
+        timeout = min(max_wait_s, max(0.0, self.next_poll - now))
+        left = self.coalescer.time_left(now)
+        if left is not None:
+            timeout = min(timeout, left)
+        room = self.coalescer.max_batch - len(self.coalescer.pending)
+        for pid in self.source.wait(timeout, max(1, room)):
+            if pid is None:
+                self.next_poll = self.clock()  # unparseable payload: fall back to a poll now
+                continue
+            self.stats.notified += 1
+            PAGES_SEEN.inc(via="notify")
+            self.coalescer.add(pid, self.clock())
+
+        now = self.clock()
+        if now >= self.next_poll:
+            polled = self.source.poll(self.watermark)
+            for pid in polled:
+                if pid in self.processed:
+                    continue  # already handled from its notification
+                if pid not in self.coalescer.pending:
+                    self.stats.polled += 1
+                    PAGES_SEEN.inc(via="poll")
+                self.coalescer.add(pid, now)
+                self.unprocessed[pid] = None
+            # Polls return every page above the watermark in id order: all ids up to
+            # the last one are now either processed or pending
+            self.polled_upto = max([self.polled_upto, *polled])
+            self.next_poll = now + self.poll_interval_s
+            self._advance_watermark()
+
+        if not self.coalescer.due(self.clock()):
+            return False
+        batch = self.coalescer.drain()
+        try:
+            sections = self.source.sections(batch)
+            self.handle(sections)
+        except Exception:
+            self._requeue(batch)
+            raise
+        self._done(batch)
+        self.stats.batches += 1
+        self.stats.pages += len(batch)
+        self.stats.sections += len(sections)
+        log_event(logger, "daemon.batch", pages=len(batch), sections=len(sections), watermark=self.watermark)
+        return True
+
+    def _requeue(self, batch: List[int]) -> None:
+        """Keep a failed batch pending; pages failing `max_attempts` times are dropped."""
+        now = self.clock()
+        dropped = []
+        for pid in batch:
+            self.attempts[pid] = self.attempts.get(pid, 0) + 1
+            if self.attempts[pid] >= self.max_attempts:
+                dropped.append(pid)
+            else:
+                self.coalescer.add(pid, now)
+        if dropped:
+            log_event(logger, "daemon.pages_dropped", level=logging.ERROR, pages=dropped, attempts=self.max_attempts)
+            self._done(dropped)
+
+    def _done(self, batch: List[int]) -> None:
+        for pid in batch:
+            self.attempts.pop(pid, None)
+            self.unprocessed.pop(pid, None)
+            if pid > self.watermark:
+                self.processed.add(pid)
+        self._advance_watermark()
+
+    def _advance_watermark(self) -> None:
+        upto = min(self.unprocessed) - 1 if self.unprocessed else self.polled_upto
+        if upto <= self.watermark:
+            return
+        self.watermark = upto
+        self.processed = {pid for pid in self.processed if pid > upto}
+        WATERMARK.set(self.watermark)
+        self._save_watermark()
+
+    def backoff(self) -> float:
+        """Seconds to wait after the current run of consecutive failures."""
+        return min(self.max_backoff_s, self.backoff_s * 2 ** max(0, self.failures - 1))
+
+    def recover(self, exc: BaseException) -> float:
+        """Handle a failed iteration: log it, reconnect a lost connection and
+        return how long to back off."""
+        self.failures += 1
+        lost = self.source.disconnected(exc)
+        ERRORS.inc(disconnected=lost)
+        delay = self.backoff()
+        log_event(logger, "daemon.error", level=logging.ERROR, error=repr(exc), disconnected=lost, retry_in_s=delay)
+        if lost:
+            try:
+                self.source.reconnect()
+                self.next_poll = self.clock()  # notifications sent while disconnected are lost
+            except Exception as reconnect_exc:
+                log_event(logger, "daemon.reconnect_failed", level=logging.ERROR, error=repr(reconnect_exc))
+        return delay
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        stop = stop or threading.Event()
+        log_event(logger, "daemon.start", watermark=self.watermark, poll_interval_s=self.poll_interval_s)
+        while not stop.is_set():
+            try:
+                self.step()
+            except Exception as exc:
+                stop.wait(self.recover(exc))
+                continue
+            self.failures = 0
@@ -0,0 +1,277 @@
+"""Dependency-aware scheduler for pipeline steps.
+
+Each `StepSpec` declares the named values it consumes and produces. `Dag`
+validates the graph (unique producers, no cycles, all inputs seeded or
+produced) and can:
+ - `run_inline(seed)`: execute in topological order on the calling thread
+ - `DagRunner.run_many(seeds)`: run many independent seeds (pages/sections)
+   at once; a step is submitted as soon as its inputs exist, to the executor
+   for its `kind` ("cpu" or "llm"), so CPU work of one item overlaps with LLM
+   waits of another
+ - `describe()` / `critical_path()`: inspect the schedule
+
+Both execution paths accept an optional `pipeline.cache.StepCache`; a step
+whose (name, version, inputs, settings) key is cached is not re-run.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from utils.metrics import histogram
+
+
+STEP_KINDS = ("cpu", "llm")
+
+STEP_SECONDS = histogram("pipeline_step_seconds", "Wall time per pipeline step (cache hits included)")
+
+
+@dataclass(frozen=True)
+class StepSpec:
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    kind: str = "cpu"
+    version: Any = 1  # part of the step cache key (see pipeline.cache)
+
+    def call(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        result = self.fn(*(values[k] for k in self.inputs))
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        return dict(zip(self.outputs, result))
+
+    def execute(self, values: Mapping[str, Any], cache: Optional[Any] = None) -> Dict[str, Any]:
+        """`call`, short-circuited through a `StepCache` when one is given."""
+        with STEP_SECONDS.time(step=self.name):
+            if cache is None:
+                return self.call(values)
+            inputs = [values[k] for k in self.inputs]
+            out, _ = cache.cached_call(self.name, self.version, inputs, lambda: self.call(values))
+            return out
+
+
+class Dag:
+    def __init__(self, steps: Sequence[StepSpec], seeds: Iterable[str] = ()) -> None:
+        self.steps: Dict[str, StepSpec] = {}
+        self.producer: Dict[str, str] = {}
+        self.seeds = frozenset(seeds)
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"duplicate step {step.name}")
+            if step.kind not in STEP_KINDS:
+                raise ValueError(f"{step.name}: unknown kind {step.kind}")
+            self.steps[step.name] = step
+            for out in step.outputs:
+                if out in self.producer or out in self.seeds:
+                    raise ValueError(f"{out} produced by both {self.producer.get(out, 'seed')} and {step.name}")
+                self.producer[out] = step.name
+        for step in steps:
+            missing = [k for k in step.inputs if k not in self.producer and k not in self.seeds]
+            if missing:
+                raise ValueError(f"{step.name}: inputs {missing} are neither seeded nor produced")
+        self.order = self._toposort()
+
+    def deps(self, name: str) -> Set[str]:
+        return {self.producer[k] for k in self.steps[name].inputs if k in self.producer}
+
+    def _toposort(self) -> List[str]:
+        indeg = {n: len(self.deps(n)) for n in self.steps}
+        dependents: Dict[str, List[str]] = {n: [] for n in self.steps}
+        for n in self.steps:
+            for d in self.deps(n):
+                dependents[d].append(n)
+        ready = deque(n for n in self.steps if indeg[n] == 0)
+        order: List[str] = []
+        while ready:
+            n = ready.popleft()
+            order.append(n)
+            for m in dependents[n]:
+                indeg[m] -= 1
+                if indeg[m] == 0:
+                    ready.append(m)
+        if len(order) != len(self.steps):
+            raise ValueError("pipeline DAG has a cycle")
+        return order
+
+    def levels(self) -> List[List[str]]:
+        """Steps grouped by depth; steps in one level can run concurrently."""
+        depth: Dict[str, int] = {}
+        for n in self.order:
+            depth[n] = 1 + max((depth[d] for d in self.deps(n)), default=-1)
+        out: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for n in self.order:
+            out[depth[n]].append(n)
+        return out
+
+    def critical_path(self, durations: Optional[Mapping[str, float]] = None) -> Tuple[List[str], float]:
+        """Longest path by step duration (unit cost when no timings are given)."""
+        cost = {n: float((durations or {}).get(n, 1.0)) for n in self.steps}
+        best: Dict[str, Tuple[float, Optional[str]]] = {}
+        for n in self.order:
+            prev = max(((best[d][0], d) for d in self.deps(n)), default=(0.0, None))
+            best[n] = (prev[0] + cost[n], prev[1])
+        if not best:
+            return [], 0.0
+        end = max(best, key=lambda n: best[n][0])
+        total = best[end][0]
+        path: List[str] = []
+        node: Optional[str] = end
+        while node is not None:
+            path.append(node)
+            node = best[node][1]
+        return path[::-1], total
+
+    def describe(self, durations: Optional[Mapping[str, float]] = None) -> Dict[str, Any]:
+        path, total = self.critical_path(durations)
+        return {
+            "steps": [
+                {
+                    "name": n,
+                    "kind": self.steps[n].kind,
+                    "inputs": list(self.steps[n].inputs),
+                    "outputs": list(self.steps[n].outputs),
+                    "after": sorted(self.deps(n)),
+                }
+                for n in self.order
+            ],
+            "levels": self.levels(),
+            "critical_path": path,
+            "critical_path_cost": round(total, 6),
+        }
+
+    def run_inline(
+        self,
+        seed: Mapping[str, Any],
+        timings: Optional[Dict[str, float]] = None,
+        cache: Optional[Any] = None,
+        scope: Optional[Callable[[str], Any]] = None,
+    ) -> Dict[str, Any]:
+        """`scope(step_name)`, if given, is a context manager entered around
+        each step (profiling hooks)."""
+        values = dict(seed)
+        for n in self.order:
+            t0 = time.perf_counter()
+            with scope(n) if scope is not None else nullcontext():
+                values.update(self.steps[n].execute(values, cache))
+            if timings is not None:
+                timings[n] = timings.get(n, 0.0) + time.perf_counter() - t0
+        return values
+
+
+@dataclass
+class _Item:
+    values: Dict[str, Any]
+    done: Set[str] = field(default_factory=set)
+    running: Set[str] = field(default_factory=set)
+    error: Optional[BaseException] = None
+
+    def finished(self, n_steps: int) -> bool:
+        return len(self.done) == n_steps or (self.error is not None and not self.running)
+
+
+class DagRunner:
+    """Run many seeds through a `Dag` with per-kind thread pools."""
+
+    def __init__(
+        self,
+        dag: Dag,
+        *,
+        cpu_workers: int = 2,
+        llm_workers: int = 4,
+        max_in_flight: int = 8,
+        cache: Optional[Any] = None,
+        persistent: bool = False,
+    ) -> None:
+        self.dag = dag
+        self.cache = cache
+        self.pool_sizes = {"cpu": max(1, cpu_workers), "llm": max(1, llm_workers)}
+        self.max_in_flight = max(1, max_in_flight)
+        # Persistent runners keep their pools (and per-thread LLM sessions) across
+        # `run_many` calls until `close()`
+        self.persistent = persistent
+        self._pools: Optional[Dict[str, Executor]] = None
+        self.timings: Dict[str, float] = {}
+
+    def _open_pools(self) -> Dict[str, Executor]:
+        if self._pools is not None:
+            return self._pools
+        pools: Dict[str, Executor] = {k: ThreadPoolExecutor(max_workers=v, thread_name_prefix=f"dag-{k}") for k, v in self.pool_sizes.items()}
+        if self.persistent:
+            self._pools = pools
+        return pools
+
+    def close(self) -> None:
+        pools, self._pools = self._pools, None
+        for pool in (pools or {}).values():
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _submit_ready(self, pools: Dict[str, Executor], idx: int, item: _Item, futures: Dict[Future, Tuple[int, str, float]]) -> None:
+        for n in self.dag.order:
+            if n in item.done or n in item.running:
+                continue
+            if self.dag.deps(n) <= item.done:
+                step = self.dag.steps[n]
+                snapshot = {k: item.values[k] for k in step.inputs}
+                fut = pools[step.kind].submit(step.execute, snapshot, self.cache)
+                futures[fut] = (idx, n, time.perf_counter())
+                item.running.add(n)
+
+    def run_many(self, seeds: Iterable[Mapping[str, Any]], *, return_exceptions: bool = False) -> Iterator[Any]:
+        """Yield final value dicts in seed order.
+
+        With `return_exceptions`, a failing step ends only its own seed, which
+        yields the exception in place of its values; otherwise it propagates.
+        """
+        pools = self._open_pools()
+        items: Dict[int, _Item] = {}
+        futures: Dict[Future, Tuple[int, str, float]] = {}
+        seed_iter = iter(enumerate(seeds))
+        next_out = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(items) < self.max_in_flight:
+                    nxt = next(seed_iter, None)
+                    if nxt is None:
+                        exhausted = True
+                        break
+                    idx, seed = nxt
+                    items[idx] = _Item(values=dict(seed))
+                    self._submit_ready(pools, idx, items[idx], futures)
+                # Emit finished items in order
+                while next_out in items and items[next_out].finished(len(self.dag.steps)):
+                    item = items.pop(next_out)
+                    yield item.error if item.error is not None else item.values
+                    next_out += 1
+                if not futures:
+                    if exhausted and not items:
+                        return
+                    continue
+                finished, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    idx, name, t0 = futures.pop(fut)
+                    self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - t0
+                    item = items[idx]
+                    item.running.discard(name)
+                    exc = fut.exception()
+                    if exc is not None and not return_exceptions:
+                        raise exc
+                    if exc is not None or item.error is not None:
+                        item.error = item.error or exc  # no further steps for this seed
+                        continue
+                    item.values.update(fut.result())
+                    item.done.add(name)
+                    self._submit_ready(pools, idx, item, futures)
+        finally:
+            if self.persistent:
+                for fut in futures:
+                    fut.cancel()
+            else:
+                for pool in pools.values():
+                    pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,87 @@
+"""Per-section latency budgets with graceful degradation.
+
+A `Deadline` is seeded into the lesson DAG for each section when a budget is
+set (`RunOptions.budget_s` / `SECTION_BUDGET_S`). LLM-bound steps consult it
+before every request: a step only starts an LLM call while more than its
+reserve (`DEADLINE_STEP*_RESERVE_S`) is left, and each call's HTTP timeout is
+capped at the time remaining. When a step gives up on the LLM it degrades
+instead of failing:
+ - step3 `rules_only`: remaining low-confidence sentences keep the rules label
+ - step8 `skipped` / `partial`: no (or only the first) rewrites; the rest
+   keep their original text
+ - step10 `retries_cut`: no further regeneration rounds
+Applied degradations are recorded on the deadline (`applied`), counted in
+`deadline_degradations_total` and reported on the `SectionResult`.
+
+Cache keys ignore the deadline, so a budgeted run still reuses full-quality
+step outputs from the step cache; a step that degraded does not store its
+output (`vetoes_cache`).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from config.settings import get_settings
+from utils.logging_utils import log_event
+from utils.metrics import counter
+
+
+logger = logging.getLogger(__name__)
+
+DEGRADATIONS = counter("deadline_degradations_total", "Degradations applied to meet section deadlines")
+
+
+class Deadline:
+    def __init__(
+        self,
+        budget_s: float,
+        reserves: Optional[Mapping[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.budget_s = budget_s
+        self.reserves = dict(reserves or {})
+        self.clock = clock
+        self.expires_at = clock() + budget_s
+        # (step, mode) in the order applied; dict keeps this safe across DAG threads
+        self._applied: Dict[Tuple[str, str], None] = {}
+
+    @classmethod
+    def from_settings(cls, budget_s: float) -> "Deadline":
+        settings = get_settings()
+        return cls(budget_s, {
+            "step3": settings.deadline_step3_reserve_s,
+            "step8": settings.deadline_step8_reserve_s,
+            "step10": settings.deadline_step10_reserve_s,
+        })
+
+    def remaining(self) -> float:
+        return self.expires_at - self.clock()
+
+    def allows(self, step: str) -> bool:
+        """Whether `step` may still start an LLM call."""
+        return self.remaining() > self.reserves.get(step, 0.0)
+
+    def timeout(self) -> float:
+        """HTTP timeout for a call started now."""
+        return max(0.1, self.remaining())
+
+    def degrade(self, step: str, mode: str) -> None:
+        if (step, mode) in self._applied:
+            return
+        self._applied[(step, mode)] = None
+        DEGRADATIONS.inc(step=step, mode=mode)
+        log_event(logger, "deadline.degraded", step=step, mode=mode, remaining_s=round(self.remaining(), 3))
+
+    @property
+    def applied(self) -> List[str]:
+        return [f"{step}:{mode}" for step, mode in self._applied]
+
+    def vetoes_cache(self, step: str) -> bool:
+        return any(s == step for s, _ in self._applied)
+
+    def fingerprint(self) -> None:
+        """Cache key part: none (see module docstring)."""
+        return None
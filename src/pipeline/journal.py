@@ -0,0 +1,128 @@
+"""Crash-safe checkpoint journal for long runs.
+
+Append-only JSON Lines file of completed `(section_id, step, hash)` records.
+A record may carry its output `payload` (e.g. the Step 11 lesson rows) so a
+resumed run can re-emit finished sections without recomputing them.
+
+Durability: lines are flushed on every append and `fsync`ed every
+`fsync_every` records (and on close), so a crash loses at most one batch of
+acknowledgements — never a half-written record, since torn trailing lines are
+ignored on load. The file is compacted (latest record per key, atomic
+replace) on open and every `compact_every` appends.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+
+Key = Tuple[int, str]
+
+# Step recorded last for a section; its presence marks the section complete
+FINAL_STEP = "step11"
+
+
+def output_hash(output: Any) -> str:
+    blob = json.dumps(output, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+class Journal:
+    def __init__(self, path: Path, *, fsync_every: int = 32, compact_every: int = 10000) -> None:
+        self.path = Path(path)
+        self.fsync_every = max(1, fsync_every)
+        self.compact_every = max(1, compact_every)
+        self.records: Dict[Key, Dict[str, Any]] = {}
+        self._unsynced = 0
+        self._since_compact = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self.compact()
+        self._fh = self.path.open("a", encoding="utf-8")
+
+    # -----------------------------
+    # Load / compact
+    # -----------------------------
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    key = (int(rec["section_id"]), str(rec["step"]))
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn write from a crash
+                self.records[key] = rec
+
+    def compact(self) -> None:
+        """Rewrite the file with the latest record per key (atomic replace)."""
+        fh = getattr(self, "_fh", None)
+        if fh is not None:
+            fh.close()
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for rec in self.records.values():
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._since_compact = 0
+        self._unsynced = 0
+        if fh is not None:
+            self._fh = self.path.open("a", encoding="utf-8")
+
+    # -----------------------------
+    # API
+    # -----------------------------
+    def append(self, section_id: int, step: str, output: Any, *, keep_payload: bool = False) -> None:
+        rec: Dict[str, Any] = {"section_id": int(section_id), "step": step, "hash": output_hash(output)}
+        if keep_payload:
+            rec["payload"] = output
+        self.records[(int(section_id), step)] = rec
+        self._fh.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+        self._fh.flush()
+        self._unsynced += 1
+        self._since_compact += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+        if self._since_compact >= self.compact_every:
+            self.compact()
+
+    def sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+
+    def completed_sections(self) -> Set[int]:
+        return {sid for sid, step in self.records if step == FINAL_STEP}
+
+    def payload(self, section_id: int, step: str = FINAL_STEP) -> Optional[Any]:
+        rec = self.records.get((int(section_id), step))
+        return rec.get("payload") if rec else None
+
+    def reset(self) -> None:
+        """Start a fresh run: drop all records."""
+        self.records.clear()
+        self.compact()
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self.sync()
+            self._fh.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def pending_sections(sections: Iterable[Any], journal: Journal) -> Iterable[Any]:
+    """Skip sections the journal already marks complete."""
+    done = journal.completed_sections()
+    return (s for s in sections if s.section_id not in done)
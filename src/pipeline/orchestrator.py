@@ -0,0 +1,334 @@
+"""In-process orchestrator: Steps 2–11 over in-memory objects.
+
+The per-step CLI commands exchange pretty-printed JSON files, which is handy
+for debugging one step but dominates the cost of a full lesson. Here the same
+step functions are declared as nodes of `LESSON_DAG` (see `pipeline.dag`) and
+exchange Python objects:
+ - `run_section` / `run_sections`: topological order on the calling thread
+ - `run_sections_concurrent`: DAG scheduler; Steps 6/7 and 9/10 run side by
+   side and CPU steps of one section overlap LLM steps of another
+Artifacts are only written when a `dump_dir` is given, using the same file
+names and shapes as the CLI steps. With `RunOptions.cache` set, each step is
+looked up in the content-addressed step cache (`pipeline.cache`) first.
+
+With `RunOptions.budget_s` each section gets a `Deadline` (`pipeline.deadline`):
+Steps 3, 8 and 10 degrade instead of waiting on the LLM past it, and
+`SectionResult.degradations` lists what was applied.
+
+Steps 2–5 pass one columnar `PageBatch` (`pipeline.batch`) along, each step
+adding its columns; `SectionResult.sentences` / `labeled` / `scored` build
+the per-step record shapes from it on access.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import get_settings
+from db.models import RawSection
+from pipeline import (
+    step2_normalize,
+    step3_label,
+    step4_score,
+    step5_select,
+    step6_steps,
+    step7_templates,
+    step8_rewrite,
+    step9_difficulty,
+    step10_quality,
+    step11_persist,
+)
+from pipeline.batch import PageBatch
+from pipeline.cache import StepCache
+from pipeline.dag import Dag, DagRunner, StepSpec
+from pipeline.deadline import Deadline
+from pipeline.journal import FINAL_STEP, Journal
+from pipeline.step2_normalize import split_batch
+from pipeline.step3_label import label_batch
+from pipeline.step4_score import score_batch
+from pipeline.step5_select import select_from_batch
+from pipeline.step6_steps import decide_step_count
+from pipeline.step7_templates import get_engine
+from pipeline.step9_difficulty import determine_difficulty
+from pipeline.step10_quality import evaluate_item, gate_and_regenerate
+from pipeline.step11_persist import LessonRow
+from services.domain_vocab import DomainVocab
+from utils.logging_utils import log_event
+from utils.profiling import Profiler
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATES_PATH = Path(__file__).resolve().parents[1] / "config" / "templates.json"
+
+
+@dataclass
+class RunOptions:
+    use_llm: Optional[bool] = None  # Step 3 fallback; None = settings
+    rewrite: bool = True  # Step 8 (+ Step 10 regeneration)
+    templates_path: Path = DEFAULT_TEMPLATES_PATH
+    dump_dir: Optional[Path] = None  # write per-step artifacts for debugging
+    cache: Optional[StepCache] = None  # reuse step outputs across runs
+    profiler: Optional[Profiler] = None  # per-step/page cProfile + tracemalloc (inline runs only)
+    budget_s: Optional[float] = None  # per-section latency budget; None = settings, 0 = none
+    domain_vocab: Optional[DomainVocab] = None  # Step 9 density vocabulary; None = section keywords
+
+    def deadline(self) -> Optional[Deadline]:
+        """A fresh per-section deadline (None without a budget)."""
+        budget = get_settings().section_budget_s if self.budget_s is None else self.budget_s
+        return Deadline.from_settings(budget) if budget > 0 else None
+
+    def fingerprint(self) -> Dict[str, Any]:
+        """Fields that change step outputs (cache key part); `dump_dir`,
+        `cache`, `profiler` and `budget_s` don't (degraded outputs are not
+        cached). `domain_vocab` is a separate seed read by Step 9 only."""
+        try:
+            st = Path(self.templates_path).stat()
+            templates = [str(self.templates_path), st.st_mtime_ns, st.st_size]
+        except OSError:
+            templates = [str(self.templates_path), None, None]
+        return {"use_llm": self.use_llm, "rewrite": self.rewrite, "templates": templates}
+
+    def seed(self, section: RawSection) -> Dict[str, Any]:
+        """`LESSON_DAG` seed values for one section."""
+        return {"section": section, "options": self, "deadline": self.deadline(), "domain_vocab": self.domain_vocab}
+
+
+@dataclass
+class SectionResult:
+    section_id: int
+    page_id: Optional[int]
+    batch: Optional[PageBatch] = None  # Steps 2–4 columns
+    selected: Dict[str, List[str]] = field(default_factory=dict)
+    step_count: int = 0
+    mapped: List[Dict[str, Any]] = field(default_factory=list)
+    rewritten: List[str] = field(default_factory=list)
+    difficulty: Optional[str] = None
+    quality: List[Dict[str, Any]] = field(default_factory=list)
+    rows: List[LessonRow] = field(default_factory=list)
+    degradations: List[str] = field(default_factory=list)  # "<step>:<mode>", see pipeline.deadline
+
+    @property
+    def sentences(self) -> List[str]:
+        return self.batch.sentences() if self.batch is not None else []
+
+    @property
+    def labeled(self) -> List[Dict[str, Any]]:
+        return self.batch.labeled_records() if self.batch is not None else []
+
+    @property
+    def scored(self) -> List[Dict[str, Any]]:
+        return self.batch.scored_records() if self.batch is not None else []
+
+
+def labeled_records(section_id: Optional[int], labeled) -> List[Dict[str, Any]]:
+    """Step 3 pairs → the JSON record shape written by `step3`."""
+    return [{
+        "section_id": section_id,
+        "text": t,
+        "label": c.label,
+        "probability": c.probability,
+        "rule_hit": c.rule_hit,
+        "source": c.source,
+    } for t, c in labeled]
+
+
+def _dump(result: SectionResult, dump_dir: Path) -> None:
+    from cli.artifacts import write_json
+
+    base = dump_dir / str(result.section_id)
+    write_json(base / "step2_sentences.json", {"section_id": result.section_id, "sentences": result.sentences})
+    write_json(base / "step3_labeled.json", result.labeled)
+    write_json(base / "step4_scores.json", result.scored)
+    write_json(base / "step5_selected.json", result.selected)
+    write_json(base / "step6_step_count.json", {"step_count": result.step_count})
+    write_json(base / "step7_mapped.json", result.mapped)
+    write_json(base / "step8_rewritten.json", result.rewritten)
+    write_json(base / "step9_difficulty.json", {"difficulty": result.difficulty})
+    write_json(base / "step10_quality.json", result.quality)
+    write_json(base / "step11_lesson_rows.json", result.rows)
+    if result.degradations:
+        write_json(base / "degradations.json", result.degradations)
+
+
+# -----------------------------
+# Step nodes (named inputs → named outputs, see `pipeline.dag`)
+# -----------------------------
+
+def _step2(section: RawSection) -> PageBatch:
+    return split_batch([section])
+
+
+def _step3(split: PageBatch, options: RunOptions, deadline: Optional[Deadline]) -> PageBatch:
+    return label_batch(split, use_llm=options.use_llm, deadline=deadline)
+
+
+def _step5(scored: PageBatch) -> Dict[str, List[str]]:
+    return select_from_batch(scored)
+
+
+def _step7(section: RawSection, selected: Dict[str, List[str]], options: RunOptions):
+    context = {"title": section.title or section.page_title, "topic": section.topic, "keywords": section.keywords or []}
+    mapped = get_engine(options.templates_path).render(selected, context)
+    items = [(step["info_type"], text) for step in mapped for text in step.get("content", [])]
+    return mapped, items
+
+
+def _step8(items: List[Tuple[str, str]], options: RunOptions, deadline: Optional[Deadline]) -> List[str]:
+    originals = [text for _, text in items]
+    if not (options.rewrite and originals):
+        return originals
+    if deadline is not None and not deadline.allows("step8"):
+        deadline.degrade("step8", "skipped")
+        return originals
+    return step8_rewrite.micro_rewrite(originals, deadline=deadline)
+
+
+def _step9(section: RawSection, rewritten: List[str], domain_vocab: Optional[DomainVocab]) -> str:
+    vocab = domain_vocab if domain_vocab is not None else section.keywords or []
+    return determine_difficulty("\n".join(rewritten), vocab)
+
+
+def _step10(items: List[Tuple[str, str]], rewritten: List[str], options: RunOptions, deadline: Optional[Deadline]):
+    if options.rewrite:
+        outcome = gate_and_regenerate([text for _, text in items], rewritten, deadline=deadline)
+        return outcome.texts, outcome.results
+    return list(rewritten), [evaluate_item(t) for t in rewritten]
+
+
+def _step11(section: RawSection, items: List[Tuple[str, str]], final: List[str], checks) -> List[LessonRow]:
+    # Failing steps are dropped
+    kept = [(style, text) for (style, _), text, r in zip(items, final, checks) if r.ok]
+    return [
+        LessonRow(
+            lesson_id=section.section_id,
+            lesson_title=section.title or section.page_title or "Untitled",
+            section_id=i + 1,
+            section_style=style,
+            content=text,
+        )
+        for i, (style, text) in enumerate(kept)
+    ]
+
+
+LESSON_DAG = Dag(
+    [
+        StepSpec("step2", _step2, ("section",), ("split",), version=step2_normalize.STEP_VERSION),
+        StepSpec("step3", _step3, ("split", "options", "deadline"), ("labeled",), kind="llm", version=step3_label.STEP_VERSION),
+        StepSpec("step4", score_batch, ("labeled",), ("scored",), version=step4_score.STEP_VERSION),
+        StepSpec("step5", _step5, ("scored",), ("selected",), version=step5_select.STEP_VERSION),
+        StepSpec("step6", decide_step_count, ("selected",), ("step_count",), version=step6_steps.STEP_VERSION),
+        StepSpec("step7", _step7, ("section", "selected", "options"), ("mapped", "items"), version=step7_templates.STEP_VERSION),
+        StepSpec("step8", _step8, ("items", "options", "deadline"), ("rewritten",), kind="llm", version=step8_rewrite.STEP_VERSION),
+        StepSpec("step9", _step9, ("section", "rewritten", "domain_vocab"), ("difficulty",), version=step9_difficulty.STEP_VERSION),
+        StepSpec("step10", _step10, ("items", "rewritten", "options", "deadline"), ("final", "checks"), kind="llm", version=step10_quality.STEP_VERSION),
+        StepSpec("step11", _step11, ("section", "items", "final", "checks"), ("rows",), version=step11_persist.STEP_VERSION),
+    ],
+    seeds=("section", "options", "deadline", "domain_vocab"),
+)
+
+
+def section_result(values: Dict[str, Any]) -> SectionResult:
+    """Final `LESSON_DAG` values of one section → `SectionResult` (dumped when configured)."""
+    section: RawSection = values["section"]
+    options: RunOptions = values["options"]
+    result = SectionResult(
+        section_id=section.section_id,
+        page_id=section.page_id,
+        batch=values["scored"],
+        selected=values["selected"],
+        step_count=values["step_count"],
+        mapped=values["mapped"],
+        rewritten=values["rewritten"],
+        difficulty=values["difficulty"],
+        quality=[{"text": t, "ok": r.ok, "reason": r.reason} for t, r in zip(values["final"], values["checks"])],
+        rows=values["rows"],
+        degradations=values["deadline"].applied if values.get("deadline") is not None else [],
+    )
+    if options.dump_dir is not None:
+        _dump(result, options.dump_dir)
+    log_event(
+        logger,
+        "orchestrator.section_done",
+        section_id=section.section_id,
+        sentences=len(result.sentences),
+        steps=len(result.mapped),
+        rows=len(result.rows),
+        dropped=len(values["items"]) - len(result.rows),
+        **({"degradations": result.degradations} if result.degradations else {}),
+    )
+    return result
+
+
+def run_section(section: RawSection, options: Optional[RunOptions] = None) -> SectionResult:
+    """Run Steps 2–11 for one section on the calling thread."""
+    opts = options or RunOptions()
+    scope = None
+    if opts.profiler is not None and opts.profiler.enabled:
+        scope = partial(opts.profiler.step, page=section.page_id)
+    seed = opts.seed(section)
+    return section_result(LESSON_DAG.run_inline(seed, cache=opts.cache, scope=scope))
+
+
+def run_sections(sections: Iterable[RawSection], options: Optional[RunOptions] = None) -> Iterator[SectionResult]:
+    """Lazily run `run_section` over sections in order."""
+    opts = options or RunOptions()
+    for section in sections:
+        yield run_section(section, opts)
+
+
+def run_sections_concurrent(
+    sections: Iterable[RawSection],
+    options: Optional[RunOptions] = None,
+    runner: Optional[DagRunner] = None,
+    *,
+    return_exceptions: bool = False,
+) -> Iterator[SectionResult]:
+    """Run sections through the DAG scheduler; independent steps of the same
+    section and LLM/CPU steps of different sections overlap. Yields in order;
+    with `return_exceptions`, a failed section yields its exception instead."""
+    opts = options or RunOptions()
+    settings = get_settings()
+    dag_runner = runner or DagRunner(
+        LESSON_DAG,
+        cpu_workers=settings.dag_cpu_workers,
+        llm_workers=settings.dag_llm_workers,
+        max_in_flight=settings.dag_sections_in_flight,
+        cache=opts.cache,
+    )
+    # Lazy: a section's deadline starts when the runner admits it
+    seeds = (opts.seed(s) for s in sections)
+    for values in dag_runner.run_many(seeds, return_exceptions=return_exceptions):
+        yield values if isinstance(values, BaseException) else section_result(values)
+
+
+def journal_section(journal: Journal, result: SectionResult) -> None:
+    """Checkpoint a finished section: one hash record per step, with the
+    Step 11 rows kept as payload so `--resume` can re-emit them."""
+    outputs = [
+        ("step2", result.sentences),
+        ("step3", result.labeled),
+        ("step4", result.scored),
+        ("step5", result.selected),
+        ("step6", result.step_count),
+        ("step7", result.mapped),
+        ("step8", result.rewritten),
+        ("step9", result.difficulty),
+        ("step10", result.quality),
+    ]
+    for step, output in outputs:
+        journal.append(result.section_id, step, output)
+    journal.append(result.section_id, FINAL_STEP, [asdict(r) for r in result.rows], keep_payload=True)
+
+
+def journaled_rows(journal: Journal, section_id: int) -> List[LessonRow]:
+    return [LessonRow(**r) for r in journal.payload(section_id) or []]
+
+
+def sections_from_records(records: Iterable[Dict[str, Any]]) -> List[RawSection]:
+    """Rebuild `RawSection`s from a `step1` artifact."""
+    return [RawSection(**rec) for rec in records]
@@ -0,0 +1,101 @@
+"""Page-level process pool for the in-process orchestrator.
+
+Steps 2–7 and 9–10 are pure-Python CPU work, so pages are fanned out to a
+`ProcessPoolExecutor`. Each worker warms its state once in `_init_worker`
+(settings, compiled step regexes, template engine, hyphenation dictionary).
+
+Pages are submitted in chunks of `chunksize` pages with a bounded number of
+chunks in flight, and results are yielded strictly in input page order, so
+the persistence stage can consume them as a stream.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import groupby, islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import get_settings
+from db.models import RawSection
+from pipeline.orchestrator import RunOptions, SectionResult, run_section, run_sections
+from utils.logging_utils import log_event
+from utils.metrics import REGISTRY
+
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker by `_init_worker`
+_WORKER_OPTIONS: Optional[RunOptions] = None
+
+
+def iter_pages(sections: Iterable[RawSection]) -> Iterator[List[RawSection]]:
+    """Group consecutive sections by page_id (Step 1 emits them page by page)."""
+    for _, group in groupby(sections, key=lambda s: s.page_id):
+        yield list(group)
+
+
+def _init_worker(options: RunOptions) -> None:
+    global _WORKER_OPTIONS
+    _WORKER_OPTIONS = options
+    # Warm per-process state once instead of on the first section
+    from pipeline.step7_templates import get_engine
+    from utils.readability import readability_stats
+
+    get_settings()
+    get_engine(options.templates_path)
+    readability_stats("Warm up the hyphenation dictionary.")
+
+
+def _run_chunk(pages: List[List[RawSection]]) -> Tuple[List[List[SectionResult]], Dict[str, Any]]:
+    opts = _WORKER_OPTIONS or RunOptions()
+    results = [[run_section(s, opts) for s in page] for page in pages]
+    return results, REGISTRY.drain()  # worker metrics are merged by the parent
+
+
+def _chunks(pages: Iterator[List[RawSection]], size: int) -> Iterator[List[List[RawSection]]]:
+    while True:
+        chunk = list(islice(pages, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_pages_parallel(
+    sections: Iterable[RawSection],
+    options: Optional[RunOptions] = None,
+    *,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> Iterator[SectionResult]:
+    """Run sections page-by-page across processes, yielding in input order."""
+    settings = get_settings()
+    opts = options or RunOptions()
+    n_workers = settings.workers if workers is None else workers
+    if n_workers <= 0:
+        n_workers = os.cpu_count() or 1
+    size = max(1, settings.worker_chunksize if chunksize is None else chunksize)
+
+    if n_workers == 1:
+        yield from run_sections(sections, opts)
+        return
+
+    log_event(logger, "parallel.start", workers=n_workers, chunksize=size)
+    max_in_flight = n_workers * 2
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(opts,)) as ex:
+        pending: Deque[Future] = deque()
+        for chunk in _chunks(iter_pages(sections), size):
+            pending.append(ex.submit(_run_chunk, chunk))
+            if len(pending) >= max_in_flight:
+                yield from _flatten(pending.popleft().result())
+        while pending:
+            yield from _flatten(pending.popleft().result())
+
+
+def _flatten(chunk: Tuple[List[List[SectionResult]], Dict[str, Any]]) -> Iterator[SectionResult]:
+    pages, metrics = chunk
+    REGISTRY.merge(metrics)
+    for page in pages:
+        yield from page
@@ -0,0 +1,196 @@
+"""Priority- and cost-aware section ordering (`run --schedule`).
+
+Sections are processed (and their results emitted) in the order they are
+fed to the runners. Fetch order (`serial_id`) puts a cheap section behind an
+expensive one as often as not, and several long, ambiguous pages in a row
+leave the CPU stages idle while the LLM works through them. The scheduler
+reorders a bounded look-ahead window of sections:
+ - cost: sentence count (CPU steps) plus the Step 3 LLM fallbacks a rules-only
+   pre-pass expects (`needs_llm_fallback`); the pre-pass is skipped when the
+   fallback is disabled
+ - priority: page freshness (newer serial ids score higher within the window),
+   plus per-topic and per-page weights
+ - order: higher priority first; sections whose priorities are within
+   `priority_slack` are interleaved so sections above the window's median cost
+   are spread evenly between cheaper ones (never first), keeping the LLM pool
+   fed without stalling the head of the output behind a run of huge pages
+Only `window` sections are held at a time, so a lazy source stays lazy.
+
+With `keep_pages` (the page-level process pool, which runs consecutive
+sections of a page as one task) windows are cut at page boundaries and each
+page's sections stay together, in their original order, at the slot of the
+page's first scheduled section; only whole pages are reordered.
+"""
+
+from __future__ import annotations
+
+import logging
+import statistics
+from dataclasses import dataclass
+from itertools import groupby, islice
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from config.settings import get_settings
+from db.models import RawSection
+from pipeline.step2_normalize import normalize_and_split
+from services.classifier import needs_llm_fallback
+from utils.logging_utils import log_event, parse_event_rates
+from utils.metrics import counter
+
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED = counter("scheduler_sections_total", "Sections scheduled, by cost class (heavy = above the window median)")
+
+
+@dataclass(frozen=True)
+class SectionCost:
+    sentences: int
+    llm_calls: int  # expected Step 3 fallbacks
+    seconds: float
+
+
+@dataclass(frozen=True)
+class _Entry:
+    position: int
+    section: RawSection
+    cost: SectionCost
+    priority: float
+
+
+class SectionScheduler:
+    """Reorders sections by priority and estimated cost (see module docstring)."""
+
+    def __init__(
+        self,
+        *,
+        window: int = 64,
+        freshness_weight: float = 0.0,
+        topic_weights: Optional[Mapping[str, float]] = None,
+        page_weights: Optional[Mapping[int, float]] = None,
+        priority_slack: float = 0.5,
+        sentence_cost_s: float = 0.002,
+        llm_call_cost_s: float = 1.0,
+        use_llm: bool = True,
+        keep_pages: bool = False,
+    ) -> None:
+        self.window = max(1, window)
+        self.freshness_weight = freshness_weight
+        self.topic_weights = dict(topic_weights or {})
+        self.page_weights = dict(page_weights or {})
+        self.priority_slack = priority_slack
+        self.sentence_cost_s = sentence_cost_s
+        self.llm_call_cost_s = llm_call_cost_s
+        self.use_llm = use_llm
+        self.keep_pages = keep_pages
+
+    @classmethod
+    def from_settings(cls, use_llm: Optional[bool] = None, keep_pages: bool = False) -> "SectionScheduler":
+        """`use_llm=None` follows `CLASSIFIER_USE_LLM_FALLBACK`, like Step 3."""
+        settings = get_settings()
+        return cls(
+            window=settings.schedule_window,
+            freshness_weight=settings.schedule_freshness_weight,
+            topic_weights=parse_event_rates(settings.schedule_topic_weights),
+            page_weights={int(k): v for k, v in parse_event_rates(settings.schedule_page_weights).items()},
+            priority_slack=settings.schedule_priority_slack,
+            sentence_cost_s=settings.schedule_sentence_cost_s,
+            llm_call_cost_s=settings.schedule_llm_call_cost_s,
+            use_llm=settings.classifier_use_llm_fallback if use_llm is None else use_llm,
+            keep_pages=keep_pages,
+        )
+
+    def cost(self, section: RawSection) -> SectionCost:
+        sentences = normalize_and_split(section.text or "")
+        llm_calls = sum(needs_llm_fallback(s, section.keywords) for s in sentences) if self.use_llm else 0
+        return SectionCost(
+            sentences=len(sentences),
+            llm_calls=llm_calls,
+            seconds=len(sentences) * self.sentence_cost_s + llm_calls * self.llm_call_cost_s,
+        )
+
+    def priority(self, section: RawSection, freshness: float = 0.0) -> float:
+        return (
+            self.freshness_weight * freshness
+            + self.topic_weights.get(section.topic or "", 0.0)
+            + self.page_weights.get(section.page_id, 0.0)
+        )
+
+    def plan(self, sections: Sequence[RawSection]) -> List[RawSection]:
+        """Order one window of sections."""
+        if len(sections) < 2:
+            return list(sections)
+        page_ids = [s.page_id or 0 for s in sections]
+        low, span = min(page_ids), (max(page_ids) - min(page_ids)) or 1
+        entries = [
+            _Entry(i, s, self.cost(s), self.priority(s, (pid - low) / span))
+            for i, (s, pid) in enumerate(zip(sections, page_ids))
+        ]
+        median = statistics.median(e.cost.seconds for e in entries)
+        # Heavy: longest first so slow work starts early; light: cheapest first
+        heavy = sorted((e for e in entries if e.cost.seconds > median), key=lambda e: (-e.priority, -e.cost.seconds, e.position))
+        light = sorted((e for e in entries if e.cost.seconds <= median), key=lambda e: (-e.priority, e.cost.seconds, e.position))
+        share = len(heavy) / len(entries)
+
+        out: List[_Entry] = []
+        h = l = 0
+        while h < len(heavy) or l < len(light):
+            if l == len(light):
+                take_heavy = True
+            elif h == len(heavy):
+                take_heavy = False
+            elif abs(heavy[h].priority - light[l].priority) > self.priority_slack:
+                take_heavy = heavy[h].priority > light[l].priority
+            else:
+                # Keep the heavy count at its share of every prefix of the schedule
+                take_heavy = h + 1 <= share * (len(out) + 1)
+            if take_heavy:
+                out.append(heavy[h])
+                h += 1
+            else:
+                out.append(light[l])
+                l += 1
+        if self.keep_pages:
+            pages: Dict[Any, List[_Entry]] = {}
+            for e in out:
+                pages.setdefault(e.section.page_id, []).append(e)
+            out = [e for page in pages.values() for e in sorted(page, key=lambda e: e.position)]
+
+        SCHEDULED.inc(len(heavy), kind="heavy")
+        SCHEDULED.inc(len(light), kind="light")
+        log_event(
+            logger,
+            "scheduler.window",
+            level=logging.DEBUG,
+            sections=len(entries),
+            heavy=len(heavy),
+            llm_calls=sum(e.cost.llm_calls for e in entries),
+            est_seconds=round(sum(e.cost.seconds for e in entries), 3),
+        )
+        return [e.section for e in out]
+
+    def schedule(self, sections: Iterable[RawSection]) -> Iterator[RawSection]:
+        """Lazily reorder `sections`, `window` at a time."""
+        if self.keep_pages:
+            for chunk in _page_windows(sections, self.window):
+                yield from self.plan(chunk)
+            return
+        it = iter(sections)
+        while True:
+            chunk = list(islice(it, self.window))
+            if not chunk:
+                return
+            yield from self.plan(chunk)
+
+
+def _page_windows(sections: Iterable[RawSection], window: int) -> Iterator[List[RawSection]]:
+    """Windows of at least `window` sections (or the rest), cut between pages."""
+    chunk: List[RawSection] = []
+    for _, page in groupby(sections, key=lambda s: s.page_id):
+        if len(chunk) >= window:
+            yield chunk
+            chunk = []
+        chunk.extend(page)
+    if chunk:
+        yield chunk
+
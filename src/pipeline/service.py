@@ -0,0 +1,294 @@
+"""Warm local HTTP service: regenerate one section per request.
+
+`serve` keeps per-process state warm between requests: settings, compiled
+patterns, the template engine, the hyphenation dictionary, the step cache and
+persistent DAG thread pools (with their LLM keep-alive sessions).
+ - `POST /lesson` with `{"text": ..., "keywords": [...]}` (optional `title`,
+   `topic`, `section_id`, `page_id`) → sentences, labeled, scored, selected,
+   templated (`steps`) and rewritten texts, difficulty, quality and rows
+ - `GET /healthz` → request and batch counters
+ - `GET /metrics` → the metrics registry in Prometheus text format
+Concurrent requests are micro-batched: the first request of a burst opens a
+`window_s` window and every request arriving within it (up to `max_batch`)
+runs in one `run_sections_concurrent` call, so steps of different requests
+overlap on the shared pools; a section that fails only fails its own request
+(a 500 with a generic body; the error is logged). Responses carry their
+timings in `Server-Timing` (queue, pipeline, total; milliseconds) and
+`X-Batch-Size`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from config.settings import get_settings
+from db.models import RawSection
+from pipeline.dag import DagRunner
+from pipeline.orchestrator import LESSON_DAG, RunOptions, SectionResult, run_sections_concurrent
+from utils.logging_utils import log_event
+from utils.metrics import REGISTRY, counter, histogram
+
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = counter("service_requests_total", "HTTP requests by path and status")
+REQUEST_SECONDS = histogram("service_request_seconds", "Time from request received to response ready")
+BATCH_SIZE = histogram("service_batch_size", "Requests per pipeline batch", buckets=(1, 2, 4, 8, 16, 32, 64))
+
+MAX_BODY_BYTES = 1 << 20
+_ROUTES = {"/lesson", "/healthz", "/metrics"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def section_from_request(payload: Any) -> RawSection:
+    """Validate a `POST /lesson` body into a `RawSection`."""
+    if not isinstance(payload, Mapping):
+        raise BadRequest("body must be a JSON object")
+    text = payload.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise BadRequest("'text' must be a non-empty string")
+    keywords = payload.get("keywords")
+    if keywords is not None and not (isinstance(keywords, list) and all(isinstance(k, str) for k in keywords)):
+        raise BadRequest("'keywords' must be a list of strings")
+    for name in ("title", "topic"):
+        if payload.get(name) is not None and not isinstance(payload[name], str):
+            raise BadRequest(f"'{name}' must be a string")
+    for name in ("section_id", "page_id"):
+        if payload.get(name) is not None and not isinstance(payload[name], int):
+            raise BadRequest(f"'{name}' must be an integer")
+    return RawSection(
+        # Same content and ids → same step-cache keys across requests
+        section_id=payload.get("section_id") or 0,
+        page_id=payload.get("page_id"),
+        page_title=None,
+        title=payload.get("title"),
+        text=text,
+        topic=payload.get("topic"),
+        keywords=keywords,
+    )
+
+
+def result_payload(result: SectionResult) -> Dict[str, Any]:
+    return {
+        "section_id": result.section_id,
+        "sentences": result.sentences,
+        "labeled": result.labeled,
+        "scored": result.scored,
+        "selected": result.selected,
+        "step_count": result.step_count,
+        "steps": result.mapped,
+        "rewritten": result.rewritten,
+        "difficulty": result.difficulty,
+        "quality": result.quality,
+        "rows": [asdict(r) for r in result.rows],
+        "degradations": result.degradations,
+    }
+
+
+@dataclass
+class _Pending:
+    section: RawSection
+    received: float = field(default_factory=time.perf_counter)
+    future: "Future[SectionResult]" = field(default_factory=Future)
+    started: float = 0.0
+    finished: float = 0.0
+    batch_size: int = 0
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds spent waiting for a batch, in the pipeline and in total."""
+        return {
+            "queue": (self.started - self.received) * 1000.0,
+            "pipeline": (self.finished - self.started) * 1000.0,
+            "total": (self.finished - self.received) * 1000.0,
+        }
+
+
+class LessonBatcher:
+    """Collects concurrent submissions into batches run by one background thread."""
+
+    def __init__(self, options: RunOptions, *, window_s: float, max_batch: int, runner: Optional[DagRunner] = None) -> None:
+        settings = get_settings()
+        self.options = options
+        self.window_s = window_s
+        self.max_batch = max(1, max_batch)
+        self.runner = runner or DagRunner(
+            LESSON_DAG,
+            cpu_workers=settings.dag_cpu_workers,
+            llm_workers=settings.dag_llm_workers,
+            max_in_flight=max(settings.dag_sections_in_flight, self.max_batch),
+            cache=options.cache,
+            persistent=True,
+        )
+        self.batches = 0
+        self.requests = 0
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="lesson-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, section: RawSection) -> _Pending:
+        pending = _Pending(section)
+        self._queue.put(pending)
+        return pending
+
+    def _collect(self, first: _Pending) -> Tuple[List[_Pending], bool]:
+        batch = [first]
+        closes_at = time.monotonic() + self.window_s
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, closes_at - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _loop(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            self._run(batch)
+
+    def _run(self, batch: List[_Pending]) -> None:
+        started = time.perf_counter()
+        for p in batch:
+            p.started, p.batch_size = started, len(batch)
+        self.batches += 1
+        self.requests += len(batch)
+        BATCH_SIZE.observe(len(batch))
+        try:
+            # A failing section only fails its own request
+            results = run_sections_concurrent([p.section for p in batch], self.options, runner=self.runner, return_exceptions=True)
+            for p, result in zip(batch, results):
+                p.finished = time.perf_counter()
+                if isinstance(result, BaseException):
+                    log_event(logger, "service.section_failed", level=logging.ERROR, section_id=p.section.section_id, error=repr(result))
+                    p.future.set_exception(result)
+                else:
+                    p.future.set_result(result)
+        except Exception as exc:
+            log_event(logger, "service.batch_failed", level=logging.ERROR, size=len(batch), error=repr(exc))
+            for p in batch:
+                if not p.future.done():
+                    p.finished = time.perf_counter()
+                    p.future.set_exception(exc)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        self.runner.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "LessonServer"
+    protocol_version = "HTTP/1.1"  # keep-alive for editor clients
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: Optional[Mapping[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        REQUESTS.inc(path=self.path if self.path in _ROUTES else "other", status=status)
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Mapping[str, str]] = None) -> None:
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        if self.path == "/healthz":
+            batcher = self.server.batcher
+            self._send_json(200, {"ok": True, "requests": batcher.requests, "batches": batcher.batches})
+        elif self.path == "/metrics":
+            self._send(200, REGISTRY.to_prometheus().encode("utf-8"), content_type="text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        if self.path != "/lesson":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": f"body exceeds {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            section = section_from_request(json.loads(self.rfile.read(length) or b"null"))
+        except (BadRequest, json.JSONDecodeError) as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+
+        pending = self.server.batcher.submit(section)
+        try:
+            result = pending.future.result()
+        except Exception:
+            # The batcher logged the error; internals stay out of the response
+            self._send_json(500, {"error": "internal error"})
+            return
+        timings = pending.timings()
+        REQUEST_SECONDS.observe(timings["total"] / 1000.0)
+        headers = {
+            "Server-Timing": ", ".join(f"{name};dur={ms:.2f}" for name, ms in timings.items()),
+            "X-Batch-Size": str(pending.batch_size),
+        }
+        self._send_json(200, result_payload(result), headers=headers)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log_event(logger, "service.request", level=logging.DEBUG, client=self.client_address[0], line=format % args)
+
+
+class LessonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], batcher: LessonBatcher) -> None:
+        super().__init__(address, _Handler)
+        self.batcher = batcher
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.batcher.close()
+
+
+def make_server(
+    options: RunOptions,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    *,
+    window_s: Optional[float] = None,
+    max_batch: Optional[int] = None,
+) -> LessonServer:
+    """Bind a server (port 0 = any free port); call `serve_forever()` to run."""
+    settings = get_settings()
+    batcher = LessonBatcher(
+        options,
+        window_s=settings.service_window_ms / 1000.0 if window_s is None else window_s,
+        max_batch=settings.service_max_batch if max_batch is None else max_batch,
+    )
+    try:
+        return LessonServer((settings.service_host if host is None else host, settings.service_port if port is None else port), batcher)
+    except OSError:
+        batcher.close()
+        raise
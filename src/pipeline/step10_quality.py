@@ -1,25 +1,132 @@
-"""Step 10 — Quality Gates (placeholder)."""
+"""Step 10 — Quality Gates (per item, with bounded selective regeneration).
+
+`evaluate_item` gates one rewritten step. `gate_and_regenerate` re-issues
+rewrites (with a tighter prompt built from the failure reason) only for items
+that failed on reading grade or token cap, for at most
+`Settings.quality_max_retries` rounds. Compliant items cost no extra LLM calls.
+"""
 
 from __future__ import annotations
 
-from typing import Tuple
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Tuple
 
 from config.settings import get_settings
-from services.keyword_service import flesch_kincaid_grade
+from utils.metrics import counter
+from utils.readability import readability_stats
 
+if TYPE_CHECKING:
+    from pipeline.deadline import Deadline
 
-def check_quality(text: str) -> Tuple[bool, str]:
+
+STEP_VERSION = 1
+
+GATED = counter("quality_items_total", "Items after gating, by outcome (ok or failure kind)")
+REGENERATIONS = counter("quality_regenerations_total", "Items re-sent to the rewriter by the gate")
+
+
+# Failure reasons a tighter rewrite can fix
+RETRYABLE_PREFIXES = ("reading_grade_too_high", "token_cap_exceeded")
+
+
+@dataclass
+class QualityResult:
+    ok: bool
+    reason: str
+    grade: float
+    approx_tokens: int
+
+    @property
+    def retryable(self) -> bool:
+        return not self.ok and self.reason.startswith(RETRYABLE_PREFIXES)
+
+
+@dataclass
+class GateOutcome:
+    texts: List[str]
+    results: List[QualityResult]
+    attempts: List[int]  # rewrite rounds spent per item (0 = first rewrite passed)
+    llm_calls: int  # items re-sent for rewrite (step 8 may pack them into fewer requests)
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results)
+
+    def passed(self) -> List[str]:
+        """Texts that passed QC (failing steps are dropped)."""
+        return [t for t, r in zip(self.texts, self.results) if r.ok]
+
+
+def evaluate_item(text: str) -> QualityResult:
     settings = get_settings()
-    grade = flesch_kincaid_grade(text)
-    if grade > 9.0:
-        return False, f"reading_grade_too_high:{grade:.2f}"
+    stats = readability_stats(text)  # shared with Step 9 (memoized per text)
+    grade = stats.fk_grade
+    approx_tokens = stats.approx_tokens
+    if not text.strip():
+        return QualityResult(False, "empty", grade, approx_tokens)
+    if grade > settings.quality_max_reading_grade:
+        return QualityResult(False, f"reading_grade_too_high:{grade:.2f}", grade, approx_tokens)
 
     # Token cap: approximate by words (placeholder)
-    words = len(text.split())
-    approx_tokens = int(words * 1.3)
     if approx_tokens > settings.token_cap_per_step:
-        return False, f"token_cap_exceeded:{approx_tokens}>{settings.token_cap_per_step}"
+        return QualityResult(False, f"token_cap_exceeded:{approx_tokens}>{settings.token_cap_per_step}", grade, approx_tokens)
+
+    return QualityResult(True, "ok", grade, approx_tokens)
+
+
+def check_quality(text: str) -> Tuple[bool, str]:
+    result = evaluate_item(text)
+    return result.ok, result.reason
+
+
+RewriteFn = Callable[[List[str], List[Optional[str]]], List[str]]
+
+
+def _default_rewrite(texts: List[str], reasons: List[Optional[str]], deadline: Optional[Deadline] = None) -> List[str]:
+    from pipeline.step8_rewrite import micro_rewrite
+
+    return micro_rewrite(texts, reasons=reasons, deadline=deadline, step="step10")
+
 
-    return True, "ok"
+def gate_and_regenerate(
+    originals: Sequence[str],
+    rewritten: Sequence[str],
+    *,
+    max_retries: Optional[int] = None,
+    rewrite_fn: Optional[RewriteFn] = None,
+    deadline: Optional[Deadline] = None,
+) -> GateOutcome:
+    """Evaluate each rewritten item and retry only retryable failures.
 
+    Retries always start from the original text (facts stay locked to the
+    source) with the previous failure reason folded into the prompt. With a
+    `deadline`, no round starts once Step 10's reserve is used up
+    (degradation `step10:retries_cut`).
+    """
+    if len(originals) != len(rewritten):
+        raise ValueError("originals and rewritten must have the same length")
+    budget = get_settings().quality_max_retries if max_retries is None else max_retries
+    rewrite = rewrite_fn or partial(_default_rewrite, deadline=deadline)
 
+    texts = list(rewritten)
+    results = [evaluate_item(t) for t in texts]
+    attempts = [0] * len(texts)
+    llm_calls = 0
+    for _ in range(max(0, budget)):
+        todo = [i for i, r in enumerate(results) if r.retryable]
+        if not todo:
+            break
+        if deadline is not None and (deadline.vetoes_cache("step10") or not deadline.allows("step10")):
+            deadline.degrade("step10", "retries_cut")
+            break
+        fresh = rewrite([originals[i] for i in todo], [results[i].reason for i in todo])
+        llm_calls += len(todo)
+        REGENERATIONS.inc(len(todo))
+        for i, text in zip(todo, fresh):
+            texts[i] = text
+            results[i] = evaluate_item(text)
+            attempts[i] += 1
+    for r in results:
+        GATED.inc(outcome="ok" if r.ok else r.reason.split(":", 1)[0])
+    return GateOutcome(texts=texts, results=results, attempts=attempts, llm_calls=llm_calls)
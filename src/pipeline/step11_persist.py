@@ -14,6 +14,9 @@ from dataclasses import dataclass
 from typing import List
 
 
+STEP_VERSION = 1
+
+
 @dataclass
 class LessonRow:
     lesson_id: int
@@ -7,9 +7,9 @@ has been moved out and should not be used for Step 1 in normal runs.
 from __future__ import annotations
 
 import logging
-from typing import List
+from typing import Iterator, List
 
-from db.db_utils import fetch_pending_sections
+from db.db_utils import fetch_pending_sections, iter_pending_sections
 from db.models import RawSection
 from utils.logging_utils import log_event
 
@@ -22,3 +22,10 @@ def fetch_sections(limit: int) -> List[RawSection]:
     return sections
 
 
+def iter_sections(limit: int) -> Iterator[RawSection]:
+    """Stream sections from the DB (for `run --stream`)."""
+    count = 0
+    for section in iter_pending_sections(limit):
+        count += 1
+        yield section
+    log_event(logger, "step1_fetch.loaded_sections", count=count, source="db", streamed=True)
@@ -1,16 +1,34 @@
-"""Step 2 — Normalize & Split (exact dedupe only)."""
+"""Step 2 — Normalize & Split (exact dedupe, optional embedding near-dedupe)."""
 
 from __future__ import annotations
 
-from typing import List
+from typing import Iterable, List
 
-from src.utils.text_clean import normalize, split_sentences, dedupe_exact
+from db.models import RawSection
+from pipeline.batch import PageBatch, PageBatchBuilder
+from utils.text_clean import normalize, split_sentences, dedupe_exact
 
 
-def normalize_and_split(text: str) -> List[str]:
+STEP_VERSION = 2
+
+
+def normalize_and_split(text: str, near_dedupe: bool = False) -> List[str]:
     # Split first (preserve newline/bullet boundaries), then normalize each
     raw_parts = split_sentences(text)
     parts = [normalize(p) for p in raw_parts]
-    return dedupe_exact(parts)
+    unique = dedupe_exact(parts)
+    if near_dedupe:
+        # Lazy import: embeddings are opt-in and reuse the on-disk vector store
+        from services.embedding_service import dedupe_near
+
+        unique = dedupe_near(unique)
+    return unique
+
 
 
+def split_batch(sections: Iterable[RawSection], near_dedupe: bool = False) -> PageBatch:
+    """`normalize_and_split` each section into one columnar `PageBatch`."""
+    builder = PageBatchBuilder()
+    for section in sections:
+        builder.add(section, normalize_and_split(section.text or "", near_dedupe=near_dedupe))
+    return builder.build()
@@ -2,15 +2,73 @@
 
 from __future__ import annotations
 
-from typing import List, Tuple, Optional
+import logging
+from array import array
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Optional
 
-from services.classifier import classify_with_fallback, Classification
+from config.settings import get_settings
+from pipeline.batch import PageBatch, encode_classification
+from services.classifier import classify_with_fallback, needs_llm_fallback, Classification
+from utils.logging_utils import log_event
+from utils.metrics import counter
 
+if TYPE_CHECKING:
+    from pipeline.deadline import Deadline
 
-def label_sentences(sentences: List[str], section_keywords: Optional[List[str]] = None) -> List[Tuple[str, Classification]]:
+
+logger = logging.getLogger(__name__)
+
+STEP_VERSION = 2
+
+DECISIONS = counter("classifier_decisions_total", "Sentence labels by source (rules vs LLM fallback)")
+
+
+def _trace(text: str, c: Classification) -> Dict[str, Any]:
+    return {"text": text, "label": c.label, "probability": c.probability, "rule_hit": c.rule_hit, "source": c.source}
+
+
+def label_sentences(
+    sentences: List[str],
+    section_keywords: Optional[List[str]] = None,
+    use_llm: Optional[bool] = None,
+) -> List[Tuple[str, Classification]]:
     labeled: List[Tuple[str, Classification]] = []
     for s in sentences:
-        labeled.append((s, classify_with_fallback(s, section_keywords=section_keywords)))
+        c = classify_with_fallback(s, section_keywords=section_keywords, use_llm=use_llm)
+        DECISIONS.inc(source=c.source)
+        log_event(logger, "step3.sentence", level=logging.DEBUG, lazy=partial(_trace, s, c))
+        labeled.append((s, c))
     return labeled
 
 
+
+def label_batch(batch: PageBatch, use_llm: Optional[bool] = None, deadline: Optional[Deadline] = None) -> PageBatch:
+    """`label_sentences` over a `PageBatch`; returns it with Step 3 columns.
+
+    With a `deadline`, sentences reached after Step 3's reserve is used up
+    keep their rules label (degradation `step3:rules_only`).
+    """
+    if use_llm is None:
+        use_llm = get_settings().classifier_use_llm_fallback
+    label, probability, rule_hits, source = array("b"), array("d"), array("B"), array("B")
+    for j, section in enumerate(batch.sections):
+        for i in batch.section_range(j):
+            s = batch.text(i)
+            llm, timeout = use_llm, None
+            if llm and deadline is not None:
+                if not deadline.allows("step3"):
+                    llm = False
+                    if needs_llm_fallback(s, section.keywords):
+                        deadline.degrade("step3", "rules_only")
+                else:
+                    timeout = deadline.timeout()
+            c = classify_with_fallback(s, section_keywords=section.keywords, use_llm=llm, llm_timeout=timeout)
+            DECISIONS.inc(source=c.source)
+            log_event(logger, "step3.sentence", level=logging.DEBUG, lazy=partial(_trace, s, c))
+            code, prob, mask, src = encode_classification(c)
+            label.append(code)
+            probability.append(prob)
+            rule_hits.append(mask)
+            source.append(src)
+    return batch.with_labels(label, probability, rule_hits, source)
@@ -11,8 +11,15 @@ Output: list of dicts with text, section_id, score, features
 from __future__ import annotations
 
 import re
+from array import array
 from typing import Dict, List, Optional
 
+from pipeline.batch import PageBatch
+from services.classifier import INFO_TYPES
+
+
+STEP_VERSION = 2
+
 
 LABEL_PRIOR = {
     "Definition": 0.05,
@@ -62,6 +69,17 @@ def _label_prior_boost(label: Optional[str], prob: Optional[float]) -> float:
     return LABEL_PRIOR[label] * (1.0 + 0.5 * p)
 
 
+def _combine(kd: float, num_flag: int, lb: float, label: Optional[str] = None, prob: Optional[float] = None) -> float:
+    base = 0.35
+    score = base + 0.35 * kd + 0.10 * num_flag + 0.20 * lb
+    # Optional label prior
+    if label is not None:
+        score += _label_prior_boost(label, prob)
+    # Clamp and round
+    score = max(0.0, min(score, 1.0))
+    return round(score, 3)
+
+
 def score_sentences(
     sentences: List[str],
     *,
@@ -83,18 +101,8 @@ def score_sentences(
         kd = _keyword_density(s, section_keywords)
         num_flag = _number_presence(s)
         lb = _length_bonus(len(toks))
-
-        base = 0.35
-        score = base + 0.35 * kd + 0.10 * num_flag + 0.20 * lb
-
-        # Optional label prior
         lab = labeled_map.get(s)
-        if lab:
-            score += _label_prior_boost(lab.get("label"), lab.get("probability"))
-
-        # Clamp and round
-        score = max(0.0, min(score, 1.0))
-        score = round(score, 3)
+        score = _combine(kd, num_flag, lb, lab.get("label"), lab.get("probability")) if lab else _combine(kd, num_flag, lb)
 
         out.append(
             {
@@ -113,3 +121,25 @@ def score_sentences(
     return out
 
 
+
+def score_batch(batch: PageBatch) -> PageBatch:
+    """`score_sentences` over a `PageBatch` (label priors from its Step 3
+    columns when present); returns it with Step 4 columns."""
+    score, density, numbers, lengths = array("f"), array("d"), array("B"), array("H")
+    labeled = batch.labeled
+    for j, section in enumerate(batch.sections):
+        vocab = {k.lower() for k in section.keywords or []}
+        for i in batch.section_range(j):
+            s = batch.text(i)
+            toks = _tokens(s)
+            kd = sum(1 for t in toks if t in vocab) / len(toks) if toks else 0.0
+            num_flag = _number_presence(s)
+            lb = _length_bonus(len(toks))
+            if labeled:
+                score.append(_combine(kd, num_flag, lb, INFO_TYPES[batch.label[i]], batch.probability[i]))
+            else:
+                score.append(_combine(kd, num_flag, lb))
+            density.append(kd)
+            numbers.append(num_flag)
+            lengths.append(min(len(toks), 0xFFFF))
+    return batch.with_scores(score, density, numbers, lengths)
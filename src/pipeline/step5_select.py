@@ -1,18 +1,142 @@
-"""Step 5 — Select Minimal Teaching Set (placeholder signatures)."""
+"""Step 5 — Select Minimal Teaching Set (score-aware, diverse).
+
+Inputs:
+- labeled (required) — Step 3 output as (text, Classification) pairs
+- scored (optional) — Step 4 output; without it, label probability ranks.
+  The two are on different scales and never mixed: with `scored`, sentences
+  it has no score for are not candidates
+
+Per info type, a bounded min-heap keeps the best `top_k * pool_factor`
+candidates (O(n log k)), then maximal marginal relevance (MMR) picks `top_k`
+non-redundant sentences from that pool. Redundancy is measured on sparse
+hashed term vectors.
+
+Output: {info_type: [text, ...]} in original sentence order.
+
+`select_from_batch` does the same over one section of a `PageBatch`.
+"""
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from config.settings import get_settings
+from pipeline.batch import PageBatch
 from services.classifier import INFO_TYPES, Classification
+from utils.sparse_vectors import cosine, hashed_term_vector
+
+
+STEP_VERSION = 3
+
+
+# (score, -position, text) so ties keep the earlier sentence
+_Candidate = Tuple[float, int, str]
 
 
-def select_minimal_set(labeled: List[Tuple[str, Classification]]) -> Dict[str, List[str]]:
-    """Keep top-1 per info type (placeholder: first occurrence per type)."""
+def _score_lookup(scored: Optional[List[Dict]]) -> Dict[str, float]:
+    lookup: Dict[str, float] = {}
+    for rec in scored or []:
+        t = (rec.get("text") or "").strip()
+        if t and t not in lookup:
+            lookup[t] = float(rec.get("score", 0.0))
+    return lookup
+
+
+def _mmr(pool: List[_Candidate], k: int, mmr_lambda: float) -> List[_Candidate]:
+    """Greedy MMR over a small candidate pool (already bounded by the heap)."""
+    remaining = sorted(pool, reverse=True)
+    vectors = {c[1]: hashed_term_vector(c[2]) for c in remaining}
+    chosen: List[_Candidate] = []
+    while remaining and len(chosen) < k:
+        chosen_vecs = [vectors[c[1]] for c in chosen]
+        best_idx = 0
+        best_val = float("-inf")
+        for i, cand in enumerate(remaining):
+            redundancy = max((cosine(vectors[cand[1]], v) for v in chosen_vecs), default=0.0)
+            val = mmr_lambda * cand[0] - (1.0 - mmr_lambda) * redundancy
+            if val > best_val:
+                best_val, best_idx = val, i
+        chosen.append(remaining.pop(best_idx))
+    return chosen
+
+
+def _select(
+    candidates: Iterable[Tuple[str, float, int, str]],
+    top_k: Optional[int],
+    min_score: Optional[float],
+    mmr_lambda: Optional[float],
+) -> Dict[str, List[str]]:
+    """Heap + MMR over (label, score, position, text) candidates."""
+    settings = get_settings()
+    k = settings.select_top_k_per_type if top_k is None else top_k
+    floor = settings.select_min_score if min_score is None else min_score
+    lam = settings.select_mmr_lambda if mmr_lambda is None else mmr_lambda
+    pool_size = max(k, k * settings.select_candidate_pool_factor)
+
+    heaps: Dict[str, List[_Candidate]] = {t: [] for t in INFO_TYPES}
+    for label, score, pos, text in candidates:
+        if label not in heaps:
+            continue
+        if score < floor:
+            continue
+        item = (score, -pos, text)
+        heap = heaps[label]
+        if len(heap) < pool_size:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
     selected: Dict[str, List[str]] = {t: [] for t in INFO_TYPES}
-    for text, cls in labeled:
-        if not selected[cls.label]:
-            selected[cls.label] = [text]
+    if k <= 0:
+        return selected
+    for label, heap in heaps.items():
+        chosen = _mmr(heap, k, lam)
+        # Restore document order for readability downstream
+        selected[label] = [c[2] for c in sorted(chosen, key=lambda c: -c[1])]
     return selected
 
 
+def select_minimal_set(
+    labeled: List[Tuple[str, Classification]],
+    scored: Optional[List[Dict]] = None,
+    *,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+    mmr_lambda: Optional[float] = None,
+) -> Dict[str, List[str]]:
+    """Keep the top-k most relevant, least redundant sentences per info type."""
+    if scored is None:
+        candidates: Iterable[Tuple[str, float, int, str]] = (
+            (cls.label, float(cls.probability), pos, text) for pos, (text, cls) in enumerate(labeled)
+        )
+    else:
+        scores = _score_lookup(scored)
+        candidates = (
+            (cls.label, scores[text.strip()], pos, text)
+            for pos, (text, cls) in enumerate(labeled)
+            if text.strip() in scores
+        )
+    return _select(candidates, top_k, min_score, mmr_lambda)
+
+
+def select_from_batch(
+    batch: PageBatch,
+    section: int = 0,
+    *,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+    mmr_lambda: Optional[float] = None,
+) -> Dict[str, List[str]]:
+    """`select_minimal_set` for one section of a labeled `PageBatch`, scored
+    by its Step 4 column (label probability when unscored)."""
+    if not batch.labeled:
+        raise ValueError("select_from_batch needs a labeled batch (Step 3)")
+    scores = batch.score if batch.scored else batch.probability
+    rounding = 3 if batch.scored else None
+    rng = batch.section_range(section)
+    candidates = (
+        (INFO_TYPES[batch.label[i]], round(scores[i], rounding) if rounding else scores[i], i - rng.start, batch.text(i))
+        for i in rng
+    )
+    return _select(candidates, top_k, min_score, mmr_lambda)
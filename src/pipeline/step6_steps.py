@@ -5,6 +5,9 @@ from __future__ import annotations
 from typing import Dict, List
 
 
+STEP_VERSION = 1
+
+
 def decide_step_count(selected: Dict[str, List[str]]) -> int:
     non_empty = sum(1 for v in selected.values() if v)
     if non_empty >= 3:
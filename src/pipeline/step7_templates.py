@@ -1,32 +1,225 @@
-"""Step 7 — Fill Interactive Templates (placeholder signatures)."""
+"""Step 7 — Fill Interactive Templates (compiled, cached slot renderers).
+
+`templates.json` is parsed once per file version (mtime + size) into a
+`TemplateEngine`. Each slot string is pre-split into literal/field pieces and
+every `{placeholder}` is checked against `TEMPLATE_FIELDS` at load time, so a
+typo fails on load instead of silently rendering an empty slot per lesson.
+
+Rendering fills slots from the selected teaching units (Step 5) plus optional
+section context (term/title/topic) and records `missing_slots` for the
+completeness check in Step 10.
+"""
 
 from __future__ import annotations
 
 import json
+import string
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+
+STEP_VERSION = 1
+
+
+# Every placeholder a template may reference
+TEMPLATE_FIELDS = frozenset({
+    "term", "definition_text", "application",
+    "process", "step_1", "step_2", "step_3",
+    "option_a", "option_b", "when_a", "when_b",
+    "scenario", "outcome", "key_insight", "context",
+})
+
+
+class TemplateError(ValueError):
+    """Raised when templates.json is malformed or references unknown fields."""
+
+
+# A compiled string: (literal, field) pairs; field is None for the trailing literal
+_Pieces = Tuple[Tuple[str, Optional[str]], ...]
+
+
+def _compile_string(tpl_id: str, slot: str, raw: str) -> _Pieces:
+    pieces: List[Tuple[str, Optional[str]]] = []
+    try:
+        parsed = list(string.Formatter().parse(raw))
+    except ValueError as exc:
+        raise TemplateError(f"{tpl_id}.{slot}: {exc}") from exc
+    for literal, field_name, format_spec, conversion in parsed:
+        if field_name is not None:
+            if field_name not in TEMPLATE_FIELDS:
+                raise TemplateError(f"{tpl_id}.{slot}: unknown placeholder {{{field_name}}}")
+            if format_spec or conversion:
+                raise TemplateError(f"{tpl_id}.{slot}: format specs are not supported")
+        pieces.append((literal, field_name))
+    return tuple(pieces)
+
+
+def _render_pieces(pieces: _Pieces, values: Mapping[str, str], missing: List[str]) -> str:
+    out: List[str] = []
+    for literal, name in pieces:
+        out.append(literal)
+        if name is not None:
+            val = values.get(name)
+            if val:
+                out.append(val)
+            elif name not in missing:
+                missing.append(name)
+    return "".join(out)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    id: str
+    name: str
+    info_type: str
+    # (slot name, is_list, compiled strings); scalar slots hold one entry
+    slots: Tuple[Tuple[str, bool, Tuple[_Pieces, ...]], ...]
+    render_hints: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def placeholders(self) -> frozenset:
+        return frozenset(
+            name
+            for _, _, group in self.slots
+            for pieces in group
+            for _, name in pieces
+            if name
+        )
+
+    def render(self, values: Mapping[str, str]) -> Tuple[Dict[str, Any], List[str]]:
+        missing: List[str] = []
+        rendered: Dict[str, Any] = {}
+        for slot, is_list, group in self.slots:
+            parts = [_render_pieces(p, values, missing) for p in group]
+            rendered[slot] = parts if is_list else parts[0]
+        return rendered, missing
+
+
+def compile_template(tpl: Mapping[str, Any]) -> CompiledTemplate:
+    tpl_id = str(tpl.get("id") or "")
+    info_type = tpl.get("info_type")
+    slots = tpl.get("slots")
+    if not tpl_id or not info_type or not isinstance(slots, dict):
+        raise TemplateError(f"template {tpl_id or '?'} needs id, info_type and a slots object")
+    compiled: List[Tuple[str, bool, Tuple[_Pieces, ...]]] = []
+    for slot, raw in slots.items():
+        if isinstance(raw, str):
+            compiled.append((slot, False, (_compile_string(tpl_id, slot, raw),)))
+        elif isinstance(raw, list) and all(isinstance(x, str) for x in raw):
+            compiled.append((slot, True, tuple(_compile_string(tpl_id, slot, x) for x in raw)))
+        else:
+            raise TemplateError(f"{tpl_id}.{slot}: slot must be a string or list of strings")
+    return CompiledTemplate(
+        id=tpl_id,
+        name=str(tpl.get("name", tpl_id)),
+        info_type=str(info_type),
+        slots=tuple(compiled),
+        render_hints=dict(tpl.get("render_hints") or {}),
+    )
+
+
+def lesson_fields(info_type: str, texts: List[str], context: Optional[Mapping[str, Any]] = None) -> Dict[str, str]:
+    """Derive slot values for one info type from its selected sentences."""
+    ctx = dict(context or {})
+    keywords = ctx.get("keywords") or []
+    term = ctx.get("term") or (keywords[0] if keywords else "") or ctx.get("title") or ""
+    values: Dict[str, str] = {
+        "term": str(term),
+        "process": str(ctx.get("process") or ctx.get("title") or term),
+        "context": str(ctx.get("topic") or ""),
+    }
+    if info_type == "Definition":
+        values["definition_text"] = " ".join(texts)
+    elif info_type in {"Mechanism", "Procedure"}:
+        for i, t in enumerate(texts[:3], start=1):
+            values[f"step_{i}"] = t
+    elif info_type == "Comparison":
+        if texts:
+            values["option_a"] = texts[0]
+        if len(texts) > 1:
+            values["option_b"] = texts[1]
+    elif info_type == "Example":
+        if texts:
+            values["scenario"] = texts[0]
+        if len(texts) > 1:
+            values["outcome"] = texts[1]
+    # Explicit context values win (e.g. curated `application`, `key_insight`)
+    for k, v in ctx.items():
+        if k in TEMPLATE_FIELDS and v:
+            values[k] = str(v)
+    return values
+
+
+class TemplateEngine:
+    """Compiled templates indexed by info type."""
+
+    def __init__(self, templates: List[Mapping[str, Any]]) -> None:
+        if not isinstance(templates, list) or not templates:
+            raise TemplateError("templates.json must be a non-empty list")
+        self.raw = templates
+        self.templates = [compile_template(t) for t in templates]
+        self.by_type: Dict[str, CompiledTemplate] = {}
+        for tpl in self.templates:
+            self.by_type.setdefault(tpl.info_type, tpl)
+
+    def render(self, selected: Mapping[str, List[str]], context: Optional[Mapping[str, Any]] = None) -> List[Dict[str, Any]]:
+        result: List[Dict[str, Any]] = []
+        for info_type, texts in selected.items():
+            if not texts:
+                continue
+            tpl = self.by_type.get(info_type)
+            if not tpl:
+                continue
+            slots, missing = tpl.render(lesson_fields(info_type, texts, context))
+            result.append({
+                "template_id": tpl.id,
+                "info_type": info_type,
+                "content": texts,
+                "slots": slots,
+                "missing_slots": missing,
+            })
+        return result
+
+    def render_batch(
+        self,
+        lessons: Iterable[Tuple[Mapping[str, List[str]], Optional[Mapping[str, Any]]]],
+    ) -> List[List[Dict[str, Any]]]:
+        """Render many (selected, context) lessons in one call."""
+        render = self.render
+        return [render(selected, context) for selected, context in lessons]
+
+
+# path -> ((mtime_ns, size), engine)
+_ENGINE_CACHE: Dict[str, Tuple[Tuple[int, int], TemplateEngine]] = {}
+
+
+def get_engine(path: Path) -> TemplateEngine:
+    """Return the compiled engine for `path`, recompiling only when it changes."""
+    key = str(Path(path).resolve())
+    st = Path(path).stat()
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _ENGINE_CACHE.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except json.JSONDecodeError as exc:
+        raise TemplateError(f"Invalid JSON in {path}: {exc}") from exc
+    engine = TemplateEngine(data)
+    _ENGINE_CACHE[key] = (version, engine)
+    return engine
 
 
 def load_templates(path: Path) -> list[dict[str, Any]]:
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def map_to_templates(selected: Dict[str, List[str]], templates: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    """Placeholder: wrap texts into minimal slot mapping by info_type."""
-    result: list[dict[str, Any]] = []
-    by_type = {tpl["info_type"]: tpl for tpl in templates}
-    for info_type, texts in selected.items():
-        if not texts:
-            continue
-        tpl = by_type.get(info_type)
-        if not tpl:
-            continue
-        step = {
-            "template_id": tpl["id"],
-            "info_type": info_type,
-            "content": texts,
-        }
-        result.append(step)
-    return result
+    return get_engine(path).raw
 
 
+def map_to_templates(
+    selected: Dict[str, List[str]],
+    templates: Union[TemplateEngine, list[dict[str, Any]]],
+    context: Optional[Mapping[str, Any]] = None,
+) -> list[dict[str, Any]]:
+    """Fill each non-empty info type's template slots from its selected texts."""
+    engine = templates if isinstance(templates, TemplateEngine) else TemplateEngine(templates)
+    return engine.render(selected, context)
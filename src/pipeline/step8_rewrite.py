@@ -1,23 +1,217 @@
-"""Step 8 — Micro-rewrite (style only, placeholder)."""
+"""Step 8 — Micro-rewrite (style only).
+
+Texts are packed into batched requests (up to
+`Settings.rewrite_batch_token_budget` input tokens each) so the instruction
+preamble is sent once per batch instead of once per text. The model answers
+with a JSON array that is mapped back by position; if a batch response can't
+be parsed, only that batch falls back to one request per text.
+
+With a `Deadline`, a request is only started while the calling step's
+reserve is left and its HTTP timeout is the time remaining; a request that
+fails or times out stops the rewrites. Texts not reached keep their input
+text (degradation `step8:partial`, or `step10:retries_cut` for Step 10
+regenerations).
+"""
 
 from __future__ import annotations
 
-from typing import List
+import json
+import logging
+from typing import TYPE_CHECKING, List, Optional, Sequence
 
 from config.settings import get_settings
 from services.llm_service import rewrite_style
+from utils.logging_utils import log_event
+from utils.metrics import counter
+from utils.readability import TOKENS_PER_WORD
+
+if TYPE_CHECKING:
+    from pipeline.deadline import Deadline
+
+
+STEP_VERSION = 1
+
+REWRITE_REQUESTS = counter("rewrite_requests_total", "Step 8 LLM prompts by mode (single, batch)")
+BATCH_PARSE_FAILURES = counter("rewrite_batch_parse_failures_total", "Batched responses that did not parse")
+
+
+logger = logging.getLogger(__name__)
+
+BASE_INSTRUCTIONS = (
+    "Rewrite the following content to be in a clear, concise 2nd-person "
+    "conversational style without changing any facts. Keep it under the token cap."
+)
 
+BATCH_INSTRUCTIONS = (
+    "Rewrite each item below to be in a clear, concise 2nd-person conversational "
+    "style without changing any facts. Rewrite every item independently and keep "
+    "each under the token cap. If an item has an \"issue\", fix that issue: use short "
+    "sentences and everyday words (reading grade {grade:g} or lower) and at most "
+    "{max_words} words.\n"
+    "Respond with ONLY a JSON array of {n} strings, one rewrite per item, in the same order."
+)
 
-def micro_rewrite(texts: List[str]) -> List[str]:
+
+def _max_words() -> int:
+    return int(get_settings().token_cap_per_step / TOKENS_PER_WORD)
+
+
+def build_prompt(text: str, reason: Optional[str] = None) -> str:
+    """Rewrite prompt; `reason` (a Step 10 failure) tightens the instructions."""
     settings = get_settings()
-    rewritten: List[str] = []
-    for t in texts:
-        prompt = (
-            "Rewrite the following content to be in a clear, concise 2nd-person "
-            "conversational style without changing any facts. Keep it under the token cap.\n\n" + t
+    instructions = BASE_INSTRUCTIONS
+    if reason:
+        instructions += (
+            f" A previous rewrite failed a quality check ({reason})."
+            f" Use short sentences and everyday words (reading grade {settings.quality_max_reading_grade:g} or lower)"
+            f" and at most {_max_words()} words. Do not drop any facts."
         )
-        resp = rewrite_style(prompt, temperature=settings.llm_temperature)
-        rewritten.append(resp.text.strip())
+    return instructions + "\n\n" + text
+
+
+def build_batch_prompt(texts: Sequence[str], reasons: Optional[Sequence[Optional[str]]] = None) -> str:
+    settings = get_settings()
+    items = []
+    for i, t in enumerate(texts):
+        item = {"id": i + 1, "text": t}
+        if reasons and reasons[i]:
+            item["issue"] = reasons[i]
+        items.append(item)
+    header = BATCH_INSTRUCTIONS.format(
+        grade=settings.quality_max_reading_grade, max_words=_max_words(), n=len(texts)
+    )
+    return header + "\n\nItems:\n" + json.dumps(items, ensure_ascii=False)
+
+
+def parse_batch_response(text: str, expected: int) -> Optional[List[str]]:
+    """Extract a JSON array of `expected` strings; None if malformed."""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, list) or len(data) != expected:
+        return None
+    out: List[str] = []
+    for item in data:
+        if isinstance(item, dict):
+            item = item.get("text")
+        if not isinstance(item, str) or not item.strip():
+            return None
+        out.append(item.strip())
+    return out
+
+
+def pack_batches(texts: Sequence[str], token_budget: int) -> List[List[int]]:
+    """Greedily group text indices so each batch stays within `token_budget`."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i, t in enumerate(texts):
+        cost = int(len(t.split()) * TOKENS_PER_WORD) + 1
+        if current and used + cost > token_budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+# Degradation recorded when a caller's rewrites stop early
+_DEGRADED_MODE = {"step10": "retries_cut"}
+
+
+def _time_left(deadline: Optional[Deadline], step: str) -> Optional[float]:
+    """HTTP timeout for the next request; 0 when `deadline` says stop."""
+    if deadline is None:
+        return None
+    if not deadline.allows(step):
+        deadline.degrade(step, _DEGRADED_MODE.get(step, "partial"))
+        return 0.0
+    return deadline.timeout()
+
+
+def _request(prompt: str, timeout: Optional[float], deadline: Optional[Deadline], step: str) -> Optional[str]:
+    """One LLM request; None when a deadline-bounded request failed (degraded)."""
+    temperature = get_settings().llm_temperature
+    if deadline is None:
+        return rewrite_style(prompt, temperature=temperature, timeout=timeout).text
+    import requests
+
+    try:
+        return rewrite_style(prompt, temperature=temperature, timeout=timeout).text
+    except requests.RequestException as exc:
+        deadline.degrade(step, _DEGRADED_MODE.get(step, "partial"))
+        log_event(logger, "step8_rewrite.request_failed", level=logging.WARNING, step=step, error=type(exc).__name__)
+        return None
+
+
+def _rewrite_each(
+    texts: Sequence[str],
+    reasons: Optional[Sequence[Optional[str]]],
+    deadline: Optional[Deadline] = None,
+    step: str = "step8",
+) -> List[str]:
+    rewritten: List[str] = []
+    for i, t in enumerate(texts):
+        timeout = _time_left(deadline, step)
+        if timeout == 0.0:
+            return rewritten + list(texts[i:])
+        REWRITE_REQUESTS.inc(mode="single")
+        text = _request(build_prompt(t, reasons[i] if reasons else None), timeout, deadline, step)
+        if text is None:
+            return rewritten + list(texts[i:])
+        rewritten.append(text.strip())
     return rewritten
 
 
+def micro_rewrite_batched(
+    texts: List[str],
+    reasons: Optional[Sequence[Optional[str]]] = None,
+    deadline: Optional[Deadline] = None,
+    step: str = "step8",
+) -> List[str]:
+    settings = get_settings()
+    out: List[str] = list(texts)
+    for idxs in pack_batches(texts, settings.rewrite_batch_token_budget):
+        if deadline is not None and deadline.vetoes_cache(step):
+            break  # an earlier request already gave up on the LLM
+        batch = [texts[i] for i in idxs]
+        batch_reasons = [reasons[i] for i in idxs] if reasons else None
+        if len(batch) == 1:
+            results = _rewrite_each(batch, batch_reasons, deadline, step)
+        else:
+            timeout = _time_left(deadline, step)
+            if timeout == 0.0:
+                break
+            REWRITE_REQUESTS.inc(mode="batch")
+            text = _request(build_batch_prompt(batch, batch_reasons), timeout, deadline, step)
+            if text is None:
+                break
+            parsed = parse_batch_response(text, len(batch))
+            if parsed is None:
+                BATCH_PARSE_FAILURES.inc()
+                log_event(logger, "step8_rewrite.batch_parse_failed", size=len(batch))
+                parsed = _rewrite_each(batch, batch_reasons, deadline, step)
+            results = parsed
+        for i, r in zip(idxs, results):
+            out[i] = r
+    return out
+
+
+def micro_rewrite(
+    texts: List[str],
+    reasons: Optional[Sequence[Optional[str]]] = None,
+    *,
+    deadline: Optional[Deadline] = None,
+    step: str = "step8",
+) -> List[str]:
+    """Rewrite `texts`; `step` names the caller for deadline reserves and
+    degradation records (Step 10 regenerations pass "step10")."""
+    if get_settings().rewrite_batch_enabled and len(texts) > 1:
+        return micro_rewrite_batched(texts, reasons, deadline, step)
+    return _rewrite_each(texts, reasons, deadline, step)
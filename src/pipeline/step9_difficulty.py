@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, Union
 
-from services.keyword_service import keyword_density, flesch_kincaid_grade
+from services.keyword_service import keyword_density
+from utils.readability import readability_stats
 
+if TYPE_CHECKING:
+    from services.domain_vocab import DomainVocab
 
-def determine_difficulty(text: str, domain_vocab: Iterable[str]) -> str:
+
+STEP_VERSION = 1
+
+
+def determine_difficulty(text: str, domain_vocab: Union[Iterable[str], "DomainVocab"]) -> str:
     density = keyword_density(text, domain_vocab)
-    grade = flesch_kincaid_grade(text)
+    grade = readability_stats(text).fk_grade
     # Simple rule-of-thumb: more density + higher grade -> harder
     if density < 0.05 and grade <= 8.5:
         return "Beginner"
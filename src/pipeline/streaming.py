@@ -0,0 +1,290 @@
+"""Asyncio streaming runtime: pipeline stages joined by bounded queues.
+
+Each `Stage` is a group of `workers` tasks that read from an inbound queue
+and write to the next one. Coroutine functions are awaited on the loop
+(natively async I/O); plain functions are offloaded to the executor for
+their `kind` — "cpu" to `cpu_executor` (threads or processes), blocking "io"
+(the HTTP LLM client, the DB cursor feeding the source) to `io_executor`.
+
+Every queue holds at most `queue_size` items. When the slowest stage (usually
+the LLM) falls behind, upstream workers block on `put`, so memory stays flat
+instead of buffering the whole run. Results are re-ordered to source order.
+The source only admits an item while fewer than `window` items are in
+flight (admitted but not yet yielded), so one item stalled in a stage holds
+back admission instead of growing the re-order buffer without limit.
+
+`iter_stream` drives the loop on a background thread and hands results to a
+synchronous consumer through another bounded queue, so fetching (source),
+generation (stages) and persisting (consumer) all overlap.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config.settings import get_settings
+from db.models import RawSection
+from pipeline.orchestrator import LESSON_DAG, RunOptions, SectionResult, section_result
+from utils.logging_utils import log_event
+from utils.metrics import REGISTRY, gauge
+
+
+logger = logging.getLogger(__name__)
+
+STAGE_KINDS = ("cpu", "io")
+
+_DONE = object()
+
+QUEUE_DEPTH = gauge("stream_queue_depth", "Items waiting in each stage's inbound queue")
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: Callable[[Any], Any]  # item -> item; may be `async def`
+    workers: int = 1
+    kind: str = "cpu"
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    busy_s: float = 0.0
+    max_queue: int = 0  # peak depth of the inbound queue
+
+
+class StreamPipeline:
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        *,
+        queue_size: int = 16,
+        cpu_executor: Optional[Executor] = None,
+        io_executor: Optional[Executor] = None,
+        window: Optional[int] = None,
+    ) -> None:
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        for stage in stages:
+            if stage.kind not in STAGE_KINDS:
+                raise ValueError(f"{stage.name}: unknown kind {stage.kind}")
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self.cpu_executor = cpu_executor
+        self.io_executor = io_executor
+        # Default: enough to fill every queue and keep every worker busy
+        capacity = self.queue_size * (len(self.stages) + 1) + sum(max(1, s.workers) for s in self.stages)
+        self.window = max(1, window or capacity)
+        self.stats: Dict[str, StageStats] = {s.name: StageStats() for s in self.stages}
+
+    async def _call(self, stage: Stage, item: Any) -> Any:
+        if inspect.iscoroutinefunction(stage.fn):
+            return await stage.fn(item)
+        executor = self.cpu_executor if stage.kind == "cpu" else self.io_executor
+        return await asyncio.get_running_loop().run_in_executor(executor, stage.fn, item)
+
+    async def _feed(self, source: Any, out_q: asyncio.Queue, admitted: asyncio.Semaphore) -> None:
+        idx = 0
+        if hasattr(source, "__aiter__"):
+            it = source.__aiter__()
+            while True:
+                await admitted.acquire()
+                try:
+                    item = await it.__anext__()
+                except StopAsyncIteration:
+                    break
+                await out_q.put((idx, item))
+                idx += 1
+        else:
+            # A blocking source (DB cursor, file) is pulled on the I/O executor
+            loop = asyncio.get_running_loop()
+            it = iter(source)
+            while True:
+                await admitted.acquire()  # before pulling, so a lazy source isn't read ahead
+                item = await loop.run_in_executor(self.io_executor, next, it, _DONE)
+                if item is _DONE:
+                    break
+                await out_q.put((idx, item))
+                idx += 1
+        await out_q.put(_DONE)
+
+    async def _worker(self, stage: Stage, in_q: asyncio.Queue, out_q: asyncio.Queue) -> None:
+        stats = self.stats[stage.name]
+        while True:
+            entry = await in_q.get()
+            if entry is _DONE:
+                await in_q.put(_DONE)  # let sibling workers see it too
+                return
+            stats.max_queue = max(stats.max_queue, in_q.qsize() + 1)
+            QUEUE_DEPTH.set(in_q.qsize(), stage=stage.name)
+            idx, item = entry
+            t0 = time.perf_counter()
+            result = await self._call(stage, item)
+            stats.busy_s += time.perf_counter() - t0
+            stats.processed += 1
+            await out_q.put((idx, result))
+
+    async def _stage(self, stage: Stage, in_q: asyncio.Queue, out_q: asyncio.Queue) -> None:
+        await asyncio.gather(*(self._worker(stage, in_q, out_q) for _ in range(max(1, stage.workers))))
+        await out_q.put(_DONE)
+
+    async def run(self, source: Any) -> AsyncIterator[Any]:
+        """Yield stage outputs in source order."""
+        queues: List[asyncio.Queue] = [asyncio.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        admitted = asyncio.Semaphore(self.window)  # released as items leave in order
+        tasks = {asyncio.create_task(self._feed(source, queues[0], admitted))}
+        for i, stage in enumerate(self.stages):
+            tasks.add(asyncio.create_task(self._stage(stage, queues[i], queues[i + 1])))
+        watched = set(tasks)
+        buffer: Dict[int, Any] = {}
+        next_idx = 0
+        try:
+            while True:
+                get = asyncio.ensure_future(queues[-1].get())
+                done, _ = await asyncio.wait({get, *watched}, return_when=asyncio.FIRST_COMPLETED)
+                for task in done - {get}:
+                    watched.discard(task)
+                    task.result()  # re-raise a failed stage
+                if get not in done:
+                    get.cancel()
+                    continue
+                entry = get.result()
+                if entry is _DONE:
+                    return
+                idx, value = entry
+                buffer[idx] = value
+                while next_idx in buffer:
+                    admitted.release()
+                    yield buffer.pop(next_idx)
+                    next_idx += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _put(out: "queue.Queue[Tuple[str, Any]]", entry: Tuple[str, Any], stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            out.put(entry, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def iter_stream(pipeline: StreamPipeline, source: Any, *, maxsize: Optional[int] = None) -> Iterator[Any]:
+    """Run `pipeline` on a background event loop; yield its outputs here."""
+    out: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize or pipeline.queue_size)
+    stop = threading.Event()
+
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            async for item in pipeline.run(source):
+                # Hand off on a thread so a slow consumer never blocks the loop
+                if not await loop.run_in_executor(None, _put, out, ("item", item), stop):
+                    return
+        except BaseException as exc:  # surfaced to the consumer below
+            _put(out, ("error", exc), stop)
+            return
+        _put(out, ("end", None), stop)
+
+    thread = threading.Thread(target=asyncio.run, args=(main(),), name="stream-loop", daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = out.get()
+            if kind == "item":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    finally:
+        stop.set()
+        thread.join()
+
+
+# -----------------------------
+# Lesson pipeline wiring
+# -----------------------------
+
+# (stage, DAG steps, kind): LLM-bound rewriting/gating sits between two CPU stages
+LESSON_STAGES: Tuple[Tuple[str, Tuple[str, ...], str], ...] = (
+    ("prepare", ("step2", "step3", "step4", "step5", "step6", "step7"), "cpu"),
+    ("generate", ("step8", "step9", "step10"), "io"),
+    ("assemble", ("step11",), "cpu"),
+)
+
+
+def _run_steps(names: Tuple[str, ...], values: Dict[str, Any]) -> Dict[str, Any]:
+    if values.get("skip"):
+        return values
+    cache = values["options"].cache
+    for name in names:
+        values.update(LESSON_DAG.steps[name].execute(values, cache))
+    if multiprocessing.parent_process() is not None:
+        values["metrics"] = REGISTRY.drain()  # merged by the parent
+    return values
+
+
+def run_sections_streaming(
+    sections: Iterable[RawSection],
+    options: Optional[RunOptions] = None,
+    *,
+    skip: Collection[int] = (),
+    queue_size: Optional[int] = None,
+    cpu_workers: Optional[int] = None,
+    llm_workers: Optional[int] = None,
+    processes: bool = False,
+) -> Iterator[Tuple[RawSection, Optional[SectionResult]]]:
+    """Stream sections through prepare → generate → assemble.
+
+    Yields `(section, result)` in input order; sections whose id is in `skip`
+    pass through untouched with `result=None` (e.g. already journaled).
+    `processes=True` runs the CPU stages in a process pool.
+    """
+    settings = get_settings()
+    opts = options or RunOptions()
+    n_cpu = max(1, settings.stream_cpu_workers if cpu_workers is None else cpu_workers)
+    n_llm = max(1, settings.stream_llm_workers if llm_workers is None else llm_workers)
+    if processes:
+        from pipeline.parallel import _init_worker
+
+        cpu_executor: Executor = ProcessPoolExecutor(max_workers=n_cpu, initializer=_init_worker, initargs=(opts,))
+    else:
+        cpu_executor = ThreadPoolExecutor(max_workers=n_cpu, thread_name_prefix="stream-cpu")
+    io_executor = ThreadPoolExecutor(max_workers=n_llm + 1, thread_name_prefix="stream-io")  # +1: source
+
+    stages = [
+        Stage(name, partial(_run_steps, steps), workers=n_cpu if kind == "cpu" else n_llm, kind=kind)
+        for name, steps, kind in LESSON_STAGES
+    ]
+    pipeline = StreamPipeline(
+        stages,
+        queue_size=settings.stream_queue_size if queue_size is None else queue_size,
+        cpu_executor=cpu_executor,
+        io_executor=io_executor,
+    )
+    skipped = set(skip)
+    seeds = (dict(opts.seed(s), skip=s.section_id in skipped) for s in sections)
+    log_event(logger, "streaming.start", cpu_workers=n_cpu, llm_workers=n_llm, queue_size=pipeline.queue_size)
+    try:
+        for values in iter_stream(pipeline, seeds):
+            REGISTRY.merge(values.pop("metrics", {}))
+            yield values["section"], None if values["skip"] else section_result(values)
+    finally:
+        cpu_executor.shutdown(wait=True, cancel_futures=True)
+        io_executor.shutdown(wait=True, cancel_futures=True)
+        log_event(logger, "streaming.done", stages={k: asdict(v) for k, v in pipeline.stats.items()})
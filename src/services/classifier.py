@@ -26,7 +26,7 @@ INFO_TYPES: List[str] = [
 ]
 
 
-@dataclass
+@dataclass(slots=True)
 class Classification:
     label: str
     probability: float
@@ -100,7 +100,7 @@ def _softmax(scores: Dict[str, float]) -> Dict[str, float]:
     return {k: v / s for k, v in exp.items()}
 
 
-def classify_with_scores(text: str, section_keywords: Optional[List[str]] = None) -> Classification:
+def _distribution(text: str, section_keywords: Optional[List[str]]) -> Tuple[Dict[str, float], List[str]]:
     lowered = text.strip().lower()
     rule_scores, hits = _rule_scores(lowered)
     boosts = _feature_boosts(lowered)
@@ -110,37 +110,45 @@ def classify_with_scores(text: str, section_keywords: Optional[List[str]] = None
     kd = _keyword_density_boost(lowered, section_keywords)
     for k in rule_scores:
         rule_scores[k] *= (1.0 + kd)
+    return _softmax(rule_scores), hits
+
 
-    probs = _softmax(rule_scores)
+def _from_distribution(probs: Dict[str, float], hits: List[str]) -> Classification:
     label = max(probs.items(), key=lambda kv: kv[1])[0]
-    prob = probs[label]
-    return Classification(label=label, probability=prob, rule_hit=hits, source="rules")
+    return Classification(label=label, probability=probs[label], rule_hit=hits, source="rules")
 
 
-def classify_with_fallback(text: str, section_keywords: Optional[List[str]] = None) -> Classification:
+def _confident(probs: Dict[str, float]) -> bool:
     settings = get_settings()
-    base = classify_with_scores(text, section_keywords)
-    if not settings.classifier_use_llm_fallback:
-        return base
+    top = sorted(probs.values(), reverse=True)
+    second = top[1] if len(top) > 1 else 0.0
+    return top[0] >= settings.classifier_score_threshold and (top[0] - second) >= settings.classifier_margin_threshold
 
-    # Confidence check
-    threshold = settings.classifier_score_threshold
-    margin = settings.classifier_margin_threshold
-    # Compute second best for margin
-    # Recompute scores to get full distribution
-    lowered = text.strip().lower()
-    rule_scores, _ = _rule_scores(lowered)
-    boosts = _feature_boosts(lowered)
-    for k in rule_scores:
-        rule_scores[k] += boosts.get(k, 0.0)
-    kd = _keyword_density_boost(lowered, section_keywords)
-    for k in rule_scores:
-        rule_scores[k] *= (1.0 + kd)
-    probs = _softmax(rule_scores)
-    top = sorted(probs.items(), key=lambda kv: kv[1], reverse=True)
-    second = top[1][1] if len(top) > 1 else 0.0
 
-    if base.probability >= threshold and (base.probability - second) >= margin:
+def classify_with_scores(text: str, section_keywords: Optional[List[str]] = None) -> Classification:
+    return _from_distribution(*_distribution(text, section_keywords))
+
+
+def needs_llm_fallback(text: str, section_keywords: Optional[List[str]] = None) -> bool:
+    """True when the rules are below the score/margin thresholds, i.e. when
+    `classify_with_fallback` would ask the LLM (if enabled)."""
+    return not _confident(_distribution(text, section_keywords)[0])
+
+
+def classify_with_fallback(
+    text: str,
+    section_keywords: Optional[List[str]] = None,
+    use_llm: Optional[bool] = None,
+    llm_timeout: Optional[float] = None,
+) -> Classification:
+    settings = get_settings()
+    probs, hits = _distribution(text, section_keywords)
+    base = _from_distribution(probs, hits)
+    if not (settings.classifier_use_llm_fallback if use_llm is None else use_llm):
+        return base
+
+    # Confidence check (top score and margin over the runner-up)
+    if _confident(probs):
         return base
 
     # LLM fallback
@@ -151,7 +159,7 @@ def classify_with_fallback(text: str, section_keywords: Optional[List[str]] = No
         f"Sentence: {text}"
     )
     try:
-        resp = rewrite_style(prompt, temperature=0.1)  # reuse HTTP transport
+        resp = rewrite_style(prompt, temperature=0.1, timeout=llm_timeout)  # reuse HTTP transport
         import json
         data = json.loads(resp.text) if isinstance(resp.text, str) else resp.text
         lbl = data.get("label")
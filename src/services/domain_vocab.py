@@ -0,0 +1,172 @@
+"""Corpus-level domain vocabulary for Step 9 keyword density.
+
+`DomainVocabIndex` holds every `page_key_words` and `section_key_words` term
+of the corpus, grouped by page, so re-indexing a page replaces its terms.
+Updates are incremental: `vocab` reads only pages above the index watermark
+from the DB (or any pages from an `example.json`-shaped file). The index is
+one JSON file (`DOMAIN_VOCAB_PATH`, default `<output_dir>/domain_vocab.json`):
+
+    {"version": 1, "revision": 3, "watermark": 812, "pages": {"<page id>": [terms]}}
+
+`version` is the term normalization/format version; an index written with
+another version is ignored until rebuilt. `revision` counts saved updates.
+
+`get_domain_vocab()` loads the index once per process into a `DomainVocab`
+matcher: single-token terms form a frozenset and multi-word terms ("funding
+rate") a longest-first phrase table keyed on their first token, so density
+is one pass over the text's tokens with no per-call setup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from config.settings import get_settings
+from db.db_utils import page_sections
+from services.keyword_service import tokenize
+from utils.logging_utils import log_event
+
+
+logger = logging.getLogger(__name__)
+
+VOCAB_VERSION = 1
+
+
+def normalize_term(term: str) -> Tuple[str, ...]:
+    """A keyword as the token sequence it matches (same tokenizer as the text)."""
+    return tuple(tokenize(term))
+
+
+class DomainVocab:
+    """Immutable matcher over a set of domain terms."""
+
+    __slots__ = ("singles", "phrases", "size", "digest")
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        seen = {normalize_term(t) for t in terms if isinstance(t, str)}
+        seen.discard(())
+        phrases: Dict[str, List[Tuple[str, ...]]] = {}
+        for tokens in seen:
+            if len(tokens) > 1:
+                phrases.setdefault(tokens[0], []).append(tokens)
+        for candidates in phrases.values():
+            candidates.sort(key=len, reverse=True)
+        self.singles: FrozenSet[str] = frozenset(t[0] for t in seen if len(t) == 1)
+        self.phrases: Dict[str, List[Tuple[str, ...]]] = phrases
+        self.size = len(seen)
+        joined = "\n".join(sorted(" ".join(t) for t in seen))
+        self.digest = hashlib.blake2b(joined.encode("utf-8"), digest_size=8).hexdigest()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def hits(self, tokens: Sequence[str]) -> int:
+        """Tokens covered by a term; a phrase match covers all its tokens."""
+        singles, phrases = self.singles, self.phrases
+        n = len(tokens)
+        i = hits = 0
+        while i < n:
+            for phrase in phrases.get(tokens[i], ()):
+                end = i + len(phrase)
+                if end <= n and tuple(tokens[i:end]) == phrase:
+                    hits += len(phrase)
+                    i = end
+                    break
+            else:
+                hits += tokens[i] in singles
+                i += 1
+        return hits
+
+    def density(self, text: str) -> float:
+        tokens = tokenize(text)
+        return self.hits(tokens) / len(tokens) if tokens else 0.0
+
+    def fingerprint(self) -> Dict[str, Any]:
+        """Cache key part: format version and term digest."""
+        return {"version": VOCAB_VERSION, "digest": self.digest}
+
+
+def page_terms(row: Sequence[Any]) -> List[str]:
+    """Page and section keywords of one page row (`db_utils._PAGE_COLUMNS` order)."""
+    terms = {t for t in row[3] or [] if isinstance(t, str)}
+    for section in page_sections(row):
+        terms.update(t for t in section.keywords or [] if isinstance(t, str))
+    return sorted(terms)
+
+
+class DomainVocabIndex:
+    """Per-page term lists plus the watermark of the last indexed DB page."""
+
+    def __init__(self, pages: Optional[Dict[int, List[str]]] = None, revision: int = 0, watermark: int = 0) -> None:
+        self.pages: Dict[int, List[str]] = dict(pages or {})
+        self.revision = revision
+        self.watermark = watermark
+
+    @classmethod
+    def load(cls, path: Path) -> "DomainVocabIndex":
+        """The index at `path`; empty when missing or written by another version."""
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cls()
+        if data.get("version") != VOCAB_VERSION:
+            log_event(logger, "domain_vocab.stale", level=logging.WARNING, path=str(path), version=data.get("version"), expected=VOCAB_VERSION)
+            return cls()
+        pages = {int(k): list(v) for k, v in (data.get("pages") or {}).items()}
+        return cls(pages, revision=int(data.get("revision", 0)), watermark=int(data.get("watermark", 0)))
+
+    def update(self, rows: Iterable[Sequence[Any]]) -> int:
+        """(Re-)index page rows; returns how many pages changed."""
+        changed = 0
+        for row in rows:
+            if row[0] is None:
+                continue
+            page_id = int(row[0])
+            terms = page_terms(row)
+            if self.pages.get(page_id) != terms:
+                self.pages[page_id] = terms
+                changed += 1
+        return changed
+
+    def terms(self) -> List[str]:
+        return sorted({t for terms in self.pages.values() for t in terms})
+
+    def vocab(self) -> DomainVocab:
+        return DomainVocab(self.terms())
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.revision += 1
+        data = {
+            "version": VOCAB_VERSION,
+            "revision": self.revision,
+            "watermark": self.watermark,
+            "pages": {str(k): v for k, v in sorted(self.pages.items())},
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        _load_vocab.cache_clear()  # this process sees the update on its next lookup
+        return path
+
+
+def default_path() -> Path:
+    settings = get_settings()
+    return Path(settings.domain_vocab_path or Path(settings.output_dir) / "domain_vocab.json")
+
+
+@lru_cache(maxsize=4)
+def _load_vocab(path: Path) -> DomainVocab:
+    return DomainVocabIndex.load(path).vocab()
+
+
+def get_domain_vocab(path: Optional[Path] = None) -> DomainVocab:
+    """Process-wide matcher for the persisted index (loaded on first use)."""
+    return _load_vocab(Path(path or default_path()).resolve())
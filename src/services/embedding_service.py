@@ -0,0 +1,168 @@
+"""Embedding service: pluggable sentence encoders + persistent vector reuse.
+
+Backends (selected by `Settings.embedding_backend`):
+ - "hashing": deterministic signed feature hashing, no model download. Used
+   for tests and air-gapped runs.
+ - "sentence_transformers": `Settings.embedding_model_name`, imported lazily
+   on first encode so module import stays cheap.
+
+`embed_texts` looks sentences up in the on-disk `VectorStore` first and only
+encodes the misses, in batches of `Settings.embedding_batch_size`.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, Sequence
+
+from config.settings import get_settings
+from services.vector_store import VectorStore
+
+
+Vector = Sequence[float]
+
+
+class Encoder(Protocol):
+    name: str
+    dim: int
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+
+class HashingEncoder:
+    """Signed hashing trick over unigrams and bigrams, L2-normalized."""
+
+    _TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = int(dim)
+        self.name = f"hashing-{self.dim}"
+
+    def _encode_one(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        toks = self._TOKEN_RE.findall(text.lower())
+        grams = toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+        for g in grams:
+            h = zlib.crc32(g.encode("utf-8"))
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            vec[h % self.dim] += sign
+        norm = math.sqrt(sum(v * v for v in vec))
+        return [v / norm for v in vec] if norm else vec
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        return [self._encode_one(t) for t in texts]
+
+
+class SentenceTransformerEncoder:
+    """Wrapper around `sentence_transformers` (optional dependency)."""
+
+    def __init__(self, model_name: str) -> None:
+        self.name = model_name
+        self._model = None
+        self._dim: Optional[int] = None
+
+    def _load(self):
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer  # type: ignore
+            except ImportError as exc:  # pragma: no cover - optional dependency
+                raise RuntimeError(
+                    "EMBEDDING_BACKEND=sentence_transformers requires `pip install sentence-transformers`"
+                ) from exc
+            self._model = SentenceTransformer(self.name)
+            self._dim = int(self._model.get_sentence_embedding_dimension())
+        return self._model
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            self._load()
+        assert self._dim is not None
+        return self._dim
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        model = self._load()
+        out = model.encode(texts, batch_size=len(texts) or 1, normalize_embeddings=True)
+        return [list(map(float, row)) for row in out]
+
+
+@lru_cache(maxsize=1)
+def get_encoder() -> Encoder:
+    """Return the process-wide encoder configured in settings."""
+    settings = get_settings()
+    backend = settings.embedding_backend.lower()
+    if backend == "hashing":
+        return HashingEncoder(settings.embedding_dim)
+    if backend in {"sentence_transformers", "sentence-transformers"}:
+        return SentenceTransformerEncoder(settings.embedding_model_name)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {settings.embedding_backend}")
+
+
+def store_for(encoder: Encoder, root: Optional[Path] = None) -> VectorStore:
+    """Open the vector store namespaced by encoder name and dimension."""
+    settings = get_settings()
+    base = Path(root or settings.embedding_store_dir or Path(settings.output_dir) / "embeddings")
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", encoder.name)
+    return VectorStore(base / f"{safe}-{encoder.dim}", encoder.dim, encoder=encoder.name)
+
+
+@lru_cache(maxsize=1)
+def get_store() -> VectorStore:
+    return store_for(get_encoder())
+
+
+def embed_texts(
+    texts: Sequence[str],
+    *,
+    encoder: Optional[Encoder] = None,
+    store: Optional[VectorStore] = None,
+    persist: bool = True,
+) -> List[Vector]:
+    """Embed texts, reusing stored vectors and batch-encoding only misses."""
+    settings = get_settings()
+    enc = encoder or get_encoder()
+    vs = store if store is not None else (get_store() if persist else None)
+
+    out: List[Optional[Vector]] = [vs.get(t) if vs is not None else None for t in texts]
+    missing: Dict[str, List[int]] = {}
+    for i, (t, v) in enumerate(zip(texts, out)):
+        if v is None:
+            missing.setdefault(t, []).append(i)
+
+    todo = list(missing)
+    batch = max(1, settings.embedding_batch_size)
+    for start in range(0, len(todo), batch):
+        chunk = todo[start:start + batch]
+        vectors = enc.encode(chunk)
+        if vs is not None:
+            vs.append(chunk, vectors)
+        for t, v in zip(chunk, vectors):
+            for i in missing[t]:
+                out[i] = v
+    return [v for v in out if v is not None]
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    """Cosine similarity of two normalized dense vectors."""
+    return sum(x * y for x, y in zip(a, b))
+
+
+def dedupe_near(sentences: List[str], threshold: Optional[float] = None) -> List[str]:
+    """Drop sentences whose embedding is within `threshold` cosine of an earlier one."""
+    if not sentences:
+        return []
+    limit = get_settings().near_duplicate_cosine if threshold is None else threshold
+    vectors = embed_texts(sentences)
+    kept: List[str] = []
+    kept_vecs: List[Vector] = []
+    for s, v in zip(sentences, vectors):
+        if any(cosine(v, k) >= limit for k in kept_vecs):
+            continue
+        kept.append(s)
+        kept_vecs.append(v)
+    return kept
@@ -8,9 +8,13 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Iterable, Set
+from functools import lru_cache
+from typing import TYPE_CHECKING, FrozenSet, Iterable, Tuple, Union
 
-from textstat import textstat
+from utils.readability import readability_stats
+
+if TYPE_CHECKING:
+    from services.domain_vocab import DomainVocab
 
 
 WORD_RE = re.compile(r"[A-Za-z0-9_']+")
@@ -20,16 +24,28 @@ def tokenize(text: str) -> list[str]:
     return WORD_RE.findall(text.lower())
 
 
-def keyword_density(text: str, domain_vocab: Iterable[str]) -> float:
+@lru_cache(maxsize=1024)
+def _lowered(terms: Tuple[str, ...]) -> FrozenSet[str]:
+    return frozenset(w.lower() for w in terms)
+
+
+def keyword_density(text: str, domain_vocab: Union[Iterable[str], "DomainVocab"]) -> float:
+    """Share of tokens that are domain terms.
+
+    A prebuilt `DomainVocab` (`services.domain_vocab`) also matches multi-word
+    terms; plain term lists match single tokens against the lowercased terms.
+    """
+    if hasattr(domain_vocab, "density"):
+        return domain_vocab.density(text)
     tokens = tokenize(text)
     if not tokens:
         return 0.0
-    vocab: Set[str] = {w.lower() for w in domain_vocab}
+    vocab = _lowered(tuple(domain_vocab))
     hits = sum(1 for t in tokens if t in vocab)
     return hits / max(len(tokens), 1)
 
 
 def flesch_kincaid_grade(text: str) -> float:
-    return float(textstat.flesch_kincaid_grade(text))
+    return readability_stats(text).fk_grade
 
 
@@ -7,17 +7,23 @@ Targets a local endpoint compatible with simple JSON POST using fields:
 
 This is a placeholder; actual schema can be adapted to your local runner
 (e.g., Ollama or custom gateway).
+
+Requests go through a per-thread `requests.Session`, so the HTTP connection
+to the runner is kept alive across calls (`warm_up` opens it eagerly).
 """
 
 from __future__ import annotations
 
 import json
+import threading
 from dataclasses import dataclass
-from typing import Optional
-
-import requests
+from typing import TYPE_CHECKING, Optional
 
 from config.settings import get_settings
+from utils.metrics import counter, histogram
+
+if TYPE_CHECKING:  # requests is imported on first call (slow to import)
+    import requests
 
 
 @dataclass
@@ -26,16 +32,55 @@ class LlmResponse:
     raw: dict
 
 
-def rewrite_style(prompt: str, temperature: Optional[float] = None) -> LlmResponse:
-    """Send a prompt to the local LLM for micro-rewrite."""
+_local = threading.local()
+
+REQUEST_TIMEOUT_S = 60.0
+
+LLM_SECONDS = histogram("llm_request_seconds", "LLM HTTP round-trip time")
+LLM_REQUESTS = counter("llm_requests_total", "LLM HTTP requests by outcome")
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+
+        session = _local.session = requests.Session()
+    return session
+
+
+def warm_up() -> bool:
+    """Open the keep-alive connection to the LLM endpoint; False if unreachable."""
+    import requests
+
+    try:
+        _session().head(get_settings().local_llm_endpoint, timeout=5)
+        return True
+    except requests.RequestException:
+        return False
+
+
+def rewrite_style(prompt: str, temperature: Optional[float] = None, timeout: Optional[float] = None) -> LlmResponse:
+    """Send a prompt to the local LLM for micro-rewrite.
+
+    `timeout` (seconds) can only shorten the default request timeout.
+    """
+    import requests
+
     settings = get_settings()
     payload = {
         "model": settings.local_llm_model,
         "prompt": prompt,
         "temperature": float(temperature if temperature is not None else settings.llm_temperature),
     }
-    resp = requests.post(settings.local_llm_endpoint, json=payload, timeout=60)
-    resp.raise_for_status()
+    try:
+        with LLM_SECONDS.time():
+            resp = _session().post(settings.local_llm_endpoint, json=payload, timeout=REQUEST_TIMEOUT_S if timeout is None else min(timeout, REQUEST_TIMEOUT_S))
+            resp.raise_for_status()
+    except requests.RequestException:
+        LLM_REQUESTS.inc(outcome="error")
+        raise
+    LLM_REQUESTS.inc(outcome="ok")
     data = resp.json()
     # Heuristic extraction depending on provider: use 'response' or 'text'
     text = data.get("response") or data.get("text") or json.dumps(data)
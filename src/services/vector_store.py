@@ -0,0 +1,140 @@
+"""Append-only, memory-mapped float32 vector store.
+
+Layout under one directory (one directory per encoder/dim, see
+`embedding_service.store_for`):
+ - `meta.json`   — {"dim": int, "encoder": str}
+ - `vectors.f32` — rows of `dim` little-endian float32 values, append-only
+ - `index.bin`   — one 16-byte key per row (blake2b of the sentence), same order
+
+Rows are written before their keys, so a crash mid-append leaves at most an
+orphan row that is ignored on the next open. Reads go through an `mmap` view
+and only copy the requested rows.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+KEY_BYTES = 16
+
+
+def text_key(text: str) -> bytes:
+    """Stable key for a sentence (independent of process hash seed)."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class VectorStore:
+    """Append-only float32 rows indexed by sentence hash."""
+
+    def __init__(self, root: Path, dim: int, encoder: str = "") -> None:
+        self.root = Path(root)
+        self.dim = int(dim)
+        self.encoder = encoder
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._data_path = self.root / "vectors.f32"
+        self._index_path = self.root / "index.bin"
+        self._check_meta()
+        self._rows: Dict[bytes, int] = {}
+        self._mm: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._load_index()
+
+    # -----------------------------
+    # Setup
+    # -----------------------------
+    def _check_meta(self) -> None:
+        meta_path = self.root / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if int(meta.get("dim", -1)) != self.dim:
+                raise ValueError(f"vector store {self.root} has dim={meta.get('dim')}, expected {self.dim}")
+        else:
+            meta_path.write_text(json.dumps({"dim": self.dim, "encoder": self.encoder}), encoding="utf-8")
+
+    def _load_index(self) -> None:
+        raw = self._index_path.read_bytes() if self._index_path.exists() else b""
+        row_bytes = 4 * self.dim
+        data_size = self._data_path.stat().st_size if self._data_path.exists() else 0
+        n = min(len(raw) // KEY_BYTES, data_size // row_bytes)
+        for i in range(n):
+            self._rows.setdefault(raw[i * KEY_BYTES:(i + 1) * KEY_BYTES], i)
+        self._count = n
+        if data_size != n * row_bytes or len(raw) != n * KEY_BYTES:
+            # Drop partial writes from an interrupted append
+            with self._data_path.open("ab") as f:
+                f.truncate(n * row_bytes)
+            with self._index_path.open("ab") as f:
+                f.truncate(n * KEY_BYTES)
+
+    def _remap(self) -> None:
+        self.close()
+        if self._count == 0:
+            return
+        with self._data_path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm).cast("f")
+
+    # -----------------------------
+    # API
+    # -----------------------------
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, text: str) -> bool:
+        return text_key(text) in self._rows
+
+    def get(self, text: str) -> Optional[Sequence[float]]:
+        row = self._rows.get(text_key(text))
+        if row is None:
+            return None
+        if self._view is None:
+            self._remap()
+        assert self._view is not None
+        # Copy the row out so callers never pin the mapping open
+        return self._view[row * self.dim:(row + 1) * self.dim].tolist()
+
+    def get_many(self, texts: Iterable[str]) -> List[Optional[Sequence[float]]]:
+        return [self.get(t) for t in texts]
+
+    def append(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> int:
+        """Append vectors for texts not already stored; returns rows written."""
+        data = array("f")
+        keys: List[bytes] = []
+        pending: set[bytes] = set()
+        for text, vec in zip(texts, vectors):
+            key = text_key(text)
+            if key in self._rows or key in pending:
+                continue
+            if len(vec) != self.dim:
+                raise ValueError(f"expected vector of dim {self.dim}, got {len(vec)}")
+            data.extend(vec)
+            keys.append(key)
+            pending.add(key)
+        if not keys:
+            return 0
+        if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+            data.byteswap()
+        with self._data_path.open("ab") as f:
+            f.write(data.tobytes())
+        with self._index_path.open("ab") as f:
+            f.write(b"".join(keys))
+        for key in keys:
+            self._rows[key] = self._count
+            self._count += 1
+        self.close()  # remap lazily on next read
+        return len(keys)
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
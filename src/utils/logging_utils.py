@@ -2,14 +2,41 @@
 
 Centralized configuration so all modules log consistent machine-parseable
 events. Keep very lightweight to avoid import overhead.
+
+`configure_json_logging` can put a bounded queue in front of stdout: the
+calling thread only enqueues the record, and a background listener does the
+`json.dumps` and the write. A full queue drops DEBUG/INFO records instead of
+blocking the pipeline; WARNING and above wait briefly for room and are then
+written synchronously, so errors are never lost. `log_event` is cheap to
+leave in hot loops:
+ - records below the logger's level return before anything is built
+ - per-event sampling (`step3.sentence=0.01` keeps 1 in 100) and rate limits
+   (`orchestrator.section_done=50` per second) drop events before a record
+   is created; drops are counted in `log_events_dropped_total`
+ - `lazy=` takes a zero-argument callable whose dict is only built when the
+   record is formatted (on the listener thread when async). It must capture
+   values, not objects that are mutated afterwards.
 """
 
 from __future__ import annotations
 
+import atexit
+import copy
+import fnmatch
 import json
 import logging
+import logging.handlers
+import math
+import queue
 import sys
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from utils.metrics import counter
+
+
+DROPPED = counter("log_events_dropped_total", "Log events dropped by sampling, rate limits or a full queue")
 
 
 class JsonFormatter(logging.Formatter):
@@ -21,13 +48,162 @@ class JsonFormatter(logging.Formatter):
         }
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
+        lazy = getattr(record, "lazy_data", None)
+        if lazy is not None:
+            try:
+                payload.update(lazy())
+            except Exception as exc:  # a broken payload must not lose the event
+                payload["payload_error"] = repr(exc)
         if hasattr(record, "extra_data") and isinstance(record.extra_data, dict):
             payload.update(record.extra_data)
-        return json.dumps(payload, ensure_ascii=False)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def parse_event_rates(spec: str) -> Dict[str, float]:
+    """`"step3.sentence=0.01, step4.*=0.1"` → {pattern: value}."""
+    rates: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"expected <event>=<value>, got {part.strip()!r}")
+        rates[name.strip()] = float(value)
+    return rates
+
+
+class EventSampler:
+    """Per-event-name sampling and rate limiting.
+
+    Patterns are exact event names or fnmatch globs (`step4.*`); an exact name
+    wins over a glob. Sampling is deterministic: rate 0.01 keeps the 1st,
+    101st, 201st ... event of that name. Rate limits are token buckets
+    (`limit` events per second, bursts up to `limit`).
+    """
+
+    def __init__(self, sampling: Optional[Mapping[str, float]] = None, rate_limits: Optional[Mapping[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.sampling = dict(sampling or {})
+        self.rate_limits = dict(rate_limits or {})
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._rules: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        self._seen: Dict[str, int] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # name -> (tokens, last refill)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.sampling or self.rate_limits)
+
+    @staticmethod
+    def _match(table: Mapping[str, float], name: str) -> Optional[float]:
+        if name in table:
+            return table[name]
+        for pattern, value in table.items():
+            if fnmatch.fnmatchcase(name, pattern):
+                return value
+        return None
+
+    def _rule(self, name: str) -> Tuple[Optional[float], Optional[float]]:
+        rule = self._rules.get(name)
+        if rule is None:
+            rule = self._rules[name] = (self._match(self.sampling, name), self._match(self.rate_limits, name))
+        return rule
+
+    def allow(self, name: str) -> bool:
+        rate, limit = self._rule(name)
+        if rate is None and limit is None:
+            return True
+        with self._lock:
+            if rate is not None:
+                n = self._seen.get(name, 0)
+                self._seen[name] = n + 1
+                if math.floor(n * rate) == math.floor((n - 1) * rate):
+                    DROPPED.inc(event=name, reason="sampled")
+                    return False
+            if limit is not None:
+                now = self.clock()
+                tokens, last = self._buckets.get(name, (limit, now))
+                tokens = min(limit, tokens + (now - last) * limit)
+                if tokens < 1.0:
+                    self._buckets[name] = (tokens, now)
+                    DROPPED.inc(event=name, reason="rate_limited")
+                    return False
+                self._buckets[name] = (tokens - 1.0, now)
+        return True
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue without formatting; drop (and count) low-level records when the queue is full.
 
+    WARNING and above block up to `block_s` for room, then go straight to
+    `fallback` (the listener's handler) on the calling thread.
+    """
 
-def configure_json_logging(level: str | int = "INFO") -> None:
-    """Configure root logger to emit JSON to stdout."""
+    def __init__(self, queue: Any, fallback: Optional[logging.Handler] = None, block_s: float = 0.05) -> None:
+        super().__init__(queue)
+        self.fallback = fallback
+        self.block_s = block_s
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only freeze the message
+        # (args may be mutated once we return)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.put(record, timeout=self.block_s)
+                return
+            except queue.Full:
+                if self.fallback is not None:
+                    self.fallback.handle(record)
+                    return
+        # `log_event` messages are event names; free-form messages would explode label cardinality
+        DROPPED.inc(event=record.msg if hasattr(record, "extra_data") else "other", reason="queue_full")
+
+
+_SAMPLER = EventSampler()
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+
+def flush_logging() -> None:
+    """Stop the background writer (draining its queue); safe to call twice."""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+
+
+atexit.register(flush_logging)
+
+
+def configure_json_logging(
+    level: str | int | None = None,
+    *,
+    async_: Optional[bool] = None,
+    queue_size: Optional[int] = None,
+    sampling: Optional[Mapping[str, float]] = None,
+    rate_limits: Optional[Mapping[str, float]] = None,
+) -> None:
+    """Configure root logger to emit JSON to stdout.
+
+    Unset arguments come from settings (`LOG_LEVEL`, `LOG_ASYNC`,
+    `LOG_QUEUE_SIZE`, `LOG_SAMPLING`, `LOG_RATE_LIMITS`).
+    """
+    global _SAMPLER, _LISTENER
+    from config.settings import get_settings
+
+    settings = get_settings()
+    level = settings.log_level if level is None else level
     if isinstance(level, str):
         level_value = getattr(logging, level.upper(), logging.INFO)
     else:
@@ -36,15 +212,36 @@ def configure_json_logging(level: str | int = "INFO") -> None:
     root = logging.getLogger()
     root.setLevel(level_value)
     # Clear existing handlers to avoid duplicates in notebooks/REPL
+    flush_logging()
     root.handlers.clear()
 
+    _SAMPLER = EventSampler(
+        parse_event_rates(settings.log_sampling) if sampling is None else sampling,
+        parse_event_rates(settings.log_rate_limits) if rate_limits is None else rate_limits,
+    )
+
     handler = logging.StreamHandler(stream=sys.stdout)
     handler.setFormatter(JsonFormatter())
-    root.addHandler(handler)
-
-
-def log_event(logger: logging.Logger, message: str, **extra: Any) -> None:
-    """Log a structured event at INFO level."""
-    logger.info(message, extra={"extra_data": extra})
+    if not (settings.log_async if async_ is None else async_):
+        root.addHandler(handler)
+        return
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(max(1, settings.log_queue_size if queue_size is None else queue_size))
+    root.addHandler(AsyncQueueHandler(records, fallback=handler))
+    _LISTENER = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    _LISTENER.start()
 
 
+def log_event(
+    logger: logging.Logger,
+    message: str,
+    *,
+    level: int = logging.INFO,
+    lazy: Optional[Callable[[], Mapping[str, Any]]] = None,
+    **extra: Any,
+) -> None:
+    """Log a structured event (INFO by default); `lazy` builds extra fields on format."""
+    if not logger.isEnabledFor(level):
+        return
+    if _SAMPLER.active and not _SAMPLER.allow(message):
+        return
+    logger.log(level, message, extra={"extra_data": extra, "lazy_data": lazy})
@@ -0,0 +1,316 @@
+"""Lightweight in-process metrics: counters, gauges and latency histograms.
+
+Metrics are created on first use from the module-level `REGISTRY`:
+
+    STEP_SECONDS = histogram("pipeline_step_seconds", "Wall time per step")
+    with STEP_SECONDS.time(step="step5"):
+        ...
+
+    @timed("llm_request_seconds", "LLM round-trip time")
+    def call(...): ...
+
+Series are keyed by label values. At the end of a run the registry is
+written as Prometheus text exposition (`metrics.prom`, for the node exporter
+textfile collector) and a JSON summary with bucket-interpolated quantiles
+(`metrics.json`). Worker processes ship `drain()` snapshots back to the
+parent, which `merge`s them.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Seconds; spans regex-level work up to slow LLM calls
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_str(key: LabelKey) -> str:
+    return ",".join(f"{k}={v}" for k, v in key)
+
+
+def _prom_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self.series: Dict[LabelKey, Any] = {}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            self.series[key] = self.series.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self.series[_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            self.series[key] = self.series.get(key, 0.0) + amount
+
+
+class _Timer:
+    """Context manager and decorator observing elapsed seconds."""
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, Any]) -> None:
+        self.histogram = histogram
+        self.labels = labels
+        self._t0 = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self._t0, **self.labels)
+
+    def __call__(self, fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.histogram.observe(time.perf_counter() - t0, **self.labels)
+
+        return wrapper  # type: ignore[return-value]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _key(labels)
+        idx = bisect.bisect_left(self.buckets, value)  # len(buckets) = +Inf
+        with self._lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0, "max": 0.0}
+            s["counts"][idx] += 1
+            s["sum"] += value
+            s["count"] += 1
+            s["max"] = max(s["max"], value)
+
+    def time(self, **labels: Any) -> _Timer:
+        return _Timer(self, labels)
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        s = self.series.get(_key(labels))
+        return _quantile(self.buckets, s, q) if s else None
+
+
+def _quantile(buckets: Sequence[float], s: Dict[str, Any], q: float) -> float:
+    """Linear interpolation inside the bucket holding the q-th observation."""
+    rank = q * s["count"]
+    seen = 0
+    for i, c in enumerate(s["counts"]):
+        if c and seen + c >= rank:
+            lo = buckets[i - 1] if i > 0 else 0.0
+            hi = min(buckets[i], s["max"]) if i < len(buckets) else s["max"]
+            lo = min(lo, hi)
+            return lo + (hi - lo) * max(0.0, rank - seen) / c
+        seen += c
+    return s["max"]
+
+
+_KINDS = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, _Metric] = {}
+
+    def _get(self, kind: str, name: str, help: str, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = _KINDS[kind](name, help, **kwargs)
+            elif metric.kind != kind:
+                raise ValueError(f"metric {name} is a {metric.kind}, not a {kind}")
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get("counter", name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get("gauge", name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get("histogram", name, help, buckets=buckets)
+
+    # -----------------------------
+    # Cross-process transfer
+    # -----------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        with self._lock:
+            metrics = list(self.metrics.values())
+        for m in metrics:
+            with m._lock:
+                series = [[list(map(list, k)), json.loads(json.dumps(v))] for k, v in m.series.items()]
+            out[m.name] = {"kind": m.kind, "help": m.help, "buckets": list(getattr(m, "buckets", ())), "series": series}
+        return out
+
+    def drain(self) -> Dict[str, Any]:
+        """Snapshot and clear series (worker → parent hand-off)."""
+        snap = self.snapshot()
+        self.reset()
+        return snap
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        for name, data in snapshot.items():
+            kwargs = {"buckets": data["buckets"]} if data["kind"] == "histogram" else {}
+            m = self._get(data["kind"], name, data["help"], **kwargs)
+            for raw_key, value in data["series"]:
+                key = tuple((k, v) for k, v in raw_key)
+                with m._lock:
+                    cur = m.series.get(key)
+                    if data["kind"] == "counter":
+                        m.series[key] = (cur or 0.0) + value
+                    elif data["kind"] == "gauge":
+                        m.series[key] = value
+                    elif cur is None:
+                        m.series[key] = value
+                    else:
+                        cur["counts"] = [a + b for a, b in zip(cur["counts"], value["counts"])]
+                        cur["sum"] += value["sum"]
+                        cur["count"] += value["count"]
+                        cur["max"] = max(cur["max"], value["max"])
+
+    def reset(self) -> None:
+        with self._lock:
+            metrics = list(self.metrics.values())
+        for m in metrics:
+            with m._lock:
+                m.series.clear()
+
+    # -----------------------------
+    # Export
+    # -----------------------------
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        for m in sorted(self.metrics.values(), key=lambda m: m.name):
+            with m._lock:
+                series = sorted(m.series.items())
+            if not series:
+                continue
+            if m.help:
+                lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for key, value in series:
+                if isinstance(m, Histogram):
+                    cumulative = 0
+                    for bound, c in zip(list(m.buckets) + [math.inf], value["counts"]):
+                        cumulative += c
+                        le = "+Inf" if bound == math.inf else repr(bound)
+                        lines.append(f"{m.name}_bucket{_prom_labels(key, [('le', le)])} {cumulative}")
+                    lines.append(f"{m.name}_sum{_prom_labels(key)} {value['sum']!r}")
+                    lines.append(f"{m.name}_count{_prom_labels(key)} {value['count']}")
+                else:
+                    lines.append(f"{m.name}{_prom_labels(key)} {value!r}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Dict[str, Any]] = {"counters": {}, "gauges": {}, "histograms": {}}
+        for m in sorted(self.metrics.values(), key=lambda m: m.name):
+            with m._lock:
+                series = sorted(m.series.items())
+            if not series:
+                continue
+            if isinstance(m, Histogram):
+                out["histograms"][m.name] = {
+                    _label_str(k): {
+                        "count": s["count"],
+                        "sum": round(s["sum"], 6),
+                        "mean": round(s["sum"] / s["count"], 6),
+                        "p50": round(_quantile(m.buckets, s, 0.50), 6),
+                        "p95": round(_quantile(m.buckets, s, 0.95), 6),
+                        "p99": round(_quantile(m.buckets, s, 0.99), 6),
+                        "max": round(s["max"], 6),
+                    }
+                    for k, s in series
+                }
+            else:
+                out[m.kind + "s"][m.name] = {_label_str(k): v for k, v in series}
+        return out
+
+    def write(self, directory: Path) -> Tuple[Path, Path]:
+        """Write `metrics.prom` and `metrics.json` (atomic replace)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        prom, summary = directory / "metrics.prom", directory / "metrics.json"
+        for path, text in ((prom, self.to_prometheus()), (summary, json.dumps(self.summary(), indent=2, sort_keys=True))):
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            tmp.replace(path)
+        return prom, summary
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return REGISTRY.counter(name, help)
+
+
+def gauge(name: str, help: str = "") -> Gauge:
+    return REGISTRY.gauge(name, help)
+
+
+def histogram(name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, help, buckets)
+
+
+def timed(name: str, help: str = "", **labels: Any) -> _Timer:
+    """`with timed(...)` or `@timed(...)`: observe seconds into histogram `name`."""
+    return histogram(name, help).time(**labels)
+
+
+def export_metrics(directory: Optional[Path] = None) -> Optional[Tuple[Path, Path]]:
+    """Write the registry to `directory` (default: settings) if enabled."""
+    from config.settings import get_settings
+
+    settings = get_settings()
+    if not settings.metrics_enabled:
+        return None
+    return REGISTRY.write(Path(directory or settings.metrics_dir or settings.output_dir))
@@ -0,0 +1,236 @@
+"""Opt-in CPU and memory profiling per pipeline step and per page.
+
+`Profiler.step(name, page=...)` wraps one step execution:
+ - `profile=True`: a fresh `cProfile.Profile` per (page, step) call; on
+   `write` the stats are folded into collapsed stacks rooted at synthetic
+   `page_<id>;<step>` frames (`cpu.collapsed`, readable by flamegraph.pl,
+   speedscope, inferno), plus a per-step pstats report (`cpu_steps.txt`)
+ - `trace_memory=True`: `tracemalloc` current/peak deltas per step and per
+   page (`memory_steps.json`), a snapshot diff per page (top growing lines)
+   and the top allocation sites at the end (`memory_top.txt`)
+
+When profiling is off, `step()` returns a shared `nullcontext`, so the hooks
+cost one attribute check per step. cProfile only sees the calling thread, so
+profiled runs execute sections in-process and sequentially. The daemon writes
+each batch's reports under `profile/batch_<n>/` and then `reset()`s.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
+
+
+_NULL = nullcontext()
+
+# Collapsed-stack weights are integer microseconds; paths below this are cut
+_MIN_US = 1.0
+_MAX_DEPTH = 128
+TOP_N = 25
+
+
+def _frame_name(func: Tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # built-ins
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{lineno})"
+    return label.replace(";", ",")
+
+
+def collapse_stats(stats: pstats.Stats, prefix: str = "") -> Counter:
+    """Fold cProfile caller/callee edges into collapsed stacks (µs weights).
+
+    cProfile keeps edges, not full stacks, so each callee's time is split
+    across its callers in proportion to the per-edge cumulative time.
+    """
+    raw: Dict[Any, Any] = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[Any, List[Any]] = defaultdict(list)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller in callers:
+            if caller in raw:
+                callees[caller].append(func)
+    roots = [f for f, (_, _, _, _, callers) in raw.items() if not any(c in raw for c in callers)]
+
+    out: Counter = Counter()
+
+    def walk(func: Any, path: Tuple[str, ...], on_path: frozenset, share: float, depth: int) -> None:
+        _, _, tt, ct, _ = raw[func]
+        frac = share / ct if ct > 0 else 0.0
+        self_us = tt * frac * 1e6
+        stack = path + (_frame_name(func),)
+        if self_us >= _MIN_US:
+            out[";".join(stack)] += int(round(self_us))
+        if depth >= _MAX_DEPTH:
+            return
+        for callee in callees.get(func, ()):
+            if callee in on_path:
+                continue  # recursion: time already counted at the outer frame
+            edge_ct = raw[callee][4][func][3]
+            child_share = edge_ct * frac
+            if child_share * 1e6 >= _MIN_US:
+                walk(callee, stack, on_path | {callee}, child_share, depth + 1)
+
+    base = tuple(p for p in prefix.split(";") if p)
+    for root in roots:
+        walk(root, base, frozenset({root}), raw[root][3], 0)
+    return out
+
+
+class Profiler:
+    def __init__(self, *, profile: bool = False, trace_memory: bool = False) -> None:
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.stacks: Counter = Counter()
+        self.step_stats: Dict[str, pstats.Stats] = {}
+        self.memory: Dict[str, Dict[str, Any]] = {"steps": {}, "pages": {}}
+        self.page_growth: Dict[str, List[str]] = {}
+        self._page_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._current_page: Optional[str] = None
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracing = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.profile or self.trace_memory
+
+    def step(self, name: str, page: Any = None) -> ContextManager[None]:
+        if not (self.profile or self.trace_memory):
+            return _NULL
+        return _StepScope(self, name, "-" if page is None else str(page))
+
+    def _enter_page(self, page: str) -> None:
+        if page != self._current_page:
+            self._close_page()
+            self._current_page = page
+            self._page_snapshot = self._snapshot()
+
+    def _add_profile(self, prof: cProfile.Profile, name: str, page: str) -> None:
+        stats = pstats.Stats(prof)
+        for func in [f for f in stats.stats if f[0] == __file__]:  # type: ignore[attr-defined]
+            del stats.stats[func]  # type: ignore[attr-defined]  # the scope's own __exit__
+        self.stacks.update(collapse_stats(stats, prefix=f"page_{page};{name}"))
+        if name in self.step_stats:
+            self.step_stats[name].add(stats)
+        else:
+            self.step_stats[name] = stats
+
+    def _add_memory(self, kind: str, key: str, delta: int, peak: int, elapsed: float) -> None:
+        m = self.memory[kind].setdefault(key, {"calls": 0, "net_bytes": 0, "peak_bytes": 0, "seconds": 0.0})
+        m["calls"] += 1
+        m["net_bytes"] += delta
+        m["peak_bytes"] = max(m["peak_bytes"], peak)
+        m["seconds"] = round(m["seconds"] + elapsed, 6)
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        # Leave out the profiler's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, pstats.__file__),
+        ))
+
+    def _close_page(self) -> None:
+        if self._page_snapshot is None or self._current_page is None:
+            return
+        diff = self._snapshot().compare_to(self._page_snapshot, "lineno")
+        self.page_growth[self._current_page] = [str(d) for d in diff[:10] if d.size_diff > 0]
+        self._page_snapshot = None
+
+    # -----------------------------
+    # Reports
+    # -----------------------------
+    def write(self, directory: Path) -> List[Path]:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        written: List[Path] = []
+        if self.profile:
+            collapsed = directory / "cpu.collapsed"
+            collapsed.write_text("".join(f"{stack} {us}\n" for stack, us in sorted(self.stacks.items())), encoding="utf-8")
+            report = io.StringIO()
+            for name, stats in sorted(self.step_stats.items()):
+                report.write(f"=== {name} ===\n")
+                stats.stream = report  # type: ignore[attr-defined]
+                stats.sort_stats("cumulative").print_stats(TOP_N)
+            (directory / "cpu_steps.txt").write_text(report.getvalue(), encoding="utf-8")
+            written += [collapsed, directory / "cpu_steps.txt"]
+        if self.trace_memory:
+            self._close_page()
+            payload = {**self.memory, "page_growth": self.page_growth}
+            (directory / "memory_steps.json").write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+            top = self._snapshot().statistics("lineno")[:TOP_N]
+            (directory / "memory_top.txt").write_text("".join(f"{stat}\n" for stat in top), encoding="utf-8")
+            written += [directory / "memory_steps.json", directory / "memory_top.txt"]
+        return written
+
+    def reset(self) -> None:
+        """Drop everything collected so far (long-running commands write and
+        reset per batch so the profile does not grow with uptime)."""
+        self.stacks.clear()
+        self.step_stats.clear()
+        self.memory = {"steps": {}, "pages": {}}
+        self.page_growth.clear()
+        self._page_snapshot = None
+        self._current_page = None
+
+    def close(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+class _StepScope:
+    """One profiled step; cProfile is enabled last on enter and disabled first
+    on exit so the scope itself stays out of the stacks."""
+
+    def __init__(self, profiler: Profiler, name: str, page: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.page = page
+        self.prof: Optional[cProfile.Profile] = None
+        self.before = 0
+        self.t0 = 0.0
+
+    def __enter__(self) -> None:
+        p = self.profiler
+        if p.trace_memory:
+            p._enter_page(self.page)
+            tracemalloc.reset_peak()
+            self.before = tracemalloc.get_traced_memory()[0]
+        self.t0 = time.perf_counter()
+        if p.profile:
+            self.prof = cProfile.Profile()
+            self.prof.enable()
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.prof is not None:
+            self.prof.disable()
+        elapsed = time.perf_counter() - self.t0
+        p = self.profiler
+        if self.prof is not None:
+            p._add_profile(self.prof, self.name, self.page)
+        if p.trace_memory:
+            after, peak = tracemalloc.get_traced_memory()
+            p._add_memory("steps", self.name, after - self.before, peak - self.before, elapsed)
+            p._add_memory("pages", self.page, after - self.before, peak - self.before, elapsed)
+
+
+# Set by the CLI for the duration of a command (`--profile` / `--trace-memory`)
+ACTIVE: Optional[Profiler] = None
+
+
+def step_scope(name: str, page: Any = None) -> ContextManager[None]:
+    """Profiling scope for one step under the active profiler (no-op if none)."""
+    return _NULL if ACTIVE is None else ACTIVE.step(name, page)
@@ -0,0 +1,94 @@
+"""Readability statistics computed once per text.
+
+`readability_stats(text)` returns word/sentence/syllable counts that Steps 9
+and 10 (and any future metric) derive from, instead of each calling textstat
+and re-counting syllables over the same text. Counting rules mirror textstat
+0.7 (`lexicon_count`, `sentence_count`, pyphen syllables, legacy rounding), so
+`fk_grade` matches `textstat.flesch_kincaid_grade`.
+
+Syllables are memoized per word, which is where repeated domain vocabulary
+pays off across sentences and sections.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+_APOSTROPHE_RE = re.compile(r"\'(?![tsd]\b|ve\b|ll\b|re\b)")
+_PUNCT_RE = re.compile(r"[^\w\s\']")
+_SENTENCE_RE = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+
+# Rough tokens-per-word ratio for the small instruct models we target
+TOKENS_PER_WORD = 1.3
+
+
+def _remove_punctuation(text: str) -> str:
+    # Same rules as textstat: keep apostrophes in contractions only
+    return _PUNCT_RE.sub("", _APOSTROPHE_RE.sub('"', text))
+
+
+def _legacy_round(number: float, points: int = 1) -> float:
+    p = 10 ** points
+    return float(math.floor((number * p) + math.copysign(0.5, number))) / p
+
+
+@lru_cache(maxsize=1)
+def _pyphen():
+    # Reuse textstat's configured hyphenator; import lazily (textstat is slow to import)
+    from textstat import textstat
+
+    return textstat.pyphen
+
+
+@lru_cache(maxsize=65536)
+def word_syllables(word: str) -> int:
+    """Syllables in one lowercase, punctuation-free word."""
+    return len(_pyphen().positions(word)) + 1
+
+
+@dataclass(frozen=True)
+class ReadabilityStats:
+    word_count: int  # punctuation-stripped lexicon count (textstat rules)
+    sentence_count: int
+    syllable_count: int
+    raw_word_count: int  # whitespace split, used for token estimates
+
+    @property
+    def avg_sentence_length(self) -> float:
+        return _legacy_round(self.word_count / self.sentence_count) if self.sentence_count else 0.0
+
+    @property
+    def avg_syllables_per_word(self) -> float:
+        return _legacy_round(self.syllable_count / self.word_count) if self.word_count else 0.0
+
+    @property
+    def fk_grade(self) -> float:
+        """Flesch–Kincaid grade level (rounded like textstat)."""
+        return _legacy_round(0.39 * self.avg_sentence_length + 11.8 * self.avg_syllables_per_word - 15.59)
+
+    @property
+    def approx_tokens(self) -> int:
+        return int(self.raw_word_count * TOKENS_PER_WORD)
+
+
+def _count_sentences(text: str) -> int:
+    sentences = _SENTENCE_RE.findall(text)
+    ignored = sum(1 for s in sentences if len(_remove_punctuation(s).split()) <= 2)
+    return max(1, len(sentences) - ignored)
+
+
+@lru_cache(maxsize=4096)
+def readability_stats(text: str) -> ReadabilityStats:
+    """Compute (and memoize) readability counts for `text`."""
+    # Lowercasing never changes the whitespace split, so one pass serves both
+    words = _remove_punctuation(text.lower()).split()
+    return ReadabilityStats(
+        word_count=len(words),
+        sentence_count=_count_sentences(text),
+        syllable_count=sum(word_syllables(w) for w in words),
+        raw_word_count=len(text.split()),
+    )
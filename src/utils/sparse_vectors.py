@@ -0,0 +1,38 @@
+"""Sparse hashed term vectors.
+
+Dependency-free bag-of-words vectors for cheap similarity checks (Step 5
+diversity, near-duplicate hints). Terms are hashed with CRC32 so vectors are
+stable across processes (Python's `hash()` is salted per run).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from typing import Dict
+
+
+TERM_RE = re.compile(r"[a-z0-9']+")
+DEFAULT_DIM = 1 << 18
+
+SparseVector = Dict[int, float]
+
+
+def hashed_term_vector(text: str, dim: int = DEFAULT_DIM) -> SparseVector:
+    """Return an L2-normalized term-frequency vector keyed by hashed term."""
+    counts: Dict[int, float] = {}
+    for term in TERM_RE.findall(text.lower()):
+        idx = zlib.crc32(term.encode("utf-8")) % dim
+        counts[idx] = counts.get(idx, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values()))
+    if not norm:
+        return {}
+    return {k: v / norm for k, v in counts.items()}
+
+
+def cosine(a: SparseVector, b: SparseVector) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
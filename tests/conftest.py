@@ -1,3 +1,6 @@
+import importlib
+import importlib.abc
+import importlib.util
 import sys
 from pathlib import Path
 
@@ -11,3 +14,25 @@ for p in (PROJECT_ROOT, SRC_DIR):
         sys.path.insert(0, s)
 
 
+class _SrcAlias(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Resolve `src.<module>` to the module the pipeline itself imports.
+
+    Pipeline code imports `utils.metrics`, `pipeline.orchestrator`, ... (src/ on
+    sys.path). Tests import `src.<module>`; without this alias those would be
+    second copies, so patches and registry assertions could miss the objects
+    the pipeline actually uses.
+    """
+
+    def find_spec(self, name, path=None, target=None):
+        if name.startswith("src.") and importlib.util.find_spec(name[4:]) is not None:
+            return importlib.util.spec_from_loader(name, self)
+        return None
+
+    def create_module(self, spec):
+        return importlib.import_module(spec.name[4:])
+
+    def exec_module(self, module):
+        pass  # already executed under its bare name
+
+
+sys.meta_path.insert(0, _SrcAlias())
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from src.cli.artifacts import JsonlWriter, find_record, index_path, iter_jsonl, read_json, write_json, write_jsonl
+
+
+RECORDS = [{"section_id": 10000 + i, "text": f"sentence {i}."} for i in range(1, 6)]
+
+
+@pytest.mark.parametrize("name", ["s.jsonl", "s.jsonl.gz"])
+def test_jsonl_roundtrip_and_indexed_lookup(tmp_path, name):
+    path = tmp_path / name
+    write_json(path, RECORDS, index_key="section_id")
+    assert index_path(path).exists()
+    assert list(iter_jsonl(path)) == RECORDS
+    assert read_json(path) == RECORDS
+    assert find_record(path, 10004) == RECORDS[3]
+    assert find_record(path, 99999) is None
+
+
+def test_stale_index_falls_back_to_scan(tmp_path):
+    path = tmp_path / "s.jsonl"
+    write_json(path, RECORDS, index_key="section_id")
+    write_json(path, list(reversed(RECORDS)))  # rewritten without an index
+    assert find_record(path, 10002) == RECORDS[1]
+
+
+def test_plain_json_unchanged(tmp_path):
+    path = tmp_path / "s.json"
+    write_json(path, RECORDS)
+    assert path.read_text(encoding="utf-8").startswith("[\n  {")
+    assert find_record(path, 10001) == RECORDS[0]
+
+
+def test_append_continues_file_and_index(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    write_jsonl(path, [{"section_id": 1}], index_key="section_id")
+    with JsonlWriter(path, index_key="section_id", append=True) as w:
+        w.write({"section_id": 2})
+    assert list(iter_jsonl(path)) == [{"section_id": 1}, {"section_id": 2}]
+    assert find_record(path, 2) == {"section_id": 2}
+
+
+def test_index_of_a_rewritten_file_is_never_trusted(tmp_path):
+    path = tmp_path / "s.jsonl"
+    write_json(path, RECORDS, index_key="section_id")
+    old_index = index_path(path).read_bytes()
+    write_json(path, list(reversed(RECORDS)))
+    assert not index_path(path).exists()  # removed by the unindexed rewrite
+
+    # Same size, same mtime granularity, offsets now pointing at other records
+    index_path(path).write_bytes(old_index)
+    assert find_record(path, 10002) == RECORDS[1]
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"section_id": 10001, "text": "appended"}) + "\n")
+    assert find_record(path, 10004) == RECORDS[3]  # size differs: index ignored
+
+
+def test_jsonl_output_requires_a_list(tmp_path):
+    with pytest.raises(ValueError):
+        write_json(tmp_path / "x.jsonl", {"section_id": 1, "sentences": []})
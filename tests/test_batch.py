@@ -0,0 +1,93 @@
+import pickle
+import tracemalloc
+
+import pytest
+
+from benchmarks.corpus import iter_sections, load_example
+from src.db.db_utils import page_sections
+from src.pipeline.batch import PageBatch, SentenceView
+from src.pipeline.orchestrator import labeled_records
+from src.pipeline.step2_normalize import normalize_and_split, split_batch
+from src.pipeline.step3_label import label_batch, label_sentences
+from src.pipeline.step4_score import score_batch, score_sentences
+from src.pipeline.step5_select import select_from_batch, select_minimal_set
+
+from tests.test_orchestrator import SECTION
+
+
+def _sections():
+    rows = [(p["page_serial_id"], p["page_title"], p["topic"], p["page_key_words"], p["page_content"]) for p in load_example()]
+    return [SECTION] + [s for row in rows for s in page_sections(row)] + list(iter_sections(30, seed=3))
+
+
+@pytest.fixture(scope="module")
+def sections():
+    return _sections()
+
+
+@pytest.fixture(scope="module")
+def scored(sections):
+    return score_batch(label_batch(split_batch(sections), use_llm=False))
+
+
+def test_batch_steps_match_per_sentence_steps(sections, scored):
+    for j, s in enumerate(sections):
+        sentences = normalize_and_split(s.text or "")
+        pairs = label_sentences(sentences, section_keywords=s.keywords, use_llm=False)
+        labeled = labeled_records(s.section_id, pairs)
+        records = score_sentences(sentences, section_id=s.section_id, section_keywords=s.keywords, labeled=labeled)
+
+        assert scored.sentences(j) == sentences
+        assert scored.pairs(j) == pairs
+        assert scored.labeled_records(j) == labeled
+        assert scored.scored_records(j) == records
+        assert select_from_batch(scored, j) == select_minimal_set(pairs, records)
+        assert select_from_batch(scored, j, top_k=1, mmr_lambda=0.3) == select_minimal_set(pairs, records, top_k=1, mmr_lambda=0.3)
+
+
+def test_steps_add_columns_without_touching_their_input(sections):
+    split = split_batch(sections[:3])
+    labeled = label_batch(split, use_llm=False)
+    assert not split.labeled and labeled.labeled and not labeled.scored
+    assert labeled.buffer is split.buffer and labeled.offsets is split.offsets
+    assert split.fingerprint() != labeled.fingerprint()
+    assert labeled.fingerprint() == label_batch(split_batch(sections[:3]), use_llm=False).fingerprint()
+
+    restored = pickle.loads(pickle.dumps(score_batch(labeled)))
+    assert restored.fingerprint() == score_batch(labeled).fingerprint()
+    with pytest.raises(ValueError):
+        select_from_batch(split)
+
+
+def test_views_read_columns(sections, scored):
+    j = 2
+    rows = list(scored.rows(j))
+    assert all(isinstance(v, SentenceView) and not hasattr(v, "__dict__") for v in rows)
+    assert [v.text for v in rows] == scored.sentences(j)
+    assert {v.section.section_id for v in rows} == {sections[j].section_id}
+    assert [v.score for v in rows] == [r["score"] for r in scored.scored_records(j)]
+    assert PageBatch.from_sentences(sections[:1], [["a.", "b."]]).sentences() == ["a.", "b."]
+
+
+def test_batch_uses_far_less_memory_per_sentence(sections):
+    def traced(build):
+        tracemalloc.start()
+        try:
+            kept = build()
+            return tracemalloc.get_traced_memory()[0], kept
+        finally:
+            tracemalloc.stop()
+
+    def per_sentence():
+        out = []
+        for s in sections:
+            sentences = normalize_and_split(s.text or "")
+            pairs = label_sentences(sentences, section_keywords=s.keywords, use_llm=False)
+            labeled = labeled_records(s.section_id, pairs)
+            out.append((sentences, pairs, score_sentences(sentences, section_id=s.section_id, section_keywords=s.keywords, labeled=labeled)))
+        return out
+
+    per_sentence()  # warm classifier/regex caches outside the trace
+    records_bytes, _ = traced(per_sentence)
+    batch_bytes, batch = traced(lambda: score_batch(label_batch(split_batch(sections), use_llm=False)))
+    assert batch_bytes * 4 < records_bytes, (batch_bytes / len(batch), records_bytes / len(batch))
@@ -0,0 +1,46 @@
+import json
+
+from benchmarks.corpus import iter_pages, iter_sections, learn_profile, load_example, write_corpus
+from benchmarks.harness import BenchResult, compare, to_baseline
+from benchmarks.suites import SUITES, run_cases
+
+
+def test_corpus_is_deterministic_and_matches_example_shape(tmp_path):
+    example = load_example()
+    first = list(iter_pages(40, seed=7))
+    assert first == list(iter_pages(40, seed=7))
+    assert first != list(iter_pages(40, seed=8))
+    assert sum(len(p["page_content"]) for p in first) == 40
+    assert set(example[0]["page_content"][0]) <= set(first[0]["page_content"][0]) | {"drop_triggereed_at"}
+
+    count = write_corpus(tmp_path / "corpus.json", iter(first))
+    assert count == 40
+    assert json.loads((tmp_path / "corpus.json").read_text(encoding="utf-8")) == first
+
+
+def test_corpus_sentence_lengths_track_the_seed():
+    profile = learn_profile(load_example())
+    sections = list(iter_sections(200, seed=1, profile=profile))
+    assert len({s.section_id for s in sections}) == 200
+    words = [len(t.split()) for s in sections for t in s.text.split(". ")]
+    mean = sum(words) / len(words)
+    assert 0.6 * profile.mean_sentence_words < mean < 1.6 * profile.mean_sentence_words
+    assert all(s.keywords for s in sections)
+
+
+def test_compare_flags_per_unit_slowdowns():
+    base = to_baseline([BenchResult("a", 100, "section", [1.0]), BenchResult("b", 100, "section", [1.0])], {})
+    # Twice the units in 2.1s is 5% slower per unit; 1.5s for the same units is 50%
+    cur = to_baseline([BenchResult("a", 200, "section", [2.1]), BenchResult("b", 100, "section", [1.5])], {})
+    regressions = compare(cur, base, threshold=0.10)
+    assert [r.name for r in regressions] == ["b"]
+    assert round(regressions[0].change, 2) == 0.5
+    assert compare(cur, {"results": {}}) == []
+
+
+def test_suites_run_on_a_small_corpus():
+    sections = list(iter_sections(5, seed=2))
+    results = run_cases(SUITES["micro"](sections) + SUITES["e2e"](sections), repeat=1, warmup=0)
+    names = {r.name for r in results}
+    assert {"step2_split", "step3_classify", "step7_render", "e2e_rules"} <= names
+    assert all(r.units > 0 and r.times_s for r in results)
@@ -0,0 +1,75 @@
+import os
+from dataclasses import replace
+
+import pytest
+
+from src.config.settings import get_settings
+from src.pipeline.cache import _MISS, StepCache, cache_key
+from src.pipeline.orchestrator import LESSON_DAG, RunOptions, run_section
+
+from tests.test_orchestrator import SECTION
+
+
+def test_key_depends_on_version_inputs_and_relevant_settings():
+    settings = get_settings()
+    base = cache_key("step5", 1, [["a"]], settings)
+    assert cache_key("step5", 1, [["a"]], settings) == base
+    assert cache_key("step5", 2, [["a"]], settings) != base
+    assert cache_key("step5", 1, [["b"]], settings) != base
+    tuned = replace(settings, select_top_k_per_type=settings.select_top_k_per_type + 1)
+    assert cache_key("step5", 1, [["a"]], tuned) != base
+    # Fields a step does not read leave its key alone
+    other = replace(settings, rewrite_batch_token_budget=settings.rewrite_batch_token_budget + 1)
+    assert cache_key("step5", 1, [["a"]], other) == base
+    # Step 2's near-dedupe threshold is part of its key
+    looser = replace(settings, near_duplicate_cosine=settings.near_duplicate_cosine / 2)
+    assert cache_key("step2", 1, ["text", True], looser) != cache_key("step2", 1, ["text", True], settings)
+
+
+def test_cached_call_skips_compute_on_hit(tmp_path):
+    cache = StepCache(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"step_count": 3}
+
+    assert cache.cached_call("step6", 1, [{"Definition": ["x"]}], compute) == ({"step_count": 3}, False)
+    assert cache.cached_call("step6", 1, [{"Definition": ["x"]}], compute) == ({"step_count": 3}, True)
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_orchestrator_reuses_cached_steps(tmp_path):
+    cache = StepCache(tmp_path)
+    opts = RunOptions(use_llm=False, rewrite=False, cache=cache)
+    first = run_section(SECTION, opts)
+    assert cache.misses == len(LESSON_DAG.steps) and cache.hits == 0
+
+    second = run_section(SECTION, opts)
+    assert cache.hits == len(LESSON_DAG.steps)
+    assert second.rows == first.rows and second.selected == first.selected
+
+    # Changed input content misses again
+    run_section(replace(SECTION, text=SECTION.text + " Funding is paid in USD."), opts)
+    assert cache.misses > len(LESSON_DAG.steps)
+
+
+def test_unfingerprintable_inputs_are_rejected():
+    class Opaque:
+        pass
+
+    with pytest.raises(TypeError, match="Opaque"):
+        cache_key("step6", 1, [Opaque()])
+
+
+def test_prune_drops_least_recently_used_entries(tmp_path):
+    cache = StepCache(tmp_path)
+    for i, key in enumerate(("aa1", "bb2", "cc3")):
+        cache.put(key, b"x" * 100)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    assert cache.get("aa1") == b"x" * 100  # a hit makes the oldest entry the newest
+    size = cache._path("aa1").stat().st_size
+    assert cache.prune(2 * size) == (1, 2 * size)
+    assert cache.get("bb2") is _MISS
+    assert cache.get("aa1") is not _MISS and cache.get("cc3") is not _MISS
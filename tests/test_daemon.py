@@ -0,0 +1,148 @@
+import pytest
+
+from src.db.models import RawSection
+from src.pipeline.daemon import LessonDaemon, PageCoalescer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSource:
+    """Notifications are queued per `wait` call; `wait` advances the clock."""
+
+    def __init__(self, clock, rows=None):
+        self.clock = clock
+        self.rows = rows or []  # page ids visible to polling
+        self.waves = []
+        self.fetched = []
+
+    def wait(self, timeout, max_items):
+        self.clock.now += timeout if not self.waves else 0.01
+        return self.waves.pop(0)[:max_items] if self.waves else []
+
+    def poll(self, watermark):
+        return [p for p in self.rows if p > watermark]
+
+    def sections(self, page_ids):
+        self.fetched.append(list(page_ids))
+        return [RawSection(section_id=p * 10000 + 1, page_id=p, page_title=None, title=None, text="x") for p in page_ids]
+
+    def high_water(self):
+        return max(self.rows, default=0)
+
+    def disconnected(self, exc):
+        return isinstance(exc, ConnectionError)
+
+    def reconnect(self):
+        self.reconnects = getattr(self, "reconnects", 0) + 1
+
+
+def test_coalescer_releases_after_window_or_when_full():
+    c = PageCoalescer(window_s=0.5, max_batch=3)
+    c.add(1, now=10.0)
+    c.add(1, now=10.1)
+    c.add(2, now=10.2)
+    assert not c.due(10.3) and abs(c.time_left(10.3) - 0.2) < 1e-9
+    assert c.due(10.5)
+    c.add(3, now=10.5)
+    assert c.drain() == [1, 2, 3]
+    assert c.time_left(11.0) is None
+    for p in range(4, 8):
+        c.add(p, now=20.0)
+    assert c.due(20.0)  # full before the window elapsed
+    assert c.drain() == [4, 5, 6] and c.pending == {7: None}
+
+
+def test_burst_is_coalesced_into_one_batch(tmp_path):
+    clock = FakeClock()
+    source = FakeSource(clock, rows=[5])
+    handled = []
+    daemon = LessonDaemon(source, handled.append, window_s=0.5, max_batch=10, poll_interval_s=60, state_path=tmp_path / "state.json", clock=clock)
+    assert daemon.watermark == 5  # first start skips existing pages
+
+    source.waves = [[6], [7, 6], [8]]
+    steps = [daemon.step() for _ in range(5)]
+    assert steps.count(True) == 1
+    assert source.fetched == [[6, 7, 8]]
+    assert [s.page_id for s in handled[0]] == [6, 7, 8]
+    assert daemon.watermark == 5  # notifications never move the watermark
+
+    source.rows += [6, 7, 8]
+    clock.now = daemon.next_poll
+    for _ in range(3):
+        assert not daemon.step()  # the poll skips the pages already processed
+    assert source.fetched == [[6, 7, 8]] and len(handled) == 1
+    assert daemon.watermark == 8 and daemon.processed == set()
+    assert LessonDaemon(source, handled.append, state_path=tmp_path / "state.json", clock=clock).watermark == 8
+
+
+def test_poll_picks_up_missed_notifications():
+    clock = FakeClock()
+    source = FakeSource(clock, rows=[1, 2])
+    handled = []
+    daemon = LessonDaemon(source, handled.append, window_s=0.0, poll_interval_s=1.0, clock=clock)
+    source.rows += [3, 4]  # inserted while the notification was lost
+    while not daemon.step():
+        pass
+    assert source.fetched == [[3, 4]]
+    assert daemon.stats.polled == 2 and daemon.stats.notified == 0
+
+
+def test_notified_pages_do_not_skip_inserts_missed_while_down():
+    clock = FakeClock()
+    source = FakeSource(clock, rows=[1])
+    handled = []
+    daemon = LessonDaemon(source, handled.append, window_s=0.0, poll_interval_s=60.0, clock=clock)
+    source.rows += [2, 3]  # inserted while the daemon was down: no notification
+    source.waves = [[3]]
+    while not daemon.step():  # startup poll picks up 2 and 3 before any notification
+        pass
+    assert sorted(source.fetched[0]) == [2, 3] and daemon.watermark == 3
+
+    source.rows += [4, 5]
+    source.waves = [[5]]  # 4's notification was lost
+    clock.now += 1.0
+    while not daemon.step():
+        pass
+    assert source.fetched[-1] == [5] and daemon.watermark == 3
+    clock.now = daemon.next_poll
+    while not daemon.step():
+        pass
+    assert source.fetched[-1] == [4] and daemon.watermark == 5  # 5 is not run again
+
+
+def test_failed_batches_are_retried_with_backoff_and_reconnect():
+    clock = FakeClock()
+    source = FakeSource(clock, rows=[1])
+    failures = [RuntimeError("llm down"), ConnectionError("server closed the connection")]
+    handled = []
+
+    def handle(sections):
+        if failures:
+            raise failures.pop(0)
+        handled.append(sections)
+
+    daemon = LessonDaemon(source, handle, window_s=0.0, poll_interval_s=60.0, clock=clock, backoff_s=1.0)
+    source.waves = [[2]]
+    delays = []
+    for _ in range(3):
+        try:
+            daemon.step()
+            daemon.failures = 0
+        except Exception as exc:
+            delays.append(daemon.recover(exc))
+    assert delays == [1.0, 2.0]
+    assert getattr(source, "reconnects", 0) == 1
+    assert [s.page_id for s in handled[0]] == [2]  # the page stayed pending until it went through
+
+    daemon.max_attempts = 1
+    failures.append(RuntimeError("poison page"))
+    source.waves = [[3]]
+    with pytest.raises(RuntimeError):
+        daemon.step()
+    assert daemon.coalescer.pending == {}  # dropped after max_attempts
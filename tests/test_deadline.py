@@ -0,0 +1,128 @@
+import json
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+
+from src.config.settings import get_settings
+from src.pipeline import step8_rewrite
+from src.pipeline.cache import StepCache
+from src.pipeline.deadline import Deadline
+from src.pipeline.orchestrator import RunOptions, run_section
+from src.services import classifier
+
+from tests.test_orchestrator import SECTION
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    calls = []
+
+    def fake(prompt, temperature=None, timeout=None):
+        calls.append(timeout)
+        if "Items:" in prompt:
+            items = json.loads(prompt.split("Items:\n", 1)[1])
+            return SimpleNamespace(text=json.dumps([f"you {it['text']}" for it in items]))
+        return SimpleNamespace(text=json.dumps({"label": "Mechanism", "confidence": 0.9}))
+
+    monkeypatch.setattr(classifier, "rewrite_style", fake)
+    monkeypatch.setattr(step8_rewrite, "rewrite_style", fake)
+    return calls
+
+
+def test_reserves_timeouts_and_records():
+    clock = Clock()
+    deadline = Deadline(10.0, {"step3": 4.0}, clock=clock)
+    assert deadline.allows("step3") and deadline.timeout() == 10.0
+    clock.now = 7.0
+    assert not deadline.allows("step3") and deadline.allows("step8")
+    deadline.degrade("step3", "rules_only")
+    deadline.degrade("step3", "rules_only")
+    assert deadline.applied == ["step3:rules_only"]
+    assert deadline.vetoes_cache("step3") and not deadline.vetoes_cache("step8")
+    assert deadline.fingerprint() is None
+
+
+def test_exhausted_budget_skips_llm_and_annotates(llm):
+    result = run_section(SECTION, RunOptions(use_llm=True, rewrite=True, budget_s=0.01))
+    assert llm == []
+    assert result.degradations == ["step3:rules_only", "step8:skipped"]
+    assert {r["source"] for r in result.labeled} == {"rules"}
+    assert result.rows  # still a lesson, built from the original texts
+
+    full = run_section(SECTION, RunOptions(use_llm=True, rewrite=True, budget_s=0))
+    assert full.degradations == [] and llm
+    assert all(t is None for t in llm)  # no deadline, default timeout
+
+
+def test_rewrites_stop_once_the_reserve_is_reached(llm, monkeypatch):
+    one_per_request = replace(get_settings(), rewrite_batch_enabled=False)
+    monkeypatch.setattr(step8_rewrite, "get_settings", lambda: one_per_request)
+    clock = Clock()
+    deadline = Deadline(10.0, {"step8": 2.0}, clock=clock)
+
+    def tick(prompt, temperature=None, timeout=None):
+        llm.append(timeout)
+        clock.now += 5.0
+        return SimpleNamespace(text="rewritten")
+
+    monkeypatch.setattr(step8_rewrite, "rewrite_style", tick)
+    out = step8_rewrite.micro_rewrite(["a", "b", "c"], deadline=deadline)
+    assert out == ["rewritten", "rewritten", "c"]
+    assert llm == [10.0, 5.0]  # each call's timeout is the time left
+    assert deadline.applied == ["step8:partial"]
+
+
+def test_budgeted_runs_reuse_but_never_store_degraded_outputs(llm, tmp_path):
+    cache = StepCache(tmp_path)
+    degraded = run_section(SECTION, RunOptions(use_llm=True, rewrite=False, budget_s=0.01, cache=cache))
+    assert degraded.degradations == ["step3:rules_only"]
+
+    full = run_section(SECTION, RunOptions(use_llm=True, rewrite=False, cache=cache))
+    assert "llm_fallback" in {r["source"] for r in full.labeled}  # step3 was not served from the cache
+
+    calls = len(llm)
+    warm = run_section(SECTION, RunOptions(use_llm=True, rewrite=False, budget_s=0.01, cache=cache))
+    assert warm.degradations == [] and len(llm) == calls
+    assert warm.labeled == full.labeled
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_timed_out_requests_degrade_instead_of_failing(llm, monkeypatch, batched):
+    import requests
+
+    settings = replace(get_settings(), rewrite_batch_enabled=batched, rewrite_batch_token_budget=12)  # two texts per batch
+    monkeypatch.setattr(step8_rewrite, "get_settings", lambda: settings)
+    answered = []
+
+    def slow(prompt, temperature=None, timeout=None):
+        llm.append(timeout)
+        if answered:
+            raise requests.Timeout("read timed out")
+        answered.append(prompt)
+        if "Items:" in prompt:
+            items = json.loads(prompt.split("Items:\n", 1)[1])
+            return SimpleNamespace(text=json.dumps([f"you {it['text']}" for it in items]))
+        return SimpleNamespace(text="rewritten")
+
+    monkeypatch.setattr(step8_rewrite, "rewrite_style", slow)
+    texts = ["first text here", "second text here", "third text here", "fourth text here"]
+    deadline = Deadline(3.0, {"step8": 0.5})
+    out = step8_rewrite.micro_rewrite(texts, deadline=deadline)
+    assert out[0] != texts[0] and out[-1] == texts[-1]  # the rest keep their input
+    assert deadline.applied == ["step8:partial"] and len(llm) == 2
+
+    regen = Deadline(3.0, {"step10": 0.5})
+    assert step8_rewrite.micro_rewrite(texts[:1], deadline=regen, step="step10") == texts[:1]
+    assert regen.applied == ["step10:retries_cut"]
+
+    with pytest.raises(requests.Timeout):  # without a deadline, errors still surface
+        step8_rewrite.micro_rewrite(texts[:1])
@@ -0,0 +1,82 @@
+import copy
+import json
+
+from benchmarks.corpus import iter_sections, load_example
+from src.pipeline.orchestrator import LESSON_DAG, RunOptions, run_section
+from src.services import domain_vocab
+from src.services.domain_vocab import VOCAB_VERSION, DomainVocab, DomainVocabIndex, get_domain_vocab
+from src.services.keyword_service import keyword_density
+
+from tests.test_orchestrator import SECTION
+
+
+def _rows(pages):
+    return [(p["page_serial_id"], p["page_title"], p["topic"], p["page_key_words"], p["page_content"]) for p in pages]
+
+
+def test_single_token_terms_match_the_plain_density():
+    sections = list(iter_sections(50, seed=4))
+    terms = sorted({k for s in sections for k in s.keywords or [] if " " not in k})
+    vocab = DomainVocab(terms)
+    for s in sections:
+        assert vocab.density(s.text) == keyword_density(s.text, terms)
+        assert keyword_density(s.text, vocab) == vocab.density(s.text)
+    assert DomainVocab(reversed(terms)).fingerprint() == vocab.fingerprint()
+
+
+def test_phrases_match_longest_first():
+    vocab = DomainVocab(["Funding", "funding rate", "Mark-Price", "funding rate cap"])
+    assert vocab.hits("the funding rate cap moves the mark price".split()) == 5
+    assert vocab.hits("funding rate".split()) == 2 and vocab.hits(["rate"]) == 0
+    assert vocab.density("") == 0.0 and len(vocab) == 4
+
+
+def test_index_updates_incrementally_and_persists(tmp_path):
+    pages = load_example()
+    path = tmp_path / "vocab.json"
+    index = DomainVocabIndex()
+    assert index.update(_rows(pages)) == len(pages)
+    assert set(pages[0]["page_key_words"]) <= set(index.terms())
+    index.save(path)
+
+    loaded = DomainVocabIndex.load(path)
+    assert loaded.pages == index.pages and loaded.revision == 1
+    assert loaded.update(_rows(pages)) == 0  # unchanged pages are not re-indexed
+
+    edited = copy.deepcopy(pages[0])
+    edited["page_key_words"] = ["perpetual basis"]
+    for section in edited["page_content"]:
+        section["section_key_words"] = []
+    assert loaded.update(_rows([edited])) == 1
+    assert loaded.pages[edited["page_serial_id"]] == ["perpetual basis"]
+
+    stale = json.loads(path.read_text(encoding="utf-8"))
+    stale["version"] = VOCAB_VERSION + 1
+    path.write_text(json.dumps(stale), encoding="utf-8")
+    assert DomainVocabIndex.load(path).pages == {}
+
+
+def test_vocab_is_loaded_once_and_refreshed_on_save(tmp_path, monkeypatch):
+    path = tmp_path / "vocab.json"
+    index = DomainVocabIndex()
+    index.update(_rows(load_example()))
+    index.save(path)
+
+    loads = []
+    original = DomainVocabIndex.load.__func__
+    monkeypatch.setattr(DomainVocabIndex, "load", classmethod(lambda cls, p: loads.append(p) or original(cls, p)))
+    domain_vocab._load_vocab.cache_clear()
+    first = get_domain_vocab(path)
+    assert get_domain_vocab(path) is first and len(loads) == 1
+    index.save(path)
+    assert get_domain_vocab(path) is not first and len(loads) == 2
+
+
+def test_run_options_carry_the_vocabulary_into_step9():
+    vocab = DomainVocab(["funding", "mark price", "perpetual", "price", "payment"])
+    options = RunOptions(use_llm=False, rewrite=False, domain_vocab=vocab)
+    # Only Step 9 sees the vocabulary: other steps' cache keys are unchanged
+    assert options.fingerprint() == RunOptions(use_llm=False, rewrite=False).fingerprint()
+    assert LESSON_DAG.steps["step9"].inputs == ("section", "rewritten", "domain_vocab")
+    assert all("domain_vocab" not in spec.inputs for name, spec in LESSON_DAG.steps.items() if name != "step9")
+    assert run_section(SECTION, options).difficulty in {"Beginner", "Intermediate", "Master"}
@@ -0,0 +1,42 @@
+from src.services.embedding_service import HashingEncoder, cosine, embed_texts
+from src.services.vector_store import VectorStore
+
+
+class CountingEncoder(HashingEncoder):
+    def __init__(self, dim: int = 32) -> None:
+        super().__init__(dim)
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return super().encode(texts)
+
+
+def test_hashing_encoder_is_deterministic_and_normalized():
+    enc = HashingEncoder(64)
+    a, b = enc.encode(["funding accrues hourly.", "funding accrues hourly."])
+    assert a == b
+    assert abs(cosine(a, a) - 1.0) < 1e-9
+
+
+def test_store_reuses_vectors_across_opens(tmp_path):
+    enc = CountingEncoder()
+    store = VectorStore(tmp_path, enc.dim, encoder=enc.name)
+    first = embed_texts(["a", "b", "a"], encoder=enc, store=store)
+    assert enc.calls == [["a", "b"]]
+    assert len(store) == 2
+
+    reopened = VectorStore(tmp_path, enc.dim, encoder=enc.name)
+    again = embed_texts(["b", "a"], encoder=enc, store=reopened)
+    assert enc.calls == [["a", "b"]]  # no re-encode
+    assert [round(x, 5) for x in again[1]] == [round(x, 5) for x in first[0]]
+
+
+def test_store_drops_partial_append(tmp_path):
+    store = VectorStore(tmp_path, 4)
+    store.append(["x"], [[1.0, 0.0, 0.0, 0.0]])
+    with (tmp_path / "vectors.f32").open("ab") as f:
+        f.write(b"\x00" * 6)  # torn write without an index entry
+    reopened = VectorStore(tmp_path, 4)
+    assert len(reopened) == 1
+    assert reopened.get("x") == [1.0, 0.0, 0.0, 0.0]
@@ -0,0 +1,44 @@
+import re
+
+from benchmarks.corpus import iter_sections, load_example
+from benchmarks.equivalence import ENGINES, batch_engine, check_equivalence, first_difference
+from src.db.db_utils import page_sections
+from src.pipeline.step2_normalize import normalize_and_split
+
+from tests.test_orchestrator import SECTION
+
+
+def _sections():
+    rows = [(p["page_serial_id"], p["page_title"], p["topic"], p["page_key_words"], p["page_content"]) for p in load_example()]
+    return [SECTION] + [s for row in rows for s in page_sections(row)] + list(iter_sections(40, seed=11))
+
+
+def test_optimized_engines_match_the_reference():
+    assert check_equivalence(_sections(), ENGINES) == []
+
+
+def test_first_difference_points_at_the_field():
+    assert first_difference([{"a": 1.0}], [{"a": 1.0}]) is None
+    assert first_difference([{"a": 1}, {"a": 2}], [{"a": 1}, {"a": 3}]) == ("[1].a", 2, 3)
+    assert first_difference([1, 2], [1]) == (".length", 2, 1)
+    assert first_difference({"x": 1}, {"x": 1.0}) == (".x", 1, 1.0)  # types must match too
+
+
+def test_planted_bug_is_shrunk_to_a_minimal_repro():
+    def buggy(sections):
+        out = batch_engine(sections)
+        for o in out:
+            o["scored"] = [dict(r, score=r["score"] + 0.001) if re.search(r"\d", r["text"]) else r for r in o["scored"]]
+        return out
+
+    sections = _sections()
+    divergences = check_equivalence(sections, {"buggy": buggy}, max_repros=1)
+    assert divergences and {d.field for d in divergences} == {"scored"}
+    first = divergences[0]
+    assert first.path.endswith(".score") and first.actual > first.expected
+    repro = first.repro
+    assert len(normalize_and_split(repro.text)) == 1 and re.search(r"\d", repro.text)
+    assert repro.keywords is None  # the bug does not depend on keywords
+    assert check_equivalence([repro], {"buggy": buggy}, max_repros=0)  # still diverges
+    assert all(d.repro is None for d in divergences[1:])
+    assert "repro:" in first.describe()
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import SRC_DIR
+
+
+# Our share of CLI startup (project modules + the stdlib they pull in); typer,
+# click and rich are the CLI framework's fixed cost and are not counted
+IMPORT_BUDGET_MS = 100
+CLI_FRAMEWORK = "typer"
+HEAVY = ("requests", "urllib3", "textstat", "pyphen", "psycopg", "dotenv")
+
+# `info` and the cheap artifact steps
+CHEAP_COMMANDS = {
+    "info": "import main",
+    "step2": "import main, cli.artifacts, pipeline.cache, pipeline.step2_normalize",
+    "step6": "import main, cli.artifacts, pipeline.cache, pipeline.step6_steps",
+}
+
+
+def _import_profile(stmt):
+    """(own import time in ms, third-party top-level packages loaded) for `stmt`."""
+    code = f"{stmt}; import sys; print(','.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    env = {k: v for k, v in os.environ.items() if not k.startswith("PYTHON")}
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    framework_us = 0
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0 and name.strip() != "site":  # interpreter startup isn't ours
+            total_us += int(cumulative)
+        elif name.strip() == CLI_FRAMEWORK:
+            framework_us += int(cumulative)
+    return (total_us - framework_us) / 1000.0, set(out.stdout.strip().split(","))
+
+
+@pytest.mark.parametrize("command", sorted(CHEAP_COMMANDS))
+def test_cheap_commands_import_no_heavy_dependencies(command):
+    _, modules = _import_profile(CHEAP_COMMANDS[command])
+    assert not modules & set(HEAVY)
+
+
+@pytest.mark.parametrize("command", sorted(CHEAP_COMMANDS))
+def test_cheap_commands_import_within_budget(command):
+    # Best of three: the budget is about regressions, not a noisy neighbour
+    ms = min(_import_profile(CHEAP_COMMANDS[command])[0] for _ in range(3))
+    assert ms < IMPORT_BUDGET_MS, f"{command}: {ms:.1f}ms of imports (budget {IMPORT_BUDGET_MS}ms)"
+
+
+def test_settings_read_environment_on_first_use(monkeypatch):
+    from src.config import settings
+
+    monkeypatch.setenv("OUTPUT_DIR", "/tmp/from-env")
+    assert settings.Settings().output_dir == "/tmp/from-env"
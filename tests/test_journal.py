@@ -0,0 +1,36 @@
+from src.pipeline.journal import FINAL_STEP, Journal
+
+
+def test_records_survive_reopen_and_torn_lines(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with Journal(path, fsync_every=2) as j:
+        j.append(1, "step2", ["a"])
+        j.append(1, FINAL_STEP, [{"content": "x"}], keep_payload=True)
+        j.append(2, "step2", ["b"])
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"section_id": 2, "step": "ste')  # crash mid-write
+
+    j = Journal(path)
+    assert j.completed_sections() == {1}
+    assert j.payload(1) == [{"content": "x"}]
+    assert (2, "step2") in j.records
+    j.close()
+
+
+def test_compaction_keeps_latest_record_per_key(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with Journal(path, compact_every=3) as j:
+        for i in range(5):
+            j.append(7, "step8", [f"v{i}"])
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= 3
+    assert Journal(path).records[(7, "step8")] == j.records[(7, "step8")]
+
+
+def test_reset_starts_fresh(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with Journal(path) as j:
+        j.append(1, FINAL_STEP, [], keep_payload=True)
+        j.reset()
+        assert j.completed_sections() == set()
+    assert path.read_text(encoding="utf-8") == ""
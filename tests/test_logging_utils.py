@@ -0,0 +1,91 @@
+import json
+import logging
+import queue
+
+import pytest
+
+from src.utils import logging_utils
+from src.utils.logging_utils import AsyncQueueHandler, EventSampler, JsonFormatter, log_event, parse_event_rates
+from src.utils.metrics import REGISTRY
+
+
+@pytest.fixture
+def restore_root():
+    root = logging.getLogger()
+    handlers, level, sampler = list(root.handlers), root.level, logging_utils._SAMPLER
+    yield root
+    logging_utils.flush_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    logging_utils._SAMPLER = sampler
+
+
+def test_sampling_is_deterministic_and_globs_match():
+    sampler = EventSampler(parse_event_rates("step3.sentence=0.25, step4.*=0"))
+    kept = [i for i in range(12) if sampler.allow("step3.sentence")]
+    assert kept == [0, 4, 8]
+    assert not sampler.allow("step4.score")
+    assert sampler.allow("orchestrator.section_done")
+    with pytest.raises(ValueError):
+        parse_event_rates("step3.sentence")
+
+
+def test_rate_limit_refills_over_time():
+    now = [0.0]
+    sampler = EventSampler(rate_limits={"hot": 2}, clock=lambda: now[0])
+    assert [sampler.allow("hot") for _ in range(3)] == [True, True, False]
+    now[0] += 0.5  # one token back
+    assert [sampler.allow("hot") for _ in range(2)] == [True, False]
+
+
+def test_lazy_payload_only_built_when_emitted():
+    calls = []
+    logger = logging.getLogger("test.lazy")
+    logger.setLevel(logging.INFO)
+    log_event(logger, "trace", level=logging.DEBUG, lazy=lambda: calls.append(1) or {})
+    assert calls == []
+
+    record = logger.makeRecord("test.lazy", logging.INFO, __file__, 1, "evt", None, None,
+                               extra={"extra_data": {"a": 1}, "lazy_data": lambda: {"b": 2}})
+    assert json.loads(JsonFormatter().format(record)) == {"level": "INFO", "logger": "test.lazy", "message": "evt", "a": 1, "b": 2}
+
+
+def test_async_logging_writes_json_from_the_listener(restore_root, capsys):
+    logging_utils.configure_json_logging("DEBUG", async_=True, sampling={"step3.sentence": 0.5}, rate_limits={})
+    logger = logging.getLogger("test.async")
+    for i in range(4):
+        log_event(logger, "step3.sentence", level=logging.DEBUG, lazy=lambda i=i: {"i": i})
+    log_event(logger, "done", n=4)
+    logging_utils.flush_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(e["message"], e.get("i", e.get("n"))) for e in lines] == [("step3.sentence", 0), ("step3.sentence", 2), ("done", 4)]
+    assert REGISTRY.summary()["counters"]["log_events_dropped_total"]["event=step3.sentence,reason=sampled"] >= 2
+
+
+def test_full_queue_drops_info_but_never_warnings():
+    written = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            written.append(record.getMessage())
+
+    handler = AsyncQueueHandler(queue.Queue(maxsize=1), fallback=Collect(), block_s=0.01)
+    logger = logging.getLogger("test.full")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    try:
+        logger.info("first")
+        logger.info("dropped: free-form %s", "text")  # must not block or raise
+        log_event(logger, "test.noisy", n=1)
+        logger.error("kept")
+    finally:
+        logger.removeHandler(handler)
+    assert handler.queue.qsize() == 1
+    assert handler.queue.get_nowait().getMessage() == "first"
+    assert written == ["kept"]
+    dropped = REGISTRY.summary()["counters"]["log_events_dropped_total"]
+    assert dropped["event=other,reason=queue_full"] >= 1
+    assert dropped["event=test.noisy,reason=queue_full"] >= 1
+    assert not any("free-form" in labels for labels in dropped)
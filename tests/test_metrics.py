@@ -0,0 +1,60 @@
+import json
+
+from src.pipeline.orchestrator import RunOptions, run_section
+from src.utils.metrics import REGISTRY, Registry
+
+from tests.test_orchestrator import SECTION
+
+
+def test_counters_gauges_and_histogram_quantiles():
+    reg = Registry()
+    reg.counter("calls_total", "Calls").inc(outcome="ok")
+    reg.counter("calls_total").inc(2, outcome="ok")
+    reg.gauge("depth").set(3, stage="a")
+    h = reg.histogram("lat_seconds", "Latency", buckets=(0.1, 1.0))
+    for v in (0.05, 0.05, 0.5, 2.0):
+        h.observe(v, op="x")
+
+    summary = reg.summary()
+    assert summary["counters"]["calls_total"] == {"outcome=ok": 3.0}
+    assert summary["gauges"]["depth"] == {"stage=a": 3.0}
+    lat = summary["histograms"]["lat_seconds"]["op=x"]
+    assert lat["count"] == 4 and lat["max"] == 2.0
+    assert 0.0 < lat["p50"] <= 0.1 < lat["p95"]
+
+    text = reg.to_prometheus()
+    assert "# TYPE lat_seconds histogram" in text
+    assert 'lat_seconds_bucket{op="x",le="0.1"} 2' in text
+    assert 'lat_seconds_bucket{op="x",le="+Inf"} 4' in text
+    assert 'calls_total{outcome="ok"} 3.0' in text
+
+
+def test_timer_decorator_and_worker_merge():
+    worker = Registry()
+
+    @worker.histogram("work_seconds").time(kind="unit")
+    def work(x):
+        return x + 1
+
+    assert work(1) == 2
+    worker.counter("items_total").inc(5)
+
+    parent = Registry()
+    parent.counter("items_total").inc(1)
+    parent.merge(worker.drain())
+    parent.merge(worker.drain())  # empty after drain
+    assert parent.summary()["counters"]["items_total"] == {"": 6.0}
+    assert parent.summary()["histograms"]["work_seconds"]["kind=unit"]["count"] == 1
+
+
+def test_pipeline_steps_are_timed_and_exported(tmp_path):
+    REGISTRY.reset()
+    run_section(SECTION, RunOptions(use_llm=False, rewrite=False))
+    summary = REGISTRY.summary()
+    steps = summary["histograms"]["pipeline_step_seconds"]
+    assert {f"step=step{i}" for i in range(2, 12)} <= set(steps)
+    assert summary["counters"]["classifier_decisions_total"] == {"source=rules": 3.0}
+
+    prom, js = REGISTRY.write(tmp_path)
+    assert "pipeline_step_seconds_count" in prom.read_text(encoding="utf-8")
+    assert json.loads(js.read_text(encoding="utf-8"))["histograms"]["pipeline_step_seconds"]
@@ -0,0 +1,43 @@
+from src.db.models import RawSection
+from src.pipeline.orchestrator import RunOptions, run_section
+
+
+SECTION = RawSection(
+    section_id=10002,
+    page_id=1,
+    page_title="US Perpetual-Style Futures 101",
+    title="What is a funding rate?",
+    text=(
+        "A funding rate is a periodic payment between longs and shorts. "
+        "Funding accrues hourly and is settled twice daily. "
+        "For example, an investor pays funding when the price is above spot."
+    ),
+    topic="Crypto Trading",
+    keywords=["funding", "funding rate"],
+)
+
+
+def test_run_section_in_memory_without_llm():
+    result = run_section(SECTION, RunOptions(use_llm=False, rewrite=False))
+    assert len(result.sentences) == 3
+    assert len(result.labeled) == len(result.scored) == 3
+    assert result.mapped and all("slots" in m for m in result.mapped)
+    assert result.difficulty in {"Beginner", "Intermediate", "Master"}
+    assert len(result.quality) == sum(len(m["content"]) for m in result.mapped)
+    assert all(r.lesson_id == SECTION.section_id for r in result.rows)
+
+
+def test_run_section_dumps_artifacts(tmp_path):
+    run_section(SECTION, RunOptions(use_llm=False, rewrite=False, dump_dir=tmp_path))
+    written = {p.name for p in (tmp_path / str(SECTION.section_id)).iterdir()}
+    assert {"step2_sentences.json", "step7_mapped.json", "step11_lesson_rows.json"} <= written
+
+
+def test_concurrent_scheduler_matches_inline():
+    from src.pipeline.orchestrator import run_sections, run_sections_concurrent
+
+    opts = RunOptions(use_llm=False, rewrite=False)
+    sections = [SECTION] * 3
+    inline = [(r.selected, r.difficulty, r.rows) for r in run_sections(sections, opts)]
+    concurrent = [(r.selected, r.difficulty, r.rows) for r in run_sections_concurrent(sections, opts)]
+    assert concurrent == inline
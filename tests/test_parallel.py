@@ -0,0 +1,30 @@
+from src.db.models import RawSection
+from src.pipeline.orchestrator import RunOptions, run_sections
+from src.pipeline.parallel import iter_pages, run_pages_parallel
+
+
+TEXTS = [
+    "A funding rate is a periodic payment. Funding accrues hourly and is settled twice daily.",
+    "First, compute the mark price. Then, apply the funding.",
+    "For example, an investor enters a long position. Compared to spot, futures may differ.",
+]
+
+
+def _sections():
+    out = []
+    for page in range(1, 5):
+        for serial, text in enumerate(TEXTS, start=1):
+            out.append(RawSection(section_id=page * 10000 + serial, page_id=page, page_title=f"p{page}", title=None, text=text))
+    return out
+
+
+def test_iter_pages_groups_consecutive_sections():
+    pages = list(iter_pages(_sections()))
+    assert [len(p) for p in pages] == [3, 3, 3, 3]
+
+
+def test_parallel_results_match_sequential_order():
+    opts = RunOptions(use_llm=False, rewrite=False)
+    sequential = [(r.section_id, r.selected, r.difficulty) for r in run_sections(_sections(), opts)]
+    parallel = [(r.section_id, r.selected, r.difficulty) for r in run_pages_parallel(_sections(), opts, workers=2, chunksize=1)]
+    assert parallel == sequential
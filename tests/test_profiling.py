@@ -0,0 +1,63 @@
+import cProfile
+import json
+import pstats
+
+from src.pipeline.orchestrator import RunOptions, run_section
+from src.utils.profiling import Profiler, collapse_stats
+
+from tests.test_orchestrator import SECTION
+
+
+def _leaf(n):
+    return sum(i * i for i in range(n))
+
+
+def _outer():
+    return _leaf(20000) + _leaf(20000)
+
+
+def test_collapse_stats_nests_callees_under_callers():
+    prof = cProfile.Profile()
+    prof.enable()
+    _outer()
+    prof.disable()
+    stacks = collapse_stats(pstats.Stats(prof), prefix="page_1;step5")
+    assert all(s.startswith("page_1;step5;") for s in stacks)
+    leaf = [s for s in stacks if s.split(";")[-1].startswith("_leaf ")]
+    assert leaf and all("_outer (test_profiling.py" in s for s in leaf)
+    assert all(isinstance(v, int) and v > 0 for v in stacks.values())
+
+
+def test_disabled_profiler_is_a_shared_noop():
+    p = Profiler()
+    assert not p.enabled
+    assert p.step("step2") is p.step("step3")
+
+
+def test_profiled_section_writes_reports(tmp_path):
+    profiler = Profiler(profile=True, trace_memory=True)
+    try:
+        run_section(SECTION, RunOptions(use_llm=False, rewrite=False, profiler=profiler))
+        paths = {p.name: p for p in profiler.write(tmp_path)}
+    finally:
+        profiler.close()
+    assert set(paths) == {"cpu.collapsed", "cpu_steps.txt", "memory_steps.json", "memory_top.txt"}
+    lines = paths["cpu.collapsed"].read_text(encoding="utf-8").splitlines()
+    assert any(line.startswith(f"page_{SECTION.page_id};step3;") for line in lines)
+    memory = json.loads(paths["memory_steps.json"].read_text(encoding="utf-8"))
+    assert set(memory["steps"]) == {f"step{i}" for i in range(2, 12)}
+    assert memory["pages"][str(SECTION.page_id)]["calls"] == 10
+
+
+def test_reset_starts_a_fresh_report(tmp_path):
+    profiler = Profiler(profile=True, trace_memory=True)
+    try:
+        run_section(SECTION, RunOptions(use_llm=False, rewrite=False, profiler=profiler))
+        profiler.reset()
+        assert not profiler.stacks and not profiler.step_stats and profiler.memory == {"steps": {}, "pages": {}}
+        run_section(SECTION, RunOptions(use_llm=False, rewrite=False, profiler=profiler))
+        paths = {p.name: p for p in profiler.write(tmp_path)}
+    finally:
+        profiler.close()
+    memory = json.loads(paths["memory_steps.json"].read_text(encoding="utf-8"))
+    assert memory["pages"][str(SECTION.page_id)]["calls"] == 10  # only the second run
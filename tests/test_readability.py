@@ -0,0 +1,27 @@
+import json
+from pathlib import Path
+
+from textstat import textstat
+
+from src.utils.readability import readability_stats, word_syllables
+
+
+EXAMPLE = Path(__file__).resolve().parents[1] / "example.json"
+
+
+def test_fk_grade_matches_textstat_on_example_sections():
+    pages = json.loads(EXAMPLE.read_text(encoding="utf-8"))
+    texts = [s["text"] for p in pages for s in p["page_content"]]
+    texts += ["Hi.", "", "Don't panic! It's 24/7 trading, e.g. BTC-PERP."]
+    for t in texts:
+        assert readability_stats(t).fk_grade == textstat.flesch_kincaid_grade(t), t
+
+
+def test_counts_and_syllable_cache():
+    stats = readability_stats("Funding accrues hourly. It settles twice daily.")
+    assert stats.word_count == 7
+    assert stats.sentence_count == 2
+    assert stats.approx_tokens == int(7 * 1.3)
+    before = word_syllables.cache_info().hits
+    word_syllables("funding")
+    assert word_syllables.cache_info().hits == before + 1
@@ -0,0 +1,94 @@
+from dataclasses import replace
+from itertools import groupby
+
+from src.db.models import RawSection
+from src.pipeline.scheduler import SectionScheduler
+from src.services import classifier
+
+
+def _section(section_id, sentences, page_id=1, topic=None):
+    text = " ".join(f"{s}." for s in sentences)
+    return RawSection(section_id=section_id, page_id=page_id, page_title=None, title=None, text=text, topic=topic)
+
+
+def _long(section_id, n=12, **kw):
+    return _section(section_id, [f"funding accrues hourly on contract {i}" for i in range(n)], **kw)
+
+
+def _short(section_id, **kw):
+    return _section(section_id, ["a funding rate is a periodic payment"], **kw)
+
+
+def test_expensive_sections_are_spread_between_cheap_ones():
+    heavy = [_long(i) for i in range(3)]
+    light = [_short(10 + i) for i in range(6)]
+    order = SectionScheduler(use_llm=False).plan(heavy + light)
+    ids = [s.section_id for s in order]
+    assert sorted(ids) == sorted(s.section_id for s in heavy + light)
+    heavy_at = [i for i, s in enumerate(order) if s.section_id < 10]
+    assert heavy_at[0] > 0  # the head of the output is never a heavy section
+    assert max(b - a for a, b in zip(heavy_at, heavy_at[1:])) <= 3
+    assert min(b - a for a, b in zip(heavy_at, heavy_at[1:])) >= 2
+
+
+def test_priority_wins_beyond_the_slack():
+    sections = [_short(1, topic="Basics"), _long(2, topic="Crypto Trading"), _short(3, page_id=7)]
+    order = SectionScheduler(use_llm=False, topic_weights={"Crypto Trading": 2.0}, page_weights={7: 1.0}).plan(sections)
+    assert [s.section_id for s in order] == [2, 3, 1]
+
+    fresh = [_short(1, page_id=1), _short(2, page_id=5), _short(3, page_id=3)]
+    order = SectionScheduler(use_llm=False, freshness_weight=1.0, priority_slack=0.0).plan(fresh)
+    assert [s.section_id for s in order] == [2, 3, 1]
+
+
+def test_cost_counts_expected_llm_fallbacks(monkeypatch):
+    section = replace(
+        _section(1, ["the market moved", "funding accrues hourly because the mark price keeps 10% aligned"]),
+        keywords=["funding", "mark", "price", "hourly"],
+    )
+    calls = []
+
+    def offline_llm(prompt, **kw):
+        calls.append(prompt)
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(classifier, "rewrite_style", offline_llm)
+    for s in section.text.split(". "):
+        classifier.classify_with_fallback(s.rstrip("."), section_keywords=section.keywords, use_llm=True)
+
+    cost = SectionScheduler(use_llm=True, sentence_cost_s=0.0, llm_call_cost_s=1.0).cost(section)
+    assert cost.sentences == 2
+    assert cost.llm_calls == len(calls) == 1 and cost.seconds == 1.0
+    assert SectionScheduler(use_llm=False).cost(section).llm_calls == 0
+
+
+def test_schedule_only_reads_one_window_ahead():
+    pulled = []
+
+    def source():
+        for i in range(10):
+            pulled.append(i)
+            yield replace(_short(i), page_id=i)
+
+    it = SectionScheduler(window=4, use_llm=False).schedule(source())
+    first = next(it)
+    assert len(pulled) == 4
+    assert sorted([first.section_id] + [s.section_id for s in it]) == list(range(10))
+
+
+def test_keep_pages_reorders_whole_pages_only():
+    sections = [
+        _short(1, page_id=1), _long(2, page_id=1), _short(3, page_id=1),
+        _long(4, page_id=2), _long(5, page_id=2),
+        _short(6, page_id=3), _short(7, page_id=3),
+    ]
+    order = SectionScheduler(window=4, use_llm=False, keep_pages=True).schedule(iter(sections))
+    ids = [s.section_id for s in order]
+    assert sorted(ids) == list(range(1, 8))
+    pages = [k for k, _ in groupby(ids, key=lambda i: next(s.page_id for s in sections if s.section_id == i))]
+    assert sorted(pages) == [1, 2, 3]  # every page is contiguous
+    for page in ([1, 2, 3], [4, 5], [6, 7]):
+        assert [i for i in ids if i in page] == page  # and keeps its section order
+    # Without it, page 2 straddles a window and is split
+    split = [s.page_id for s in SectionScheduler(window=4, use_llm=False).schedule(iter(sections))]
+    assert len([k for k, _ in groupby(split)]) > 3
@@ -0,0 +1,96 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.pipeline.orchestrator import RunOptions, run_section
+from src.pipeline.service import make_server, result_payload, section_from_request
+
+from tests.test_orchestrator import SECTION
+
+
+@pytest.fixture
+def server():
+    srv = make_server(RunOptions(use_llm=False, rewrite=False), "127.0.0.1", 0, window_s=0.2, max_batch=4)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    thread.join()
+
+
+def _post(server, payload):
+    host, port = server.server_address[:2]
+    req = urllib.request.Request(f"http://{host}:{port}/lesson", data=json.dumps(payload).encode(), method="POST")
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return resp.headers, json.loads(resp.read())
+
+
+def test_concurrent_requests_are_batched_and_timed(server):
+    body = {"text": SECTION.text, "keywords": SECTION.keywords, "title": SECTION.title, "topic": SECTION.topic}
+    with ThreadPoolExecutor(3) as pool:
+        responses = list(pool.map(lambda _: _post(server, body), range(3)))
+
+    expected = json.loads(json.dumps(result_payload(run_section(section_from_request(body), RunOptions(use_llm=False, rewrite=False)))))
+    for headers, payload in responses:
+        assert payload == expected
+        timing = dict(part.strip().split(";dur=") for part in headers["Server-Timing"].split(","))
+        assert set(timing) == {"queue", "pipeline", "total"}
+        assert float(timing["total"]) >= float(timing["pipeline"])
+    assert {h["X-Batch-Size"] for h, _ in responses} == {"3"}
+    assert server.batcher.batches == 1 and server.batcher.requests == 3
+    assert expected["steps"] and expected["labeled"] and expected["rows"]
+
+
+def test_invalid_requests_are_rejected(server):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        _post(server, {"text": "", "keywords": ["funding"]})
+    assert err.value.code == 400 and "text" in json.loads(err.value.read())["error"]
+    with pytest.raises(ValueError):
+        section_from_request({"text": "Funding is paid hourly.", "keywords": "funding"})
+
+    host, port = server.server_address[:2]
+    with urllib.request.urlopen(f"http://{host}:{port}/healthz", timeout=10) as resp:
+        assert json.loads(resp.read())["ok"] is True
+
+
+def test_a_failing_section_only_fails_its_own_request(server, monkeypatch):
+    from src.pipeline import orchestrator
+
+    real = orchestrator.determine_difficulty
+
+    def flaky(text, vocab):
+        if "explode" in text:
+            raise RuntimeError("llm error")
+        return real(text, vocab)
+
+    monkeypatch.setattr(orchestrator, "determine_difficulty", flaky)
+    good = {"text": SECTION.text, "keywords": SECTION.keywords}
+    bad = {"text": "Funding is a payment that may explode the price.", "keywords": ["funding"]}
+
+    def post(body):
+        try:
+            return _post(server, body)[1]
+        except urllib.error.HTTPError as err:
+            return err.code, json.loads(err.read())
+
+    with ThreadPoolExecutor(3) as pool:
+        out = list(pool.map(post, [good, bad, good]))
+    assert out[1] == (500, {"error": "internal error"})  # no exception details leak to the client
+    assert out[0]["rows"] and out[2] == out[0]
+    assert server.batcher.batches == 1
+
+
+def test_negative_content_length_is_rejected(server):
+    import http.client
+
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    conn.putrequest("POST", "/lesson")
+    conn.putheader("Content-Length", "-1")
+    conn.endheaders()
+    assert conn.getresponse().status == 400
+    conn.close()
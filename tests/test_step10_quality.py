@@ -0,0 +1,38 @@
+from src.pipeline.step10_quality import evaluate_item, gate_and_regenerate
+
+
+HARD = (
+    "Notwithstanding considerable institutional heterogeneity, perpetual-style derivatives "
+    "necessitate comprehensive understanding of collateralization methodologies."
+)
+EASY = "You pay a small fee each hour. It keeps the price close to spot."
+
+
+def test_evaluate_item_flags_grade_and_empty():
+    assert evaluate_item(EASY).ok
+    assert evaluate_item(HARD).reason.startswith("reading_grade_too_high")
+    assert evaluate_item(HARD).retryable
+    assert evaluate_item("  ").reason == "empty"
+    assert not evaluate_item("  ").retryable
+
+
+def test_regenerates_only_failing_items_within_budget():
+    calls = []
+
+    def fake_rewrite(texts, reasons):
+        calls.append((list(texts), list(reasons)))
+        return [EASY for _ in texts]
+
+    outcome = gate_and_regenerate(["a", "b"], [EASY, HARD], max_retries=2, rewrite_fn=fake_rewrite)
+    assert outcome.ok
+    assert outcome.llm_calls == 1
+    assert calls[0][0] == ["b"]
+    assert calls[0][1][0].startswith("reading_grade_too_high")
+    assert outcome.attempts == [0, 1]
+
+
+def test_stops_after_retry_budget():
+    outcome = gate_and_regenerate(["a"], [HARD], max_retries=2, rewrite_fn=lambda t, r: [HARD for _ in t])
+    assert not outcome.ok
+    assert outcome.llm_calls == 2
+    assert outcome.passed() == []
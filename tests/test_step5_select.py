@@ -0,0 +1,51 @@
+from src.pipeline.step5_select import select_minimal_set
+from src.services.classifier import Classification
+
+
+def _cls(label: str, prob: float = 0.6) -> Classification:
+    return Classification(label=label, probability=prob, rule_hit=[], source="rules")
+
+
+def test_prefers_higher_step4_scores():
+    labeled = [
+        ("a funding rate is a payment.", _cls("Definition")),
+        ("a mark price is the fair value of the contract.", _cls("Definition")),
+    ]
+    scored = [
+        {"text": labeled[0][0], "score": 0.4},
+        {"text": labeled[1][0], "score": 0.9},
+    ]
+    out = select_minimal_set(labeled, scored, top_k=1)
+    assert out["Definition"] == [labeled[1][0]]
+
+
+def test_mmr_skips_near_duplicates():
+    labeled = [
+        ("funding accrues hourly and is settled twice daily.", _cls("Mechanism")),
+        ("funding accrues hourly and is settled twice a day.", _cls("Mechanism")),
+        ("the mark price keeps the contract aligned with spot.", _cls("Mechanism")),
+    ]
+    scored = [
+        {"text": labeled[0][0], "score": 0.9},
+        {"text": labeled[1][0], "score": 0.89},
+        {"text": labeled[2][0], "score": 0.7},
+    ]
+    out = select_minimal_set(labeled, scored, top_k=2, mmr_lambda=0.5)
+    assert out["Mechanism"] == [labeled[0][0], labeled[2][0]]
+
+
+def test_min_score_and_empty_types():
+    labeled = [("for example, an investor buys.", _cls("Example", 0.3))]
+    out = select_minimal_set(labeled, top_k=2, min_score=0.5)
+    assert all(v == [] for v in out.values())
+
+
+def test_unscored_sentences_do_not_compete_with_step4_scores():
+    labeled = [
+        ("a funding rate is a payment.", _cls("Definition", 0.99)),
+        ("a mark price is the fair value of the contract.", _cls("Definition", 0.5)),
+    ]
+    scored = [{"text": labeled[1][0], "score": 0.2}]
+    # A probability of 0.99 is not comparable to a score of 0.2
+    assert select_minimal_set(labeled, scored, top_k=1)["Definition"] == [labeled[1][0]]
+    assert select_minimal_set(labeled, top_k=1)["Definition"] == [labeled[0][0]]
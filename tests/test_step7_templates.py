@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from src.pipeline.step7_templates import TemplateError, get_engine, map_to_templates
+
+
+TEMPLATES = [
+    {
+        "id": "definition_tim_3p",
+        "info_type": "Definition",
+        "slots": {"lead_in": "Tim is learning about {term}.", "definition": "{definition_text}"},
+    },
+    {
+        "id": "mechanism_2p_view",
+        "info_type": "Mechanism",
+        "slots": {"steps": ["{step_1}", "{step_2}"]},
+    },
+]
+
+
+def test_fills_slots_and_reports_missing():
+    selected = {"Definition": ["a funding rate is a payment."], "Mechanism": ["funding accrues hourly."], "Example": []}
+    steps = map_to_templates(selected, TEMPLATES, {"keywords": ["funding rate"]})
+    by_type = {s["info_type"]: s for s in steps}
+    assert by_type["Definition"]["slots"] == {
+        "lead_in": "Tim is learning about funding rate.",
+        "definition": "a funding rate is a payment.",
+    }
+    assert by_type["Definition"]["missing_slots"] == []
+    assert by_type["Mechanism"]["slots"]["steps"] == ["funding accrues hourly.", ""]
+    assert by_type["Mechanism"]["missing_slots"] == ["step_2"]
+
+
+def test_unknown_placeholder_fails_at_load(tmp_path):
+    path = tmp_path / "templates.json"
+    path.write_text(json.dumps([{"id": "x", "info_type": "Definition", "slots": {"a": "{trem}"}}]), encoding="utf-8")
+    with pytest.raises(TemplateError):
+        get_engine(path)
+
+
+def test_engine_cached_until_file_changes(tmp_path):
+    path = tmp_path / "templates.json"
+    path.write_text(json.dumps(TEMPLATES), encoding="utf-8")
+    engine = get_engine(path)
+    assert get_engine(path) is engine
+    path.write_text(json.dumps(TEMPLATES[:1]), encoding="utf-8")
+    assert len(get_engine(path).templates) == 1
@@ -0,0 +1,39 @@
+import json
+from types import SimpleNamespace
+
+import src.pipeline.step8_rewrite as step8
+
+
+def test_batches_texts_into_one_request(monkeypatch):
+    prompts = []
+
+    def fake(prompt, temperature=None, timeout=None):
+        prompts.append(prompt)
+        items = json.loads(prompt.split("Items:\n", 1)[1])
+        return SimpleNamespace(text="Sure:\n" + json.dumps([f"you {it['text']}" for it in items]))
+
+    monkeypatch.setattr(step8, "rewrite_style", fake)
+    out = step8.micro_rewrite_batched(["a b", "c d", "e f"])
+    assert out == ["you a b", "you c d", "you e f"]
+    assert len(prompts) == 1
+
+
+def test_falls_back_per_item_on_parse_failure(monkeypatch):
+    prompts = []
+
+    def fake(prompt, temperature=None, timeout=None):
+        prompts.append(prompt)
+        if "Items:" in prompt:
+            return SimpleNamespace(text="not json")
+        return SimpleNamespace(text=" single ")
+
+    monkeypatch.setattr(step8, "rewrite_style", fake)
+    out = step8.micro_rewrite_batched(["a", "b"])
+    assert out == ["single", "single"]
+    assert len(prompts) == 3
+
+
+def test_pack_batches_respects_budget():
+    texts = ["one two three four five six seven"] * 5  # ~10 tokens each
+    batches = step8.pack_batches(texts, token_budget=25)
+    assert batches == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,103 @@
+import asyncio
+import random
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+
+from src.pipeline.orchestrator import RunOptions, run_section
+from src.pipeline.streaming import Stage, StreamPipeline, iter_stream, run_sections_streaming
+
+from tests.test_orchestrator import SECTION
+
+
+def _jitter(x):
+    time.sleep(random.random() * 0.002)
+    return x * 2
+
+
+async def _plus_one(x):
+    await asyncio.sleep(0)
+    return x + 1
+
+
+def test_stream_preserves_order_across_sync_and_async_stages():
+    stages = [Stage("double", _jitter, workers=4), Stage("inc", _plus_one, workers=3, kind="io")]
+    pipeline = StreamPipeline(stages, queue_size=2)
+    assert list(iter_stream(pipeline, range(50))) == [2 * i + 1 for i in range(50)]
+    assert pipeline.stats["double"].processed == 50
+
+
+def test_backpressure_bounds_items_in_flight():
+    lock = threading.Lock()
+    pulled = 0
+    max_ahead = 0
+    emitted = 0
+
+    def source():
+        nonlocal pulled, max_ahead
+        for i in range(200):
+            with lock:
+                pulled += 1
+                max_ahead = max(max_ahead, pulled - emitted)
+            yield i
+
+    def slow(x):  # the "LLM" bottleneck
+        time.sleep(0.001)
+        return x
+
+    pipeline = StreamPipeline([Stage("fast", lambda x: x, workers=2), Stage("slow", slow, workers=2, kind="io")], queue_size=4)
+    for _ in iter_stream(pipeline, source(), maxsize=1):
+        with lock:
+            emitted += 1
+    assert emitted == 200
+    # 3 queues + 2 hand-off slots + 4 workers + reorder slack, never the whole input
+    assert max_ahead <= 40
+
+
+def test_a_stalled_item_bounds_admission_to_the_window():
+    release = threading.Event()
+    pulled = []
+
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    def stall_first(x):
+        if x == 0:
+            release.wait(5)
+        return x
+
+    pipeline = StreamPipeline([Stage("stall", stall_first, workers=4, kind="io")], queue_size=8, window=5)
+    seen_while_stalled = []
+
+    def unstall():
+        seen_while_stalled.append(len(pulled))
+        release.set()
+
+    threading.Timer(0.2, unstall).start()
+    assert list(iter_stream(pipeline, source())) == list(range(100))
+    # Items 1..4 finished while 0 stalled, but the source was not read past the window
+    assert seen_while_stalled == [5]
+
+
+def test_stage_error_reaches_consumer():
+    def boom(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    pipeline = StreamPipeline([Stage("boom", boom, workers=2)], queue_size=2)
+    with pytest.raises(ValueError, match="bad item"):
+        list(iter_stream(pipeline, range(10)))
+
+
+def test_lesson_stream_matches_inline_and_passes_skipped_through():
+    opts = RunOptions(use_llm=False, rewrite=False)
+    other = replace(SECTION, section_id=SECTION.section_id + 1)
+    pairs = list(run_sections_streaming([SECTION, other], opts, skip={other.section_id}, queue_size=1))
+    assert [s.section_id for s, _ in pairs] == [SECTION.section_id, other.section_id]
+    assert pairs[0][1].rows == run_section(SECTION, opts).rows
+    assert pairs[1][1] is None